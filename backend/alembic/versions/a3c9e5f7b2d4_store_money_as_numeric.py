@@ -0,0 +1,53 @@
+"""store money as numeric
+
+Revision ID: a3c9e5f7b2d4
+Revises: f2b7d9e4a1c8
+Create Date: 2026-10-17 17:12:06.845193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e5f7b2d4'
+down_revision = 'f2b7d9e4a1c8'
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = [
+    ('income_wallets', 'balance'),
+    ('income_transactions', 'amount'),
+    ('income_balance_snapshots', 'balance'),
+    ('shopping_wallets', 'balance'),
+    ('shopping_transactions', 'amount'),
+    ('shopping_vouchers', 'amount'),
+    ('investments', 'amount'),
+    ('investments', 'returns'),
+    ('team_investments', 'amount'),
+    ('bonuses', 'amount'),
+    ('payments', 'amount'),
+    ('plans', 'amount'),
+    ('current_plans', 'investment_amount'),
+    ('profiles', 'plan_amount'),
+    ('profiles', 'total_invested_amount'),
+]
+
+
+def upgrade() -> None:
+    # Snapshots summed float amounts; drop them so the snapshot job
+    # rebuilds them from the rounded transactions
+    op.execute('DELETE FROM income_balance_snapshots')
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=sa.Float(),
+               type_=sa.Numeric(precision=18, scale=2),
+               postgresql_using=f'round({column}::numeric, 2)')
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=sa.Numeric(precision=18, scale=2),
+               type_=sa.Float(),
+               postgresql_using=f'{column}::double precision')
@@ -0,0 +1,24 @@
+"""add voucher pagination index
+
+Revision ID: a3d8e2f5c9b1
+Revises: f1c5a9d3e7b8
+Create Date: 2026-10-17 18:12:37.504219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d8e2f5c9b1'
+down_revision = 'f1c5a9d3e7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_shopping_vouchers_wallet_id_created_at_id', 'shopping_vouchers', ['wallet_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shopping_vouchers_wallet_id_created_at_id', table_name='shopping_vouchers')
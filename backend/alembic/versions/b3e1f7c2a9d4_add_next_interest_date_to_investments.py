@@ -0,0 +1,54 @@
+"""add next_interest_date to investments
+
+Revision ID: b3e1f7c2a9d4
+Revises: 6cbd27420b4d
+Create Date: 2026-10-17 10:05:12.418330
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e1f7c2a9d4'
+down_revision = '6cbd27420b4d'
+branch_labels = None
+depends_on = None
+
+
+def payout_day(month_start: str) -> str:
+    """SQL for the start date's day of month in the given month, clamped to its last day."""
+    return f"""({month_start} + (LEAST(
+        EXTRACT(DAY FROM start_date)::int,
+        EXTRACT(DAY FROM ({month_start} + INTERVAL '1 month' - INTERVAL '1 day'))::int
+    ) - 1) * INTERVAL '1 day')::date"""
+
+
+def upgrade() -> None:
+    op.add_column('investments', sa.Column('next_interest_date', sa.Date(), nullable=True))
+    op.create_index(op.f('ix_investments_next_interest_date'), 'investments', ['next_interest_date'], unique=False)
+    
+    # Backfill active investments with their first payout after today. Nothing is
+    # paid in the start month, so the earliest candidate is the month after it.
+    first_month = "GREATEST(date_trunc('month', CURRENT_DATE), date_trunc('month', start_date) + INTERVAL '1 month')::date"
+    following_month = f"({first_month} + INTERVAL '1 month')::date"
+    op.execute(f"""
+        UPDATE investments
+        SET next_interest_date = CASE
+            WHEN due.first_payout > CURRENT_DATE THEN due.first_payout
+            ELSE due.following_payout
+        END
+        FROM (
+            SELECT id,
+                   {payout_day(first_month)} AS first_payout,
+                   {payout_day(following_month)} AS following_payout
+            FROM investments
+            WHERE status = 'ACTIVE' AND start_date IS NOT NULL
+        ) AS due
+        WHERE investments.id = due.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_investments_next_interest_date'), table_name='investments')
+    op.drop_column('investments', 'next_interest_date')
@@ -0,0 +1,64 @@
+"""add wallet monthly totals
+
+Revision ID: b6e2d8f4a9c1
+Revises: a3c9e5f7b2d4
+Create Date: 2026-10-17 19:03:27.514286
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d8f4a9c1'
+down_revision = 'a3c9e5f7b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wallet_monthly_totals',
+    sa.Column('wallet_kind', sa.String(), nullable=False),
+    sa.Column('wallet_id', sa.String(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('transaction_type', postgresql.ENUM(name='transactiontype', create_type=False), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='transactionstatus', create_type=False), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('transactions', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('wallet_kind', 'wallet_id', 'month', 'transaction_type', 'status', 'source')
+    )
+
+    # Give existing bonus and payment transactions the sources new ones are posted with
+    op.execute(
+        "UPDATE income_transactions SET source = 'bonus' "
+        "WHERE source IS NULL AND reference_id IN (SELECT id FROM bonuses)"
+    )
+    op.execute(
+        "UPDATE income_transactions SET source = 'payment' "
+        "WHERE source IS NULL AND reference_id IN (SELECT id FROM payments)"
+    )
+
+    # Roll up the existing ledgers
+    op.execute(
+        "INSERT INTO wallet_monthly_totals "
+        "(wallet_kind, wallet_id, month, transaction_type, status, source, total, transactions, updated_at) "
+        "SELECT 'income', wallet_id, date_trunc('month', created_at)::date, transaction_type, "
+        "coalesce(status, 'PENDING'), coalesce(source, ''), sum(amount), count(*), now() "
+        "FROM income_transactions WHERE wallet_id IS NOT NULL AND created_at IS NOT NULL "
+        "GROUP BY 2, 3, 4, 5, 6"
+    )
+    op.execute(
+        "INSERT INTO wallet_monthly_totals "
+        "(wallet_kind, wallet_id, month, transaction_type, status, source, total, transactions, updated_at) "
+        "SELECT 'shopping', wallet_id, date_trunc('month', created_at)::date, transaction_type, "
+        "coalesce(status, 'PENDING'), '', sum(amount), count(*), now() "
+        "FROM shopping_transactions WHERE wallet_id IS NOT NULL AND created_at IS NOT NULL "
+        "GROUP BY 2, 3, 4, 5"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('wallet_monthly_totals')
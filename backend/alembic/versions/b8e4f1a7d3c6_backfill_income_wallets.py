@@ -0,0 +1,32 @@
+"""backfill income wallets
+
+Revision ID: b8e4f1a7d3c6
+Revises: a3d8e2f5c9b1
+Create Date: 2026-10-17 18:40:11.925310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4f1a7d3c6'
+down_revision = 'a3d8e2f5c9b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Users registered before registration created their wallet get an empty one,
+    # so GET /income-wallet can read it without creating it
+    op.execute(
+        "INSERT INTO income_wallets (id, user_id, balance, created_at, updated_at) "
+        "SELECT md5(random()::text || users.id)::uuid::text, users.id, 0, now(), now() "
+        "FROM users LEFT JOIN income_wallets ON income_wallets.user_id = users.id "
+        "WHERE income_wallets.id IS NULL"
+    )
+
+
+def downgrade() -> None:
+    # The wallets cannot be told apart from those created on first use
+    pass
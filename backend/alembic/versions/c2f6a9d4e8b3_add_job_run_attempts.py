@@ -0,0 +1,26 @@
+"""add job run attempts
+
+Revision ID: c2f6a9d4e8b3
+Revises: b8e4f1a7d3c6
+Create Date: 2026-10-17 19:05:48.261793
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f6a9d4e8b3'
+down_revision = 'b8e4f1a7d3c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Runs recorded before attempts were counted were started at least once
+    op.add_column('job_runs', sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'))
+    op.alter_column('job_runs', 'attempts', server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column('job_runs', 'attempts')
@@ -0,0 +1,29 @@
+"""add voucher expiry
+
+Revision ID: c4f8a2e6d1b7
+Revises: b6e2d8f4a9c1
+Create Date: 2026-10-17 20:41:12.337905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f8a2e6d1b7'
+down_revision = 'b6e2d8f4a9c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('shopping_vouchers', sa.Column('expired_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_shopping_vouchers_expiry_date_unexpired', 'shopping_vouchers', ['expiry_date'],
+        unique=False, postgresql_where=sa.text('is_used IS NOT TRUE AND expired_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shopping_vouchers_expiry_date_unexpired', table_name='shopping_vouchers')
+    op.drop_column('shopping_vouchers', 'expired_at')
@@ -0,0 +1,59 @@
+"""add job_runs table and payout periods on income transactions
+
+Revision ID: c7d2a4e8f1b6
+Revises: b3e1f7c2a9d4
+Create Date: 2026-10-17 11:42:37.905114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2a4e8f1b6'
+down_revision = 'b3e1f7c2a9d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_runs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('job_name', sa.String(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('shards', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'FAILED', name='jobrunstatus'), nullable=True),
+    sa.Column('cursor', sa.String(), nullable=True),
+    sa.Column('rows_processed', sa.Integer(), nullable=True),
+    sa.Column('chunks_committed', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_name', 'run_date', 'shard', name='uq_job_runs_job_name_run_date_shard')
+    )
+    
+    op.add_column('income_transactions', sa.Column('source', sa.String(), nullable=True))
+    op.add_column('income_transactions', sa.Column('payout_period', sa.Date(), nullable=True))
+    op.create_index(
+        'uq_income_transactions_source_reference_period',
+        'income_transactions',
+        ['source', 'reference_id', 'payout_period'],
+        unique=True,
+        postgresql_where=sa.text('payout_period IS NOT NULL')
+    )
+    
+    # Tag historical scheduled payouts with their source. Their periods are left
+    # empty, so the uniqueness guarantee only applies to payouts from now on.
+    op.execute("UPDATE income_transactions SET source = 'interest' WHERE description LIKE 'Monthly interest from %'")
+    op.execute("UPDATE income_transactions SET source = 'daily_return' WHERE description LIKE 'Daily return from %'")
+
+
+def downgrade() -> None:
+    op.drop_index('uq_income_transactions_source_reference_period', table_name='income_transactions')
+    op.drop_column('income_transactions', 'payout_period')
+    op.drop_column('income_transactions', 'source')
+    op.drop_table('job_runs')
+    sa.Enum(name='jobrunstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""add job claims
+
+Revision ID: d5a1c8f3b7e9
+Revises: c2f6a9d4e8b3
+Create Date: 2026-10-17 19:38:20.647153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a1c8f3b7e9'
+down_revision = 'c2f6a9d4e8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_claims',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('job_name', sa.String(), nullable=False),
+    sa.Column('fire_time', sa.DateTime(), nullable=False),
+    sa.Column('runner', sa.String(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_name', 'fire_time', name='uq_job_claims_job_name_fire_time')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_claims')
@@ -0,0 +1,45 @@
+"""add job_executions history table
+
+Revision ID: d5f3b8a1c2e7
+Revises: c7d2a4e8f1b6
+Create Date: 2026-10-17 14:05:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f3b8a1c2e7'
+down_revision = 'c7d2a4e8f1b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_executions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('job_name', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'SUCCEEDED', 'FAILED', name='jobexecutionstatus'), nullable=True),
+    sa.Column('runner', sa.String(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('lag_seconds', sa.Float(), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('rows_scanned', sa.Integer(), nullable=True),
+    sa.Column('rows_updated', sa.Integer(), nullable=True),
+    sa.Column('rows_errored', sa.Integer(), nullable=True),
+    sa.Column('rows_per_second', sa.Float(), nullable=True),
+    sa.Column('shards', sa.Integer(), nullable=True),
+    sa.Column('error_count', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_executions_job_name_started_at', 'job_executions', ['job_name', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_executions_job_name_started_at', table_name='job_executions')
+    op.drop_table('job_executions')
+    sa.Enum(name='jobexecutionstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,29 @@
+"""add member id sequence
+
+Revision ID: d9a3f6b1e5c2
+Revises: c4f8a2e6d1b7
+Create Date: 2026-10-17 21:26:54.108342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a3f6b1e5c2'
+down_revision = 'c4f8a2e6d1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('member_id_seq', start=10000001)))
+    # Continue after the highest numeric member ID handed out so far
+    op.execute(
+        "SELECT setval('member_id_seq', GREATEST(10000000, "
+        "(SELECT MAX(member_id::bigint) FROM users WHERE member_id ~ '^[0-9]+$')))"
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('member_id_seq')))
@@ -0,0 +1,47 @@
+"""add referral closure
+
+Revision ID: e7b4c1d8a2f6
+Revises: d9a3f6b1e5c2
+Create Date: 2026-10-17 22:14:38.620517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b4c1d8a2f6'
+down_revision = 'd9a3f6b1e5c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('referral_closure',
+    sa.Column('ancestor_id', sa.String(), nullable=False),
+    sa.Column('descendant_id', sa.String(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+
+    # Every user is below each of their referrer's ancestors and the referrer
+    op.execute(
+        "INSERT INTO referral_closure (ancestor_id, descendant_id, depth) "
+        "WITH RECURSIVE links (ancestor_id, descendant_id, depth) AS ("
+        "SELECT referrer_id, id, 1 FROM users WHERE referrer_id IS NOT NULL "
+        "UNION ALL "
+        "SELECT links.ancestor_id, users.id, links.depth + 1 "
+        "FROM links JOIN users ON users.referrer_id = links.descendant_id"
+        ") SELECT ancestor_id, descendant_id, depth FROM links"
+    )
+
+    op.create_index('ix_referral_closure_ancestor_id_depth', 'referral_closure', ['ancestor_id', 'depth'], unique=False)
+    op.create_index('ix_referral_closure_descendant_id_depth', 'referral_closure', ['descendant_id', 'depth'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_referral_closure_descendant_id_depth', table_name='referral_closure')
+    op.drop_index('ix_referral_closure_ancestor_id_depth', table_name='referral_closure')
+    op.drop_table('referral_closure')
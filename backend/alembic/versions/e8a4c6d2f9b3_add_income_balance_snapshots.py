@@ -0,0 +1,36 @@
+"""add income balance snapshots
+
+Revision ID: e8a4c6d2f9b3
+Revises: d5f3b8a1c2e7
+Create Date: 2026-10-17 15:21:48.602913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a4c6d2f9b3'
+down_revision = 'd5f3b8a1c2e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('income_balance_snapshots',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('wallet_id', sa.String(), nullable=False),
+    sa.Column('as_of', sa.DateTime(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['wallet_id'], ['income_wallets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_income_balance_snapshots_wallet_id_as_of', 'income_balance_snapshots', ['wallet_id', 'as_of'], unique=False)
+    op.create_index('ix_income_transactions_wallet_id_created_at', 'income_transactions', ['wallet_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_income_transactions_wallet_id_created_at', table_name='income_transactions')
+    op.drop_index('ix_income_balance_snapshots_wallet_id_as_of', table_name='income_balance_snapshots')
+    op.drop_table('income_balance_snapshots')
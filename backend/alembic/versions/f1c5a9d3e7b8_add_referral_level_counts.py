@@ -0,0 +1,48 @@
+"""add referral level counts
+
+Revision ID: f1c5a9d3e7b8
+Revises: e7b4c1d8a2f6
+Create Date: 2026-10-17 23:02:51.347106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c5a9d3e7b8'
+down_revision = 'e7b4c1d8a2f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('referral_level_counts',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.Column('active_members', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'depth')
+    )
+
+    # Count the existing downlines level by level
+    op.execute(
+        "INSERT INTO referral_level_counts (user_id, depth, members, active_members, updated_at) "
+        "SELECT referral_closure.ancestor_id, referral_closure.depth, count(*), "
+        "count(*) FILTER (WHERE users.is_active IS NOT false), now() "
+        "FROM referral_closure JOIN users ON users.id = referral_closure.descendant_id "
+        "GROUP BY referral_closure.ancestor_id, referral_closure.depth"
+    )
+    # A network's total members are its owner's direct referrals
+    op.execute(
+        "UPDATE networks SET total_members = coalesce(("
+        "SELECT members FROM referral_level_counts "
+        "WHERE referral_level_counts.user_id = networks.user_id AND referral_level_counts.depth = 1"
+        "), 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('referral_level_counts')
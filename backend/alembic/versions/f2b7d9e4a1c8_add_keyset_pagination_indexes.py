@@ -0,0 +1,38 @@
+"""add keyset pagination indexes
+
+Revision ID: f2b7d9e4a1c8
+Revises: e8a4c6d2f9b3
+Create Date: 2026-10-17 16:04:52.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d9e4a1c8'
+down_revision = 'e8a4c6d2f9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_income_transactions_wallet_id_created_at_id', 'income_transactions', ['wallet_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_income_transactions_wallet_id_created_at', table_name='income_transactions')
+    op.create_index('ix_shopping_transactions_wallet_id_created_at_id', 'shopping_transactions', ['wallet_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_investments_user_id_created_at_id', 'investments', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_team_investments_team_member_id_created_at_id', 'team_investments', ['team_member_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_referrer_id_join_date_id', 'users', ['referrer_id', 'join_date', 'id'], unique=False)
+    op.create_index('ix_bonuses_user_id_created_at_id', 'bonuses', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_notifications_user_id_created_at_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_id_created_at_id', table_name='notifications')
+    op.drop_index('ix_bonuses_user_id_created_at_id', table_name='bonuses')
+    op.drop_index('ix_users_referrer_id_join_date_id', table_name='users')
+    op.drop_index('ix_team_investments_team_member_id_created_at_id', table_name='team_investments')
+    op.drop_index('ix_investments_user_id_created_at_id', table_name='investments')
+    op.drop_index('ix_shopping_transactions_wallet_id_created_at_id', table_name='shopping_transactions')
+    op.create_index('ix_income_transactions_wallet_id_created_at', 'income_transactions', ['wallet_id', 'created_at'], unique=False)
+    op.drop_index('ix_income_transactions_wallet_id_created_at_id', table_name='income_transactions')
@@ -1,22 +1,29 @@
+import uuid
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.auth import create_access_token, get_password_hash, verify_password, get_current_active_user
 from app.core.config import settings
+from app.core.referral_graph import referral_graph
 from app.db.database import get_db
-from app.models.user import User, Profile
+from app.models.network import Network
+from app.models.user import User, Profile, member_id_sequence, format_member_id
+from app.models.wallet import IncomeWallet, ShoppingWallet
 from app.schemas.auth import Token, LoginRequest, PasswordReset
 from app.schemas.user import UserCreate, UserResponse
 from app.services.email_service import email_service
+from app.services.referral_tree_service import ReferralTreeService
 from app.utils.phone_utils import normalize_phone_number, is_valid_phone_number
 
 router = APIRouter()
 
 @router.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user."""
+def register_user(user_in: UserCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Register a new user with their profile, wallets and network in one transaction."""
     # Check if phone number already exists
     db_user = db.query(User).filter(User.phone == user_in.phone).first()
     if db_user:
@@ -34,41 +41,19 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
                 detail="Email already registered"
             )
     
-    # Generate a unique member ID
-    # Query for the highest member_id and increment it
-    try:
-        # Use a raw SQL query to get the max member_id as an integer
-        result = db.execute("SELECT MAX(CAST(member_id AS INTEGER)) FROM users").scalar()
-        if result:
-            # Increment the highest member_id
-            next_id = int(result) + 1
-        else:
-            # If no users exist yet, start with 10000001
-            next_id = 10000001
-            
-        # Format as 8-digit string with leading zeros
-        member_id = str(next_id).zfill(8)
-        
-        # Verify this ID doesn't already exist (double-check)
-        while db.query(User).filter(User.member_id == member_id).first():
-            next_id += 1
-            member_id = str(next_id).zfill(8)
-    except Exception as e:
-        # Fallback to a timestamp-based ID if there's any error
-        import time
-        member_id = str(int(time.time()))[-8:]
+    # Allocate a member ID; the sequence never hands out the same value twice,
+    # even to concurrent signups
+    member_id = format_member_id(db.execute(select(member_id_sequence.next_value())).scalar())
     
     # Generate a unique referral code based on member_id
     referral_code = f"WV{member_id}"
     
     # Check if a referral code was provided
-    referrer_id = None
+    referrer = None
     if user_in.referral_code:
         referrer = db.query(User).filter(User.referral_code == user_in.referral_code).first()
-        if referrer:
-            referrer_id = referrer.id
     
-    # Create new user
+    # Create new user together with everything other endpoints expect to exist
     hashed_password = get_password_hash(user_in.password)
     db_user = User(
         email=user_in.email,
@@ -80,31 +65,42 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
         gender=user_in.gender,
         avatar=user_in.avatar,
         referral_code=referral_code,
-        referrer_id=referrer_id
+        referrer_id=referrer.id if referrer else None,
+        profile=Profile(),
+        income_wallet=IncomeWallet(balance=0.0),
+        shopping_wallet=ShoppingWallet(balance=0.0),
+        # Not in anyone's network until they join one through /network/join
+        network=Network(referral_code=f"REF-{member_id}-{uuid.uuid4().hex[:6].upper()}")
     )
     
     db.add(db_user)
-    db.commit()
+    try:
+        db.flush()
+        # Place the user in the referral hierarchy under the referrer's upline
+        if referrer:
+            ReferralTreeService.attach(db, db_user.id, referrer.id)
+        db.commit()
+    except IntegrityError:
+        # A concurrent signup took the phone number or email after the checks above
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Phone number or email already registered"
+        )
     db.refresh(db_user)
+    referral_graph.add(db_user.id, db_user.referrer_id)
     
-    # Automatically create a profile for the user
-    db_profile = Profile(user_id=db_user.id)
-    db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
-    
-    # Send welcome email to the new user
-    email_service.send_welcome_email(db_user.email, db_user.name)
+    # Send the emails after the response has gone out
+    background_tasks.add_task(email_service.send_welcome_email, db_user.email, db_user.name)
     
     # If user signed up with a referral code, notify the referrer
-    if referrer_id:
-        referrer = db.query(User).filter(User.id == referrer_id).first()
-        if referrer:
-            email_service.send_referral_notification(
-                referrer_email=referrer.email,
-                referrer_name=referrer.name,
-                new_user_name=db_user.name
-            )
+    if referrer:
+        background_tasks.add_task(
+            email_service.send_referral_notification,
+            referrer_email=referrer.email,
+            referrer_name=referrer.name,
+            new_user_name=db_user.name
+        )
     
     return db_user
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
@@ -7,20 +7,10 @@ from app.db.database import get_db
 from app.core.auth import get_current_active_user
 from app.utils.notification_utils import send_bonus_credited_notification
 from app.models.network import Bonus
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
-@router.get("/bonuses", response_model=List[Dict[str, Any]])
-def get_bonuses(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_active_user),
-):
-    """
-    Get all bonuses for the current user
-    """
-    bonuses = db.query(Bonus).filter(Bonus.user_id == current_user.id).all()
-    return [bonus.__dict__ for bonus in bonuses]
-
 @router.get("/bonuses/summary", response_model=Dict[str, Any])
 def get_bonus_summary(
     db: Session = Depends(get_db),
@@ -58,17 +48,15 @@ def get_bonus_summary(
 
 @router.get("/bonuses/history", response_model=List[Dict[str, Any]])
 def get_bonus_history(
-    skip: int = 0,
-    limit: int = 20,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user),
 ):
     """
     Get paginated bonus history for the current user
     """
-    bonuses = db.query(Bonus).filter(
-        Bonus.user_id == current_user.id
-    ).order_by(Bonus.created_at.desc()).offset(skip).limit(limit).all()
+    bonuses = paginate(db.query(Bonus).filter(Bonus.user_id == current_user.id), page, response)
     
     return [{
         "id": str(bonus.id),
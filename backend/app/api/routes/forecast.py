@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_active_superuser
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.forecast import CashFlowForecastResponse
+from app.services.forecast_service import CashFlowForecastService
+
+router = APIRouter()
+
+@router.get("/admin/forecast/cash-flow", response_model=CashFlowForecastResponse)
+def get_cash_flow_forecast(
+    days: int = Query(90, ge=1, le=3650),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Forecast interest payouts and maturities for all active investments over the next `days` days."""
+    return CashFlowForecastService.forecast(db, days)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
+from datetime import datetime
 from app.services.bonus_service import BonusService
 
 from app.core.auth import get_current_active_user
@@ -13,7 +14,9 @@ from app.schemas.investment import (
     TeamInvestmentCreate, TeamInvestmentResponse,
     InvestmentWithTeamResponse
 )
+from app.utils.date_utils import next_interest_date
 from app.utils.notification_utils import send_plan_selection_notification
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
@@ -33,8 +36,14 @@ async def create_investment(
         if plan:
             plan_name = plan.name
     
-    # Create the investment
-    db_investment = Investment(**investment_in.dict(), user_id=current_user.id)
+    # Create the investment, with its first monthly interest due a month after it starts
+    start_date = datetime.now()
+    db_investment = Investment(
+        **investment_in.dict(),
+        user_id=current_user.id,
+        start_date=start_date,
+        next_interest_date=next_interest_date(start_date, start_date.date())
+    )
     db.add(db_investment)
     db.commit()
     db.refresh(db_investment)
@@ -70,11 +79,16 @@ async def create_investment(
 
 @router.get("/investments", response_model=List[InvestmentResponse])
 async def get_investments(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all investments for the current user."""
-    return current_user.investments
+    """Get the current user's investments, newest first, one page at a time."""
+    return paginate(
+        db.query(Investment).filter(Investment.user_id == current_user.id),
+        page, response
+    )
 
 @router.get("/investments/{investment_id}", response_model=InvestmentWithTeamResponse)
 async def get_investment(
@@ -128,15 +142,16 @@ async def update_investment(
 
 @router.get("/team-investments", response_model=List[TeamInvestmentResponse])
 async def get_team_investments(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all team investments where the current user is a team member."""
-    team_investments = db.query(TeamInvestment).filter(
-        TeamInvestment.team_member_id == current_user.id
-    ).all()
-    
-    return team_investments
+    """Get the team investments where the current user is a team member, newest first, one page at a time."""
+    return paginate(
+        db.query(TeamInvestment).filter(TeamInvestment.team_member_id == current_user.id),
+        page, response
+    )
 
 @router.post("/team-investments", response_model=TeamInvestmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_team_investment(
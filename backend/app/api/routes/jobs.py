@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.core.auth import get_current_active_superuser
+from app.db.database import get_db
+from app.models.job_run import JobExecutionStatus
+from app.models.user import User
+from app.schemas.job import JobExecutionResponse
+from app.services.job_execution_service import JobExecutionService
+
+router = APIRouter()
+
+@router.get("/admin/jobs/history", response_model=List[JobExecutionResponse])
+async def get_job_history(
+    job_name: Optional[str] = None,
+    status: Optional[JobExecutionStatus] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Get the most recent scheduled job executions, newest first."""
+    return JobExecutionService.get_history(db, job_name, status, limit)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_job_metrics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Scheduled job metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        JobExecutionService.render_metrics(db),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
@@ -6,12 +6,13 @@ import uuid
 from app.core.auth import get_current_active_user
 from app.db.database import get_db
 from app.models.user import User
-from app.models.network import Network, Bonus, NOC
+from app.models.network import Network, Bonus, NOC, network_members
 from app.schemas.network import (
     NetworkCreate, NetworkUpdate, NetworkResponse, NetworkWithMembersResponse,
     BonusCreate, BonusUpdate, BonusResponse,
     NOCCreate, NOCUpdate, NOCResponse
 )
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
@@ -106,10 +107,16 @@ async def join_network(
         db.add(user_network)
     
     # Add user to the referrer's network members
-    if current_user.id not in [member.id for member in network.members]:
-        network.members.append(current_user)
-        network.total_members += 1
-        db.add(network)
+    is_member = db.query(network_members).filter(
+        network_members.c.network_id == network.id,
+        network_members.c.member_id == current_user.id
+    ).first()
+    if not is_member:
+        db.execute(network_members.insert().values(
+            network_id=network.id,
+            member_id=current_user.id,
+            level=1
+        ))
     
     db.commit()
     db.refresh(user_network)
@@ -119,11 +126,13 @@ async def join_network(
 # Bonus Routes
 @router.get("/bonuses", response_model=List[BonusResponse])
 async def get_bonuses(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all bonuses for the current user."""
-    return current_user.bonuses
+    """Get the current user's bonuses, newest first, one page at a time."""
+    return paginate(db.query(Bonus).filter(Bonus.user_id == current_user.id), page, response)
 
 @router.post("/bonuses", response_model=BonusResponse, status_code=status.HTTP_201_CREATED)
 async def create_bonus(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
 
@@ -7,27 +7,27 @@ from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationResponse, NotificationUpdate
 from app.core.auth import get_current_user
 from app.models.user import User
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all notifications for the current user.
+    Get the current user's notifications, newest first, one page at a time.
     """
     notification_service = NotificationService(db)
-    notifications = notification_service.get_user_notifications(
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit
+    return paginate(
+        notification_service.get_user_notifications_query(user_id=current_user.id),
+        page,
+        response
     )
-    return notifications
 
 
 @router.get("/unread-count", response_model=int)
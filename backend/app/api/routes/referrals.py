@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,9 +6,15 @@ from app.core.auth import get_current_active_user
 from app.db.database import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse
+from app.services.referral_tree_service import ReferralTreeService
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
+# Deepest downline tree /referrals/network-data returns; deeper levels are
+# expanded node by node through /referrals/tree
+MAX_NETWORK_DEPTH = 10
+
 @router.get("/referrals/my-code", response_model=dict)
 async def get_my_referral_code(
     current_user: User = Depends(get_current_active_user),
@@ -44,86 +50,132 @@ async def get_my_referral_code(
 
 @router.get("/referrals/my-referrals", response_model=List[UserResponse])
 async def get_my_referrals(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get list of users referred by the current user."""
-    referrals = db.query(User).filter(User.referrer_id == current_user.id).all()
-    return referrals
+    """Get the users referred by the current user, most recently joined first, one page at a time."""
+    return paginate(
+        db.query(User).filter(User.referrer_id == current_user.id),
+        page, response,
+        created_column=User.join_date
+    )
 
 @router.get("/referrals/network-data")
 async def get_network_data(
+    depth: int = Query(3, ge=1, le=MAX_NETWORK_DEPTH, description="Levels of the downline to include in the tree"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get network data including summary and team members."""
-    # Get direct referrals
-    direct_referrals = db.query(User).filter(User.referrer_id == current_user.id).all()
-    
-    # Get all referrals (including indirect)
-    all_referrals = []
-    processed_ids = set()
+    # Level sizes of the whole downline, in one grouped query
+    levels = ReferralTreeService.level_counts(db, current_user.id)
+    total_count = sum(level["total"] for level in levels)
+    active_count = sum(level["active"] for level in levels)
     
-    def get_downline(user_id, level=0, max_level=2):
-        if level > max_level:
-            return []
-        
-        if user_id in processed_ids:
-            return []  # Prevent circular references
-        
-        processed_ids.add(user_id)
-        referrals = db.query(User).filter(User.referrer_id == user_id).all()
-        result = []
-        
-        for referral in referrals:
-            all_referrals.append(referral)
-            children = get_downline(referral.id, level + 1, max_level)
-            result.append({
-                "id": referral.id,
-                "name": referral.name,
-                "userId": referral.member_id or "",
-                "level": level,
-                "status": "Active",  # Default status, could be dynamic
-                "children": children
-            })
-        
-        return result
-    
-    # Build network tree
+    # Build network tree from the downline down to `depth` levels, in one query
     network_tree = {
         "id": current_user.id,
         "name": current_user.name,
         "userId": current_user.member_id or "",
         "level": 0,
         "status": "Active",
-        "children": get_downline(current_user.id)
+        "children": []
     }
-    
-    # Count active/inactive members
-    active_count = len(all_referrals)  # For now, count all as active
-    inactive_count = 0
-    blocked_count = 0
-    
-    # Format team members for display
+    nodes = {current_user.id: network_tree}
     team_members = []
-    for referral in direct_referrals:
-        team_members.append({
-            "id": referral.id,
-            "name": referral.name,
-            "userId": referral.member_id or "",
-            "status": "Active",  # Default status, could be dynamic
-            "joinDate": referral.join_date.strftime("%Y-%m-%d") if referral.join_date else "",
-            "avatar": referral.avatar or ""
-        })
+    for member in ReferralTreeService.downline(db, current_user.id, max_depth=depth):
+        status_label = "Active" if member.is_active is not False else "Inactive"
+        node = {
+            "id": member.id,
+            "name": member.name,
+            "userId": member.member_id or "",
+            "level": member.depth - 1,
+            "status": status_label,
+            "children": []
+        }
+        nodes[member.id] = node
+        parent = nodes.get(member.referrer_id)
+        if parent is not None:
+            parent["children"].append(node)
+        
+        # Format direct referrals as team members for display
+        if member.depth == 1:
+            team_members.append({
+                "id": member.id,
+                "name": member.name,
+                "userId": member.member_id or "",
+                "status": status_label,
+                "joinDate": member.join_date.strftime("%Y-%m-%d") if member.join_date else "",
+                "avatar": member.avatar or ""
+            })
     
     return {
         "summary": {
             "downline": current_user.member_id or "",
             "activeCount": active_count,
-            "inactiveCount": inactive_count,
-            "blockedCount": blocked_count,
-            "totalCount": len(all_referrals)
+            "inactiveCount": total_count - active_count,
+            "blockedCount": 0,
+            "totalCount": total_count
         },
+        "levels": [
+            {
+                "level": level["level"],
+                "activeCount": level["active"],
+                "inactiveCount": level["total"] - level["active"],
+                "totalCount": level["total"]
+            }
+            for level in levels
+        ],
         "teamMembers": team_members,
         "networkTree": network_tree
     }
+
+def _tree_node(node, depth: int) -> dict:
+    """Format a row of ReferralTreeService.tree_nodes as a node of the network tree."""
+    return {
+        "id": node.id,
+        "name": node.name,
+        "userId": node.member_id or "",
+        "depth": depth,
+        "status": "Active" if node.is_active is not False else "Inactive",
+        "joinDate": node.join_date.strftime("%Y-%m-%d") if node.join_date else "",
+        "avatar": node.avatar or "",
+        "childCount": node.child_count,
+        "teamCount": node.team_count,
+        "activeTeamCount": node.active_team_count
+    }
+
+@router.get("/referrals/tree")
+async def get_network_tree_root(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the root node of the current user's network tree, with the sizes of their downline."""
+    node = ReferralTreeService.tree_nodes(db).filter(User.id == current_user.id).one()
+    return _tree_node(node, 0)
+
+@router.get("/referrals/tree/{node_id}/children")
+async def get_network_tree_children(
+    node_id: str,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the direct referrals of a node of the current user's network tree, most recently joined first, one page at a time."""
+    depth = ReferralTreeService.depth_below(db, current_user.id, node_id)
+    if depth is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Member not found in your network"
+        )
+    
+    children = paginate(
+        ReferralTreeService.tree_nodes(db).filter(User.referrer_id == node_id),
+        page, response,
+        created_column=User.join_date
+    )
+    return [_tree_node(child, depth + 1) for child in children]
+
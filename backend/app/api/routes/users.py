@@ -11,6 +11,7 @@ from app.db.database import get_db
 from app.models.user import User, Profile
 from app.schemas.user import UserResponse, UserUpdate, UserProfileResponse, ProfileUpdate
 from app.services.email_service import email_service
+from app.services.referral_tree_service import ReferralTreeService
 
 router = APIRouter()
 
@@ -331,3 +332,25 @@ async def verify_kyc(
     
     return {"user": user, "profile": user.profile, 
             "addresses": user.addresses, "bank_details": user.bank_details}
+
+
+@router.put("/admin/users/{user_id}/status", response_model=UserResponse)
+async def set_user_status(
+    user_id: str,
+    is_active: bool,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Activate or deactivate a user, updating their uplines' team counts (admin only)."""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    ReferralTreeService.set_active(db, user.id, is_active)
+    db.commit()
+    db.refresh(user)
+    
+    return user
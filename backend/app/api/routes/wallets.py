@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.auth import get_current_active_user
-from app.db.database import get_db
+from app.core.auth import get_current_active_user, get_current_active_superuser
+from app.db.database import SessionLocal, get_db
 from app.models.user import User
 from app.models.wallet import (
     IncomeWallet, IncomeTransaction, 
@@ -15,8 +18,15 @@ from app.schemas.wallet import (
     ShoppingWalletCreate, ShoppingWalletUpdate, ShoppingWalletResponse,
     ShoppingTransactionCreate, ShoppingTransactionUpdate, ShoppingTransactionResponse,
     ShoppingVoucherCreate, ShoppingVoucherUpdate, ShoppingVoucherResponse,
-    IncomeWalletWithTransactionsResponse, ShoppingWalletWithTransactionsResponse
+    ShoppingVoucherRedeem, ShoppingVoucherBulkIssue, ShoppingVoucherBulkIssueResponse,
+    IncomeWalletWithTransactionsResponse, ShoppingWalletWithTransactionsResponse,
+    WalletMonthSummary
 )
+from app.services.statement_service import StatementService, StatementFormat, STATEMENT_MEDIA_TYPES
+from app.services.voucher_service import VoucherService, VoucherNotRedeemableError
+from app.services.wallet_rollup_service import WalletRollupService
+from app.services.wallet_service import WalletService, InsufficientBalanceError
+from app.utils.pagination import DEFAULT_PAGE_SIZE, PageParams, paginate
 
 router = APIRouter()
 
@@ -26,19 +36,30 @@ async def get_income_wallet(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get the income wallet for the current user with transactions."""
-    from app.services.wallet_service import WalletService
-    
-    # Get or create wallet
-    wallet = WalletService.get_or_create_income_wallet(db, current_user.id)
-    
-    # Recalculate balance to ensure it's accurate
-    WalletService.recalculate_income_wallet_balance(db, current_user.id)
+    """
+    Get the income wallet for the current user with its most recent transactions.
+    Older transactions are paged through /income-wallet/transactions.
+    """
+    # Registration creates the wallet, so reading it never writes
+    wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == current_user.id).first()
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Income wallet not found"
+        )
     
-    # Refresh wallet to get updated balance
-    db.refresh(wallet)
+    recent = db.query(IncomeTransaction).filter(
+        IncomeTransaction.wallet_id == wallet.id
+    ).order_by(
+        IncomeTransaction.created_at.desc(), IncomeTransaction.id.desc()
+    ).limit(DEFAULT_PAGE_SIZE).all()
     
-    return wallet
+    # Report the balance from the ledger without writing it back
+    return IncomeWalletWithTransactionsResponse(
+        **IncomeWalletResponse.model_validate(wallet, from_attributes=True).model_dump(exclude={"balance"}),
+        balance=WalletService.get_income_balance(db, wallet.id),
+        transactions=[IncomeTransactionResponse.model_validate(t, from_attributes=True) for t in recent]
+    )
 
 @router.post("/income-wallet/transactions", response_model=IncomeTransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_income_transaction(
@@ -48,29 +69,25 @@ async def create_income_transaction(
 ):
     """Create a new income wallet transaction."""
     # Get or create wallet
-    wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == current_user.id).first()
-    if not wallet:
-        wallet = IncomeWallet(user_id=current_user.id)
-        db.add(wallet)
-        db.commit()
-        db.refresh(wallet)
+    wallet = WalletService.get_or_create_income_wallet(db, current_user.id)
+    
+    # Update wallet balance atomically, rejecting debits larger than the balance
+    try:
+        WalletService.adjust_balance(
+            db, IncomeWallet, wallet.id,
+            WalletService.signed_amount(transaction_in.amount, transaction_in.transaction_type)
+        )
+    except InsufficientBalanceError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     # Create transaction
     db_transaction = IncomeTransaction(**transaction_in.dict(), wallet_id=wallet.id)
     db.add(db_transaction)
-    
-    # Update wallet balance
-    if transaction_in.transaction_type == "credit":
-        wallet.balance += transaction_in.amount
-    elif transaction_in.transaction_type == "debit":
-        if wallet.balance < transaction_in.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient balance"
-            )
-        wallet.balance -= transaction_in.amount
-    
-    db.add(wallet)
+    WalletRollupService.add(db, "income", [WalletRollupService.entry_for(db_transaction)])
     db.commit()
     db.refresh(db_transaction)
     
@@ -78,15 +95,30 @@ async def create_income_transaction(
 
 @router.get("/income-wallet/transactions", response_model=List[IncomeTransactionResponse])
 async def get_income_transactions(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all income wallet transactions for the current user."""
+    """Get the current user's income wallet transactions, newest first, one page at a time."""
     wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == current_user.id).first()
     if not wallet:
         return []
     
-    return wallet.transactions
+    return paginate(
+        db.query(IncomeTransaction).filter(IncomeTransaction.wallet_id == wallet.id),
+        page, response
+    )
+
+@router.get("/income-wallet/summary", response_model=List[WalletMonthSummary])
+async def get_income_summary(
+    months: int = Query(12, ge=1, le=120),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get monthly totals of the current user's income wallet, newest month first."""
+    wallet = WalletService.get_or_create_income_wallet(db, current_user.id)
+    return WalletRollupService.monthly_summary(db, "income", wallet.id, months)
 
 @router.put("/income-wallet/transactions/{transaction_id}", response_model=IncomeTransactionResponse)
 async def update_income_transaction(
@@ -115,10 +147,15 @@ async def update_income_transaction(
         )
     
     # Update transaction attributes
+    old_status = transaction.status
+    counted = WalletRollupService.entry_for(transaction)
     for key, value in transaction_in.dict(exclude_unset=True).items():
         if value is not None:
             setattr(transaction, key, value)
     
+    WalletService.invalidate_stale_snapshots(db, transaction, old_status)
+    WalletRollupService.move(db, "income", counted, WalletRollupService.entry_for(transaction))
+    
     db.add(transaction)
     db.commit()
     db.refresh(transaction)
@@ -131,7 +168,10 @@ async def get_shopping_wallet(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get the shopping wallet for the current user with transactions and vouchers."""
+    """
+    Get the shopping wallet for the current user with its most recent transactions and vouchers.
+    Older ones are paged through /shopping-wallet/transactions and /shopping-wallet/vouchers.
+    """
     # Check if wallet exists, create if not
     wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == current_user.id).first()
     if not wallet:
@@ -140,7 +180,22 @@ async def get_shopping_wallet(
         db.commit()
         db.refresh(wallet)
     
-    return wallet
+    transactions = db.query(ShoppingTransaction).filter(
+        ShoppingTransaction.wallet_id == wallet.id
+    ).order_by(
+        ShoppingTransaction.created_at.desc(), ShoppingTransaction.id.desc()
+    ).limit(DEFAULT_PAGE_SIZE).all()
+    vouchers = db.query(ShoppingVoucher).filter(
+        ShoppingVoucher.wallet_id == wallet.id
+    ).order_by(
+        ShoppingVoucher.created_at.desc(), ShoppingVoucher.id.desc()
+    ).limit(DEFAULT_PAGE_SIZE).all()
+    
+    return ShoppingWalletWithTransactionsResponse(
+        **ShoppingWalletResponse.model_validate(wallet, from_attributes=True).model_dump(),
+        transactions=[ShoppingTransactionResponse.model_validate(t, from_attributes=True) for t in transactions],
+        vouchers=[ShoppingVoucherResponse.model_validate(v, from_attributes=True) for v in vouchers]
+    )
 
 @router.post("/shopping-wallet/transactions", response_model=ShoppingTransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_shopping_transaction(
@@ -150,29 +205,25 @@ async def create_shopping_transaction(
 ):
     """Create a new shopping wallet transaction."""
     # Get or create wallet
-    wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == current_user.id).first()
-    if not wallet:
-        wallet = ShoppingWallet(user_id=current_user.id)
-        db.add(wallet)
-        db.commit()
-        db.refresh(wallet)
+    wallet = WalletService.get_or_create_shopping_wallet(db, current_user.id)
+    
+    # Update wallet balance atomically, rejecting debits larger than the balance
+    try:
+        WalletService.adjust_balance(
+            db, ShoppingWallet, wallet.id,
+            WalletService.signed_amount(transaction_in.amount, transaction_in.transaction_type)
+        )
+    except InsufficientBalanceError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     # Create transaction
     db_transaction = ShoppingTransaction(**transaction_in.dict(), wallet_id=wallet.id)
     db.add(db_transaction)
-    
-    # Update wallet balance
-    if transaction_in.transaction_type == "credit":
-        wallet.balance += transaction_in.amount
-    elif transaction_in.transaction_type == "debit":
-        if wallet.balance < transaction_in.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient balance"
-            )
-        wallet.balance -= transaction_in.amount
-    
-    db.add(wallet)
+    WalletRollupService.add(db, "shopping", [WalletRollupService.entry_for(db_transaction)])
     db.commit()
     db.refresh(db_transaction)
     
@@ -180,15 +231,30 @@ async def create_shopping_transaction(
 
 @router.get("/shopping-wallet/transactions", response_model=List[ShoppingTransactionResponse])
 async def get_shopping_transactions(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all shopping wallet transactions for the current user."""
+    """Get the current user's shopping wallet transactions, newest first, one page at a time."""
     wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == current_user.id).first()
     if not wallet:
         return []
     
-    return wallet.transactions
+    return paginate(
+        db.query(ShoppingTransaction).filter(ShoppingTransaction.wallet_id == wallet.id),
+        page, response
+    )
+
+@router.get("/shopping-wallet/summary", response_model=List[WalletMonthSummary])
+async def get_shopping_summary(
+    months: int = Query(12, ge=1, le=120),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get monthly totals of the current user's shopping wallet, newest month first."""
+    wallet = WalletService.get_or_create_shopping_wallet(db, current_user.id)
+    return WalletRollupService.monthly_summary(db, "shopping", wallet.id, months)
 
 # Shopping Voucher Routes
 @router.post("/shopping-wallet/vouchers", response_model=ShoppingVoucherResponse, status_code=status.HTTP_201_CREATED)
@@ -206,33 +272,76 @@ async def create_shopping_voucher(
         db.commit()
         db.refresh(wallet)
     
-    # Check if voucher code already exists
-    existing_voucher = db.query(ShoppingVoucher).filter(ShoppingVoucher.code == voucher_in.code).first()
-    if existing_voucher:
+    # Create voucher, relying on the unique code constraint to reject duplicates
+    db_voucher = ShoppingVoucher(**voucher_in.dict(), wallet_id=wallet.id)
+    db.add(db_voucher)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Voucher code already exists"
         )
-    
-    # Create voucher
-    db_voucher = ShoppingVoucher(**voucher_in.dict(), wallet_id=wallet.id)
-    db.add(db_voucher)
-    db.commit()
     db.refresh(db_voucher)
     
     return db_voucher
 
 @router.get("/shopping-wallet/vouchers", response_model=List[ShoppingVoucherResponse])
 async def get_shopping_vouchers(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all shopping vouchers for the current user."""
+    """Get the current user's shopping vouchers, newest first, one page at a time."""
     wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == current_user.id).first()
     if not wallet:
         return []
     
-    return wallet.vouchers
+    return paginate(
+        db.query(ShoppingVoucher).filter(ShoppingVoucher.wallet_id == wallet.id),
+        page, response
+    )
+
+@router.post("/shopping-wallet/vouchers/redeem", response_model=ShoppingVoucherResponse)
+async def redeem_shopping_voucher(
+    redeem_in: ShoppingVoucherRedeem,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Redeem a voucher of the current user, debiting its amount from the shopping wallet."""
+    wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == current_user.id).first()
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wallet not found"
+        )
+    
+    try:
+        return VoucherService.redeem(db, wallet.id, redeem_in.code)
+    except (VoucherNotRedeemableError, InsufficientBalanceError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/admin/vouchers/bulk", response_model=ShoppingVoucherBulkIssueResponse, status_code=status.HTTP_201_CREATED)
+def bulk_issue_shopping_vouchers(
+    issue_in: ShoppingVoucherBulkIssue,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Issue vouchers with generated codes to the given users, or to every active user (admin only)."""
+    return VoucherService.issue_to_users(
+        db,
+        issue_in.amount,
+        expiry_date=issue_in.expiry_date,
+        user_ids=issue_in.user_ids,
+        vouchers_per_user=issue_in.vouchers_per_user,
+        code_prefix=issue_in.code_prefix,
+        notify=issue_in.notify
+    )
 
 @router.put("/shopping-wallet/vouchers/{voucher_id}", response_model=ShoppingVoucherResponse)
 async def update_shopping_voucher(
@@ -270,3 +379,92 @@ async def update_shopping_voucher(
     db.refresh(voucher)
     
     return voucher
+
+# Statement Routes
+class StatementParams:
+    """
+    Query parameters of a statement export: the days to cover, both inclusive
+    and open-ended when left out, and the output format.
+    """
+    
+    def __init__(
+        self,
+        start: Optional[date] = Query(None),
+        end: Optional[date] = Query(None),
+        format: StatementFormat = Query(StatementFormat.CSV)
+    ):
+        if start and end and start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Statement start date must not be after its end date"
+            )
+        self.start = start
+        self.end = end
+        self.format = format
+
+def statement_response(kind: str, wallet_id: str, params: StatementParams) -> StreamingResponse:
+    """Stream a wallet statement as a file download."""
+    filename = f"{kind}-wallet-statement-{params.start or 'start'}-{params.end or date.today()}.{params.format.value}"
+    return StreamingResponse(
+        StatementService.stream_statement(
+            SessionLocal, kind, wallet_id, params.format, params.start, params.end
+        ),
+        media_type=STATEMENT_MEDIA_TYPES[params.format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # Let proxies pass chunks on as they are produced
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.get("/income-wallet/statement", response_class=StreamingResponse)
+async def get_income_statement(
+    params: StatementParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download the income wallet statement of the current user as CSV or NDJSON."""
+    wallet = WalletService.get_or_create_income_wallet(db, current_user.id)
+    return statement_response("income", wallet.id, params)
+
+@router.get("/shopping-wallet/statement", response_class=StreamingResponse)
+async def get_shopping_statement(
+    params: StatementParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download the shopping wallet statement of the current user as CSV or NDJSON."""
+    wallet = WalletService.get_or_create_shopping_wallet(db, current_user.id)
+    return statement_response("shopping", wallet.id, params)
+
+@router.get("/admin/users/{user_id}/income-wallet/statement", response_class=StreamingResponse)
+async def get_user_income_statement(
+    user_id: str,
+    params: StatementParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Download the income wallet statement of any user (admin only)."""
+    wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == user_id).first()
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wallet not found"
+        )
+    return statement_response("income", wallet.id, params)
+
+@router.get("/admin/users/{user_id}/shopping-wallet/statement", response_class=StreamingResponse)
+async def get_user_shopping_statement(
+    user_id: str,
+    params: StatementParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """Download the shopping wallet statement of any user (admin only)."""
+    wallet = db.query(ShoppingWallet).filter(ShoppingWallet.user_id == user_id).first()
+    if not wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wallet not found"
+        )
+    return statement_response("shopping", wallet.id, params)
@@ -34,6 +34,19 @@ class Settings(BaseSettings):
     SMSMODE_API_KEY: str = os.getenv("SMSMODE_API_KEY", "AGgWEYjm7v8JHmqG1tp5aqeWZ7ofGVcz")
     FAST2SMS_API_KEY: str = os.getenv("FAST2SMS_API_KEY", "")
 
+    # Batch job settings
+    BATCH_CHUNK_SIZE: int = int(os.getenv("BATCH_CHUNK_SIZE", "1000"))
+    SCHEDULER_SHARDS: int = int(os.getenv("SCHEDULER_SHARDS", "1"))  # Worker processes per batch job
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"  # Run jobs inside the web process
+    SCHEDULER_RECOVERY_MINUTES: int = int(os.getenv("SCHEDULER_RECOVERY_MINUTES", "5"))
+    SCHEDULER_MAX_ATTEMPTS: int = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "5"))  # Tries of a failed run before it is left for an operator
+    BALANCE_SNAPSHOT_SETTLE_MINUTES: int = int(os.getenv("BALANCE_SNAPSHOT_SETTLE_MINUTES", "60"))  # Snapshots leave recent transactions out
+    RECONCILIATION_FIX_DRIFT: bool = os.getenv("RECONCILIATION_FIX_DRIFT", "false").lower() == "true"  # Nightly reconciliation fixes drift
+
+    # Referral graph settings
+    REFERRAL_GRAPH_ENABLED: bool = os.getenv("REFERRAL_GRAPH_ENABLED", "false").lower() == "true"  # Answer genealogy queries from memory
+    REFERRAL_GRAPH_REFRESH_MINUTES: int = int(os.getenv("REFERRAL_GRAPH_REFRESH_MINUTES", "10"))  # Reload to see other processes' changes
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,43 @@
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import text
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Namespaces the advisory lock keys used by scheduled jobs
+LOCK_PREFIX = "scheduler:"
+
+
+@contextmanager
+def job_lock(job_name: str) -> Iterator[bool]:
+    """
+    Try to take the cluster-wide lock for a scheduled job, without waiting.
+    Yields True if this process holds the lock and should run the job, False if
+    another process is already running it.
+
+    The lock is a Postgres session-level advisory lock held on a dedicated
+    connection for the duration of the job. If the process holding it dies,
+    Postgres drops the connection and releases the lock, so another process
+    can take the job over.
+    """
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    key = LOCK_PREFIX + job_name
+    acquired = False
+    try:
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": key}
+        ).scalar()
+        yield bool(acquired)
+    finally:
+        if acquired:
+            try:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": key})
+            except Exception as e:
+                # Never hand a connection that may still hold the lock back to the pool
+                logger.error(f"Error releasing lock for {job_name}: {str(e)}")
+                connection.invalidate()
+        connection.close()
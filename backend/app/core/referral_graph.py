@@ -0,0 +1,462 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a user ID in the key array
+KEY_SIZE = 16
+# Node value of "no node" in the parent, child and sibling arrays
+NO_NODE = -1
+
+
+class ReferralGraph:
+    """
+    Optional in-process index of the referral hierarchy (User.referrer_id).
+    Every user is a node numbered in load order. The tree is held in flat
+    integer arrays, parent, first child, next sibling and downline size, and
+    user IDs as 16 bytes each with a sorted 64-bit prefix array to find a
+    node by ID, about 44 bytes per user in all. Upline, depth and downline
+    queries then take microseconds without touching the database.
+
+    The index is loaded in one scan of the users table and kept current by
+    the registration hook of this process. Changes made by other
+    processes are picked up by reloading it every REFERRAL_GRAPH_REFRESH_MINUTES,
+    so it may lag the database by that long: use it for display only, never
+    for payouts or access checks.
+    Queries raise KeyError while the index is not loaded or does not know a
+    user, so callers fall back to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loading = False
+        # Set when the index was dropped while loading, so the load runs again
+        self._reload_requested = False
+        # Changes applied while a reload was scanning, replayed onto the new index
+        self._pending: Optional[List[Tuple[str, str, Optional[str]]]] = None
+        self.loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._keys = bytearray()
+        self._parent = array("i")
+        self._first_child = array("i")
+        self._next_sibling = array("i")
+        self._downline_size = array("i")
+        self._sorted_prefixes = array("Q")
+        self._sorted_nodes = array("i")
+        # IDs that are not canonical UUID strings, by node and the other way round
+        self._other_ids: Dict[str, int] = {}
+        self._other_nodes: Dict[int, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    # Node lookup
+
+    @staticmethod
+    def _key(user_id: str) -> Optional[bytes]:
+        """
+        The 16-byte key of a user ID, or None if it is not a canonical UUID string.
+        """
+        try:
+            key = bytes.fromhex(user_id.replace("-", ""))
+        except (ValueError, TypeError, AttributeError):
+            return None
+        if len(key) != KEY_SIZE or ReferralGraph._format(key) != user_id:
+            return None
+        return key
+
+    @staticmethod
+    def _format(key: bytes) -> str:
+        """
+        The user ID of a 16-byte key, as a lower-case UUID string.
+        """
+        digits = key.hex()
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def _node(self, user_id: Optional[str]) -> Optional[int]:
+        """
+        The node of a user, or None if the index does not know them.
+        """
+        if user_id is None:
+            return None
+        key = self._key(user_id)
+        if key is None:
+            return self._other_ids.get(user_id)
+        prefix = int.from_bytes(key[:8], "big")
+        position = bisect_left(self._sorted_prefixes, prefix)
+        while position < len(self._sorted_prefixes) and self._sorted_prefixes[position] == prefix:
+            node = self._sorted_nodes[position]
+            if self._keys[node * KEY_SIZE:(node + 1) * KEY_SIZE] == key:
+                return node
+            position += 1
+        return None
+
+    def _require(self, user_id: str) -> int:
+        node = self._node(user_id) if self.loaded else None
+        if node is None:
+            raise KeyError(user_id)
+        return node
+
+    def _user_id(self, node: int) -> str:
+        other = self._other_nodes.get(node)
+        if other is not None:
+            return other
+        return self._format(self._keys[node * KEY_SIZE:(node + 1) * KEY_SIZE])
+
+    def _append(self, user_id: str) -> int:
+        """
+        Add a node for a user without a parent and index its ID.
+        """
+        node = len(self._parent)
+        key = self._key(user_id)
+        if key is None:
+            self._other_ids[user_id] = node
+            self._other_nodes[node] = user_id
+            key = bytes(KEY_SIZE)
+        self._keys += key
+        self._parent.append(NO_NODE)
+        self._first_child.append(NO_NODE)
+        self._next_sibling.append(NO_NODE)
+        self._downline_size.append(0)
+        return node
+
+    def _index_key(self, node: int) -> None:
+        prefix = int.from_bytes(self._keys[node * KEY_SIZE:node * KEY_SIZE + 8], "big")
+        position = bisect_left(self._sorted_prefixes, prefix)
+        self._sorted_prefixes.insert(position, prefix)
+        self._sorted_nodes.insert(position, node)
+
+    # Tree maintenance
+
+    def _link(self, node: int, parent: int) -> None:
+        """
+        Make `parent` the parent of a node without one, and add the node's
+        downline to the parent's upline.
+        """
+        self._parent[node] = parent
+        self._next_sibling[node] = self._first_child[parent]
+        self._first_child[parent] = node
+        self._add_to_upline(node, self._downline_size[node] + 1)
+
+    def _unlink(self, node: int) -> None:
+        """
+        Detach a node, with its downline, from its parent.
+        """
+        parent = self._parent[node]
+        if parent == NO_NODE:
+            return
+        self._add_to_upline(node, -(self._downline_size[node] + 1))
+        if self._first_child[parent] == node:
+            self._first_child[parent] = self._next_sibling[node]
+        else:
+            sibling = self._first_child[parent]
+            while self._next_sibling[sibling] != node:
+                sibling = self._next_sibling[sibling]
+            self._next_sibling[sibling] = self._next_sibling[node]
+        self._parent[node] = NO_NODE
+        self._next_sibling[node] = NO_NODE
+
+    def _add_to_upline(self, node: int, change: int) -> None:
+        ancestor = self._parent[node]
+        while ancestor != NO_NODE:
+            self._downline_size[ancestor] += change
+            ancestor = self._parent[ancestor]
+
+    def _is_below(self, node: int, ancestor: int) -> bool:
+        while node != NO_NODE:
+            if node == ancestor:
+                return True
+            node = self._parent[node]
+        return False
+
+    def _apply(self, change: str, user_id: str, referrer_id: Optional[str]) -> None:
+        if change == "add":
+            if self._node(user_id) is not None:
+                return
+            parent = self._node(referrer_id)
+            if referrer_id is not None and parent is None:
+                # Unknown referrer: leave the user out, so their queries go to the database
+                return
+            node = self._append(user_id)
+            self._index_key(node)
+            if parent is not None:
+                self._link(node, parent)
+        elif change == "move":
+            node = self._node(user_id)
+            parent = self._node(referrer_id)
+            if node is None:
+                return
+            if parent is None or self._is_below(parent, node):
+                # The index cannot follow this move; drop it until the next reload
+                logger.warning(f"Referral graph cannot move {user_id} under {referrer_id}, reloading it")
+                self.loaded_at = None
+                self._reset()
+                if self._loading:
+                    # Possibly replaying onto the index the load is building; it reloads once done
+                    self._reload_requested = True
+                else:
+                    threading.Thread(target=self.load, name="referral-graph-reload", daemon=True).start()
+                return
+            if self._parent[node] != parent:
+                self._unlink(node)
+                self._link(node, parent)
+
+    def _change(self, change: str, user_id: str, referrer_id: Optional[str]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((change, user_id, referrer_id))
+            if self.loaded:
+                self._apply(change, user_id, referrer_id)
+
+    def add(self, user_id: str, referrer_id: Optional[str] = None) -> None:
+        """
+        Hook for a user registered, and committed, with the given referrer.
+        """
+        self._change("add", user_id, referrer_id)
+
+    def move(self, user_id: str, referrer_id: str) -> None:
+        """
+        Hook for a user, with their downline, moved under a new referrer and committed.
+        """
+        self._change("move", user_id, referrer_id)
+
+    # Loading
+
+    def build(self, users: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """
+        Replace the index with one built from (user ID, referrer ID) pairs,
+        in time linear in the number of users.
+        """
+        graph = ReferralGraph()
+        referrer_keys = bytearray()
+        other_referrers: Dict[int, str] = {}
+        for user_id, referrer_id in users:
+            node = graph._append(user_id)
+            referrer_key = graph._key(referrer_id) if referrer_id is not None else bytes(KEY_SIZE)
+            if referrer_key is None:
+                other_referrers[node] = referrer_id
+                referrer_key = bytes(KEY_SIZE)
+            referrer_keys += referrer_key
+
+        # Sort the ID prefixes once, then resolve every referrer to its node
+        count = len(graph._parent)
+        prefixes = array("Q", (
+            int.from_bytes(graph._keys[node * KEY_SIZE:node * KEY_SIZE + 8], "big") for node in range(count)
+        ))
+        order = sorted(range(count), key=prefixes.__getitem__)
+        graph._sorted_nodes = array("i", order)
+        graph._sorted_prefixes = array("Q", (prefixes[node] for node in order))
+        del prefixes, order
+
+        no_referrer = bytes(KEY_SIZE)
+        for node in range(count):
+            referrer_key = bytes(referrer_keys[node * KEY_SIZE:(node + 1) * KEY_SIZE])
+            if node in other_referrers:
+                parent = graph._other_ids.get(other_referrers[node])
+            elif referrer_key != no_referrer:
+                parent = graph._node(graph._format(referrer_key))
+            else:
+                parent = None
+            if parent is not None and parent != node:
+                graph._parent[node] = parent
+                graph._next_sibling[node] = graph._first_child[parent]
+                graph._first_child[parent] = node
+        del referrer_keys
+
+        # Sum downline sizes bottom up, from the roots' breadth-first order
+        order = array("i", (node for node in range(count) if graph._parent[node] == NO_NODE))
+        position = 0
+        while position < len(order):
+            child = graph._first_child[order[position]]
+            while child != NO_NODE:
+                order.append(child)
+                child = graph._next_sibling[child]
+            position += 1
+        for node in reversed(order):
+            parent = graph._parent[node]
+            if parent != NO_NODE:
+                graph._downline_size[parent] += graph._downline_size[node] + 1
+
+        # Users on or below a referral cycle are never reached from a root;
+        # leave them out of the ID index so their queries go to the database
+        if len(order) < count:
+            reached = bytearray(count)
+            for node in order:
+                reached[node] = 1
+            logger.warning(f"Referral graph left out {count - len(order)} users on or below a referral cycle")
+            indexed = [position for position, node in enumerate(graph._sorted_nodes) if reached[node]]
+            graph._sorted_nodes = array("i", (graph._sorted_nodes[position] for position in indexed))
+            graph._sorted_prefixes = array("Q", (graph._sorted_prefixes[position] for position in indexed))
+            for user_id, node in list(graph._other_ids.items()):
+                if not reached[node]:
+                    del graph._other_ids[user_id]
+        del order
+
+        with self._lock:
+            self._keys = graph._keys
+            self._parent = graph._parent
+            self._first_child = graph._first_child
+            self._next_sibling = graph._next_sibling
+            self._downline_size = graph._downline_size
+            self._sorted_prefixes = graph._sorted_prefixes
+            self._sorted_nodes = graph._sorted_nodes
+            self._other_ids = graph._other_ids
+            self._other_nodes = graph._other_nodes
+            self.loaded_at = time.monotonic()
+            # Catch up with the changes this process made while the users were read
+            for change in self._pending or []:
+                self._apply(*change)
+                if not self.loaded:
+                    break
+
+    def load(self) -> None:
+        """
+        Load the index from the users table in one scan, then replay the
+        changes made by this process meanwhile. Loads again if the index had
+        to be dropped while loading.
+        """
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        while True:
+            self._load_once()
+            with self._lock:
+                if not self._reload_requested:
+                    self._loading = False
+                    return
+                self._reload_requested = False
+
+    def _load_once(self) -> None:
+        with self._lock:
+            self._pending = []
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            users = db.execute(
+                select(User.id, User.referrer_id),
+                execution_options={"yield_per": settings.BATCH_CHUNK_SIZE * 10}
+            )
+            self.build(users.tuples())
+            logger.info(f"Loaded referral graph of {len(self)} users in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Error loading referral graph: {str(e)}")
+        finally:
+            db.close()
+            with self._lock:
+                self._pending = None
+
+    def start(self) -> None:
+        """
+        Load the index in a background thread and reload it periodically.
+        Queries fall back to the database until the first load completes.
+        """
+        def run() -> None:
+            while True:
+                self.load()
+                time.sleep(settings.REFERRAL_GRAPH_REFRESH_MINUTES * 60)
+
+        threading.Thread(target=run, name="referral-graph", daemon=True).start()
+
+    # Queries
+
+    def upline(self, user_id: str, max_depth: int) -> List[str]:
+        """
+        IDs of a user's uplines up to `max_depth` levels, the direct referrer first.
+        """
+        with self._lock:
+            node = self._require(user_id)
+            upline = []
+            ancestor = self._parent[node]
+            while ancestor != NO_NODE and len(upline) < max_depth:
+                upline.append(self._user_id(ancestor))
+                ancestor = self._parent[ancestor]
+            return upline
+
+    def depth_below(self, ancestor_id: str, user_id: str) -> Optional[int]:
+        """
+        How many levels below `ancestor_id` a user is: 0 for the ancestor
+        themselves, None if the user is not in their downline.
+        """
+        with self._lock:
+            ancestor = self._require(ancestor_id)
+            node = self._require(user_id)
+            depth = 0
+            while node != NO_NODE:
+                if node == ancestor:
+                    return depth
+                node = self._parent[node]
+                depth += 1
+            return None
+
+    def downline(self, user_id: str, max_depth: int) -> List[Tuple[str, int]]:
+        """
+        IDs of the members of a user's downline down to `max_depth` levels,
+        each with its depth below the user, nearest level first.
+        """
+        with self._lock:
+            level = [self._require(user_id)]
+            members = []
+            for depth in range(1, max_depth + 1):
+                next_level = []
+                for node in level:
+                    child = self._first_child[node]
+                    while child != NO_NODE:
+                        members.append((self._user_id(child), depth))
+                        next_level.append(child)
+                        child = self._next_sibling[child]
+                if not next_level:
+                    break
+                level = next_level
+            return members
+
+    def depth(self, user_id: str) -> int:
+        """
+        How many uplines a user has.
+        """
+        with self._lock:
+            node = self._require(user_id)
+            depth = 0
+            while self._parent[node] != NO_NODE:
+                node = self._parent[node]
+                depth += 1
+            return depth
+
+    def downline_size(self, user_id: str) -> int:
+        """
+        Number of members of a user's downline, at every level.
+        """
+        with self._lock:
+            return self._downline_size[self._require(user_id)]
+
+    def children(self, user_id: str) -> List[str]:
+        """
+        IDs of a user's direct referrals, in no particular order.
+        """
+        with self._lock:
+            child = self._first_child[self._require(user_id)]
+            children = []
+            while child != NO_NODE:
+                children.append(self._user_id(child))
+                child = self._next_sibling[child]
+            return children
+
+
+# Shared index of this process, loaded at startup when REFERRAL_GRAPH_ENABLED is set
+referral_graph = ReferralGraph()
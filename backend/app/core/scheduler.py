@@ -1,54 +1,340 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Type
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.job_lock import job_lock
+from app.core.sharding import merge_results, run_sharded
 from app.db.database import SessionLocal
 from app.services.investment_service import InvestmentService
+from app.services.interest_accrual_service import InterestAccrualService, INTEREST_JOB_NAME
+from app.services.job_execution_service import JobExecutionService
+from app.services.job_run_service import JobRunService
+from app.services.reconciliation_service import ReconciliationService
+from app.services.referral_tree_service import ReferralTreeService
+from app.services.voucher_service import VoucherService
+from app.services.wallet_service import WalletService
 
 logger = logging.getLogger(__name__)
 
-def process_monthly_interest():
+# When each batch job is planned to run
+JOB_TRIGGERS: Dict[str, BaseTrigger] = {
+    "process_monthly_interest": CronTrigger(hour=1, minute=0),  # Daily at 1:00 AM
+    "check_investment_completion": CronTrigger(hour=2, minute=0),  # Daily at 2:00 AM
+    "snapshot_income_balances": CronTrigger(hour=3, minute=0),  # Daily at 3:00 AM
+    "reconcile_wallets": CronTrigger(hour=4, minute=0),  # Daily at 4:00 AM
+    "expire_vouchers": CronTrigger(minute=30),  # Hourly at half past
+    "rebuild_referral_counts": CronTrigger(hour=5, minute=0),  # Daily at 5:00 AM
+}
+
+def planned_run_time(job_name: str) -> Optional[datetime]:
+    """
+    The most recent time the job was planned to run, in local time, used to
+    measure how late a run started. None for jobs without a planned schedule.
+    """
+    trigger = JOB_TRIGGERS.get(job_name)
+    if not trigger:
+        return None
+    
+    now = datetime.now(trigger.timezone)
+    planned = None
+    fire_time = trigger.get_next_fire_time(None, now - timedelta(days=1))
+    while fire_time and fire_time <= now:
+        planned = fire_time
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+    return planned.astimezone().replace(tzinfo=None) if planned else None
+
+def instrumented(job_name: str) -> Callable[[Callable[[], Dict[str, Any]]], Callable[[], Optional[Dict[str, Any]]]]:
+    """
+    Record each execution of a job in the job history: its timings, lag behind
+    its planned run time, and the row counts from the results it returns.
+    A job that raises is logged and recorded as failed.
+    """
+    def decorator(job: Callable[[], Dict[str, Any]]) -> Callable[[], Optional[Dict[str, Any]]]:
+        @wraps(job)
+        def wrapper() -> Optional[Dict[str, Any]]:
+            db = SessionLocal()
+            try:
+                execution = JobExecutionService.start(db, job_name, planned_run_time(job_name))
+                try:
+                    results = job()
+                except Exception as e:
+                    logger.error(f"Error running {job_name}: {str(e)}")
+                    JobExecutionService.finish(db, execution, error=str(e))
+                    return None
+                execution = JobExecutionService.finish(db, execution, results)
+                logger.info(
+                    f"{job_name} finished in {execution.duration_seconds:.1f}s, "
+                    f"{execution.lag_seconds or 0:.0f}s behind schedule: {execution.rows_updated} updated, "
+                    f"{execution.rows_scanned} scanned, {execution.rows_errored} errored "
+                    f"({execution.rows_per_second:.0f} rows/s)"
+                )
+                return results
+            finally:
+                db.close()
+        return wrapper
+    return decorator
+
+def exclusive(job_name: str) -> Callable[[Callable[[], None]], Callable[[], bool]]:
+    """
+    Make a scheduled job run in at most one process across the cluster.
+    Every process that fires the job races for its advisory lock; the others
+    skip it. The wrapped job returns whether it ran.
+    """
+    def decorator(job: Callable[[], None]) -> Callable[[], bool]:
+        @wraps(job)
+        def wrapper() -> bool:
+            with job_lock(job_name) as acquired:
+                if not acquired:
+                    logger.info(f"{job_name} is already running in another process, skipping")
+                    return False
+                job()
+                return True
+        return wrapper
+    return decorator
+
+def once_per_fire_time(job_name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """
+    Run a scheduled job at most once for each time it was planned to run.
+    The advisory lock only keeps runs from overlapping: a process whose
+    scheduler fires late, or whose clock is behind, would take the free lock
+    after another process finished and run the job again. Jobs that do not
+    record their runs in job_runs claim the planned run time first and skip
+    it if another process already claimed it. Apply inside `exclusive`.
+    """
+    def decorator(job: Callable[[], Any]) -> Callable[[], Any]:
+        @wraps(job)
+        def wrapper() -> Any:
+            fire_time = planned_run_time(job_name)
+            if fire_time is not None:
+                db = SessionLocal()
+                try:
+                    claimed = JobRunService.claim(db, job_name, fire_time)
+                finally:
+                    db.close()
+                if not claimed:
+                    logger.info(f"{job_name} already ran for {fire_time}, skipping")
+                    return None
+            return job()
+        return wrapper
+    return decorator
+
+def interest_shard_job(db: Session, shard: int, shards: int) -> Dict[str, Any]:
+    """
+    Credit monthly interest for one shard of users.
+    """
+    return InterestAccrualService.process_monthly_interest(db, shard=shard, shards=shards)
+
+def interest_catch_up_shard_job(db: Session, shard: int, shards: int, through=None, since=None) -> Dict[str, Any]:
+    """
+    Credit every missed monthly interest period for one shard of users.
+    """
+    return InterestAccrualService.catch_up_interest(db, through=through, since=since, shard=shard, shards=shards)
+
+def completion_shard_job(db: Session, shard: int, shards: int) -> Dict[str, Any]:
+    """
+    Mark finished investments as completed for one shard of users.
+    """
+    completed = InvestmentService.check_investment_completion(db, shard=shard, shards=shards)
+    return {"processed": completed, "errors": []}
+
+@exclusive("process_monthly_interest")
+@instrumented("process_monthly_interest")
+def process_monthly_interest() -> Dict[str, Any]:
     """
     Process monthly interest payments for all active investments.
     This job runs daily but will only process interest for investments
     that are due for their monthly interest payment.
     """
     logger.info(f"Running monthly interest processing job at {datetime.now()}...")
+    caught_up = catch_up_missed_interest()
+    results = run_sharded(interest_shard_job, settings.SCHEDULER_SHARDS)
+    logger.info(
+        f"Processed interest payments for {results.get('processed', 0)} of {results.get('scanned', 0)} due investments "
+        f"in {results['elapsed_seconds']:.1f}s ({results['rows_per_second']:.0f} rows/s, "
+        f"{results['shards']} shards, {len(results['errors'])} errors)"
+    )
+    if caught_up:
+        results = {**merge_results([caught_up, results]), "shards": results["shards"]}
+    return results
+
+def catch_up_missed_interest() -> Optional[Dict[str, Any]]:
+    """
+    Catch up on interest if the job has not completed since before yesterday.
+    Called by the interest job, which already holds its lock.
+    Returns the catch-up results, or None if there was no gap.
+    """
+    today = datetime.now().date()
     db = SessionLocal()
     try:
-        payments_processed = InvestmentService.process_monthly_interest_payments(db)
-        logger.info(f"Processed interest payments for {payments_processed} investments")
-    except Exception as e:
-        logger.error(f"Error processing monthly interest payments: {str(e)}")
+        last_run = JobRunService.last_completed_run_date(db, INTEREST_JOB_NAME)
     finally:
         db.close()
+    
+    if not last_run or last_run >= today - timedelta(days=1):
+        return None
+    
+    logger.info(f"Interest job last completed on {last_run}, catching up missed payouts through {today}...")
+    results = run_sharded(interest_catch_up_shard_job, settings.SCHEDULER_SHARDS, through=today)
+    logger.info(
+        f"Caught up {results.get('processed', 0)} missed interest payments "
+        f"({results.get('total_interest', 0.0):.2f} total, {len(results['errors'])} errors)"
+    )
+    return results
 
-def check_investment_completion():
+@exclusive("check_investment_completion")
+@instrumented("check_investment_completion")
+def check_investment_completion() -> Dict[str, Any]:
     """
     Check for investments that have reached their end date and mark them as completed.
     """
     logger.info(f"Running investment completion check job at {datetime.now()}...")
+    results = run_sharded(completion_shard_job, settings.SCHEDULER_SHARDS)
+    logger.info(f"Marked {results.get('processed', 0)} investments as completed ({results['shards']} shards)")
+    return results
+
+@exclusive("snapshot_income_balances")
+@once_per_fire_time("snapshot_income_balances")
+@instrumented("snapshot_income_balances")
+def snapshot_income_balances() -> Dict[str, Any]:
+    """
+    Checkpoint income wallet balances so balance reads only sum recent transactions.
+    """
+    logger.info(f"Running income balance snapshot job at {datetime.now()}...")
     db = SessionLocal()
     try:
-        completed = InvestmentService.check_investment_completion(db)
-        logger.info(f"Marked {completed} investments as completed")
+        snapshots = WalletService.snapshot_income_balances(db)
+    finally:
+        db.close()
+    logger.info(f"Wrote {snapshots} income balance snapshots")
+    return {"processed": snapshots, "errors": []}
+
+@exclusive("reconcile_wallets")
+@once_per_fire_time("reconcile_wallets")
+@instrumented("reconcile_wallets")
+def reconcile_wallets() -> Dict[str, Any]:
+    """
+    Check every wallet balance against its ledger, logging the ones that drift,
+    and fix them if RECONCILIATION_FIX_DRIFT is set.
+    """
+    logger.info(f"Running wallet reconciliation job at {datetime.now()}...")
+    
+    def report(drift: Dict[str, Any]) -> None:
+        logger.warning(
+            f"{drift['kind'].capitalize()} wallet {drift['wallet_id']} of user {drift['user_id']} "
+            f"holds {drift['stored_balance']:.2f}, ledger says {drift['ledger_balance']:.2f}"
+        )
+    
+    db = SessionLocal()
+    fix_db = SessionLocal() if settings.RECONCILIATION_FIX_DRIFT else None
+    try:
+        results = ReconciliationService.reconcile(db, fix_db=fix_db, report=report)
+    finally:
+        db.close()
+        if fix_db is not None:
+            fix_db.close()
+    logger.info(
+        f"Found {results['scanned']} drifting wallets ({results['total_drift']:.2f} total drift), "
+        f"fixed {results['processed']} in {results['elapsed_seconds']:.1f}s"
+    )
+    return results
+
+@exclusive("expire_vouchers")
+@once_per_fire_time("expire_vouchers")
+@instrumented("expire_vouchers")
+def expire_vouchers() -> Dict[str, Any]:
+    """
+    Mark unused shopping vouchers past their expiry date as expired.
+    """
+    logger.info(f"Running voucher expiry job at {datetime.now()}...")
+    db = SessionLocal()
+    try:
+        results = VoucherService.expire_vouchers(db)
+    finally:
+        db.close()
+    logger.info(f"Expired {results['processed']} vouchers in {results['elapsed_seconds']:.1f}s")
+    return results
+
+@exclusive("rebuild_referral_counts")
+@once_per_fire_time("rebuild_referral_counts")
+@instrumented("rebuild_referral_counts")
+def rebuild_referral_counts() -> Dict[str, Any]:
+    """
+    Recompute the per-level team counts from the referral hierarchy, correcting
+    any drift from changes made outside the application.
+    """
+    logger.info(f"Running referral count rebuild job at {datetime.now()}...")
+    db = SessionLocal()
+    try:
+        levels = ReferralTreeService.rebuild_level_counts(db)
+    finally:
+        db.close()
+    logger.info(f"Rebuilt {levels} referral level counts")
+    return {"processed": levels, "errors": []}
+
+# Jobs that record their progress in job_runs, by job name
+RESUMABLE_JOBS: Dict[str, Callable[[], bool]] = {
+    "process_monthly_interest": process_monthly_interest,
+    "catch_up_interest": process_monthly_interest,
+    "check_investment_completion": check_investment_completion,
+}
+
+def resume_interrupted_jobs():
+    """
+    Take over today's job runs that did not complete.
+    A run left unfinished by a process that died no longer holds its lock, so
+    this process can acquire it and resume the run from its last checkpoint.
+    Runs still in progress elsewhere keep their lock and are skipped. Failed
+    runs are retried with backoff, up to SCHEDULER_MAX_ATTEMPTS times.
+    Executions recorded as running by a process that died are marked failed.
+    """
+    db = SessionLocal()
+    try:
+        job_names = JobRunService.resumable_job_names(
+            db, settings.SCHEDULER_MAX_ATTEMPTS, settings.SCHEDULER_RECOVERY_MINUTES
+        )
+        running_job_names = JobExecutionService.running_job_names(db)
     except Exception as e:
-        logger.error(f"Error checking investment completion: {str(e)}")
+        logger.error(f"Error checking for interrupted jobs: {str(e)}")
+        db.close()
+        return
+    
+    try:
+        for job_name in running_job_names:
+            with job_lock(job_name) as acquired:
+                if acquired:
+                    failed = JobExecutionService.fail_interrupted(db, job_name)
+                    if failed:
+                        logger.warning(f"Marked {failed} interrupted {job_name} executions as failed")
+    except Exception as e:
+        logger.error(f"Error marking interrupted job executions: {str(e)}")
     finally:
         db.close()
+    
+    for job_name in job_names:
+        job = RESUMABLE_JOBS.get(job_name)
+        if job and job():
+            logger.info(f"Resumed interrupted job {job_name}")
 
-def setup_scheduler():
+def setup_scheduler(scheduler_class: Type[BaseScheduler] = BackgroundScheduler) -> BaseScheduler:
     """
     Set up the scheduler with all required jobs.
+    Any number of processes may run this scheduler: each job takes a
+    cluster-wide lock, so only one of them runs it at a time.
     """
-    scheduler = BackgroundScheduler()
+    scheduler = scheduler_class()
     
     # Process monthly interest payments - runs daily at 1:00 AM
     scheduler.add_job(
         process_monthly_interest,
-        trigger=CronTrigger(hour=1, minute=0),
+        trigger=JOB_TRIGGERS["process_monthly_interest"],
         id="process_monthly_interest",
         name="Process monthly interest payments",
         replace_existing=True
@@ -57,10 +343,55 @@ def setup_scheduler():
     # Check for completed investments - runs daily at 2:00 AM
     scheduler.add_job(
         check_investment_completion,
-        trigger=CronTrigger(hour=2, minute=0),
+        trigger=JOB_TRIGGERS["check_investment_completion"],
         id="check_investment_completion",
         name="Check investment completion",
         replace_existing=True
     )
     
+    # Snapshot income wallet balances - runs daily at 3:00 AM
+    scheduler.add_job(
+        snapshot_income_balances,
+        trigger=JOB_TRIGGERS["snapshot_income_balances"],
+        id="snapshot_income_balances",
+        name="Snapshot income wallet balances",
+        replace_existing=True
+    )
+    
+    # Reconcile wallet balances with their ledgers - runs daily at 4:00 AM
+    scheduler.add_job(
+        reconcile_wallets,
+        trigger=JOB_TRIGGERS["reconcile_wallets"],
+        id="reconcile_wallets",
+        name="Reconcile wallet balances",
+        replace_existing=True
+    )
+    
+    # Expire shopping vouchers past their expiry date - runs hourly
+    scheduler.add_job(
+        expire_vouchers,
+        trigger=JOB_TRIGGERS["expire_vouchers"],
+        id="expire_vouchers",
+        name="Expire shopping vouchers",
+        replace_existing=True
+    )
+    
+    # Recompute per-level team counts - runs daily at 5:00 AM
+    scheduler.add_job(
+        rebuild_referral_counts,
+        trigger=JOB_TRIGGERS["rebuild_referral_counts"],
+        id="rebuild_referral_counts",
+        name="Rebuild referral team counts",
+        replace_existing=True
+    )
+    
+    # Resume job runs interrupted by a crashed process
+    scheduler.add_job(
+        resume_interrupted_jobs,
+        trigger=IntervalTrigger(minutes=settings.SCHEDULER_RECOVERY_MINUTES),
+        id="resume_interrupted_jobs",
+        name="Resume interrupted jobs",
+        replace_existing=True
+    )
+    
     return scheduler
\ No newline at end of file
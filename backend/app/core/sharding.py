@@ -0,0 +1,97 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import BigInteger, cast, func
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, create_worker_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# A shard job takes a session, its shard number and the shard count,
+# and returns a results dict of counts and error lists
+ShardJob = Callable[..., Dict[str, Any]]
+
+
+def shard_filter(user_id_column, shard: int, shards: int):
+    """
+    SQL condition selecting the rows of one shard, partitioned by a hash of the user id.
+    Keeping every row of a user in the same shard means each wallet is only
+    ever updated by one worker.
+    """
+    return func.mod(func.abs(cast(func.hashtext(user_id_column), BigInteger)), shards) == shard
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-shard results into one: numbers are summed and lists concatenated.
+    """
+    merged: Dict[str, Any] = {}
+    for result in results:
+        for key, value in result.items():
+            if isinstance(value, bool):
+                continue
+            if isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+            elif isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+    return merged
+
+
+def _run_shard(job: ShardJob, shard: int, shards: int, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry point inside a worker process: run one shard on its own engine and session.
+    """
+    session_factory = create_worker_sessionmaker()
+    db = session_factory()
+    try:
+        return job(db, shard=shard, shards=shards, **kwargs)
+    finally:
+        db.close()
+        session_factory.kw["bind"].dispose()
+
+
+def run_sharded(job: ShardJob, shards: int, **kwargs) -> Dict[str, Any]:
+    """
+    Run a batch job split into `shards` partitions, each in its own worker process,
+    and merge the per-shard results.
+    With a single shard the job runs in the calling process on SessionLocal.
+    """
+    started = time.monotonic()
+
+    if shards <= 1:
+        db: Session = SessionLocal()
+        try:
+            results = [job(db, shard=0, shards=1, **kwargs)]
+        finally:
+            db.close()
+    else:
+        results = []
+        # Spawn rather than fork so workers never inherit the scheduler's
+        # threads or the parent's open database connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=shards, mp_context=context) as executor:
+            futures = {
+                executor.submit(_run_shard, job, shard, shards, kwargs): shard
+                for shard in range(shards)
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Shard {shard}/{shards} of {job.__name__} failed: {str(e)}")
+                    results.append({"errors": [{"shard": shard, "error": str(e)}]})
+
+    merged = merge_results(results)
+    merged.setdefault("errors", [])
+    merged["shards"] = max(shards, 1)
+
+    # Throughput is measured over the whole run, not summed across shards
+    elapsed = time.monotonic() - started
+    merged["elapsed_seconds"] = elapsed
+    merged["rows_per_second"] = merged.get("processed", 0) / elapsed if elapsed > 0 else 0.0
+    return merged
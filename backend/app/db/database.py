@@ -14,6 +14,18 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def create_worker_sessionmaker() -> sessionmaker:
+    """
+    Create a session factory on a new engine, for worker processes that must
+    not share the parent process's connection pool.
+    """
+    worker_engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"options": "-c timezone=utc"},
+        pool_size=1
+    )
+    return sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+
 # Create Base class
 Base = declarative_base()
 
@@ -2,11 +2,12 @@ from app.models.user import User, Profile, Address, BankDetail
 from app.models.current_plan import CurrentPlan
 from app.models.investment import Investment, TeamInvestment, InvestmentStatus
 from app.models.wallet import (
-    IncomeWallet, IncomeTransaction, 
+    IncomeWallet, IncomeTransaction, IncomeBalanceSnapshot, WalletMonthlyTotal,
     ShoppingWallet, ShoppingTransaction, ShoppingVoucher,
     TransactionType, TransactionStatus
 )
-from app.models.network import Network, Bonus, NOC
+from app.models.network import Network, ReferralClosure, ReferralLevelCount, Bonus, NOC
 from app.models.notification import Notification
 from app.models.plan import Plan
 from app.models.payment import Payment, PaymentStatus
+from app.models.job_run import JobRun, JobRunStatus, JobClaim, JobExecution, JobExecutionStatus
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 
 def generate_uuid():
@@ -13,7 +14,7 @@ class CurrentPlan(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     plan_id = Column(String, ForeignKey("plans.id"), nullable=False)
-    investment_amount = Column(Float, nullable=False)
+    investment_amount = Column(Money, nullable=False)
     start_date = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Float, Text, Enum
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 import enum
 
@@ -16,17 +17,22 @@ class InvestmentStatus(str, enum.Enum):
 
 class Investment(Base):
     __tablename__ = "investments"
+    __table_args__ = (
+        # List endpoints page through a user's investments newest first by (created_at, id)
+        Index("ix_investments_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"))
     plan_id = Column(String, ForeignKey("plans.id"), nullable=True)
     plan_name = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     duration_months = Column(Integer, nullable=False)
     start_date = Column(DateTime, default=func.now())
     end_date = Column(DateTime, nullable=True)
     status = Column(Enum(InvestmentStatus), default=InvestmentStatus.ACTIVE)
-    returns = Column(Float, default=0.0)
+    returns = Column(Money, default=0.0)
+    next_interest_date = Column(Date, nullable=True, index=True)  # Next monthly interest payout
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -38,11 +44,15 @@ class Investment(Base):
 
 class TeamInvestment(Base):
     __tablename__ = "team_investments"
+    __table_args__ = (
+        # List endpoints page through a member's team investments newest first by (created_at, id)
+        Index("ix_team_investments_team_member_id_created_at_id", "team_member_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     investment_id = Column(String, ForeignKey("investments.id"))
     team_member_id = Column(String, ForeignKey("users.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     level = Column(Integer, nullable=False)  # Level in the network hierarchy
     created_at = Column(DateTime, default=func.now())
     
@@ -0,0 +1,78 @@
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Text, Enum, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+import enum
+
+def generate_uuid():
+    return str(uuid.uuid4())
+
+class JobRunStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobExecutionStatus(str, enum.Enum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class JobRun(Base):
+    """One run of a scheduled batch job for one day and shard, with its resume checkpoint."""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        UniqueConstraint("job_name", "run_date", "shard", name="uq_job_runs_job_name_run_date_shard"),
+    )
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_name = Column(String, nullable=False)
+    run_date = Column(Date, nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+    shards = Column(Integer, nullable=False, default=1)
+    status = Column(Enum(JobRunStatus), default=JobRunStatus.RUNNING)
+    cursor = Column(String, nullable=True)  # Last key committed, the run resumes after it
+    rows_processed = Column(Integer, default=0)
+    chunks_committed = Column(Integer, default=0)
+    attempts = Column(Integer, nullable=False, default=0)  # Times the run has been started
+    last_error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+
+class JobClaim(Base):
+    """A planned run time of a scheduled job, claimed by the one process that runs the job for it."""
+    __tablename__ = "job_claims"
+    __table_args__ = (
+        UniqueConstraint("job_name", "fire_time", name="uq_job_claims_job_name_fire_time"),
+    )
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_name = Column(String, nullable=False)
+    fire_time = Column(DateTime, nullable=False)  # When the scheduler planned the run
+    runner = Column(String, nullable=True)  # host:pid of the process that claimed it
+    claimed_at = Column(DateTime, default=func.now())
+
+class JobExecution(Base):
+    """History of every execution of a scheduled job, with its timings and row counts."""
+    __tablename__ = "job_executions"
+    __table_args__ = (
+        Index("ix_job_executions_job_name_started_at", "job_name", "started_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_name = Column(String, nullable=False)
+    status = Column(Enum(JobExecutionStatus), default=JobExecutionStatus.RUNNING)
+    runner = Column(String, nullable=True)  # host:pid of the process that ran the job
+    scheduled_at = Column(DateTime, nullable=True)  # When the scheduler planned to run it
+    started_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    lag_seconds = Column(Float, nullable=True)  # Start delay behind scheduled_at
+    duration_seconds = Column(Float, nullable=True)
+    rows_scanned = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_errored = Column(Integer, default=0)
+    rows_per_second = Column(Float, nullable=True)
+    shards = Column(Integer, nullable=True)
+    error_count = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
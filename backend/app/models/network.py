@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Float, Text, Table
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Text, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 
 def generate_uuid():
@@ -34,12 +35,49 @@ class Network(Base):
     members = relationship("User", secondary=network_members, backref="networks")
 
 
+class ReferralClosure(Base):
+    """
+    One row for every pair of a user and a member of their downline, at any
+    depth: 1 for direct referrals, 2 for their referrals, and so on.
+    Follows User.referrer_id.
+    """
+    __tablename__ = "referral_closure"
+    __table_args__ = (
+        # A user's downline, level by level
+        Index("ix_referral_closure_ancestor_id_depth", "ancestor_id", "depth"),
+        # A user's upline, nearest first
+        Index("ix_referral_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
+    
+    ancestor_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    descendant_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+
+class ReferralLevelCount(Base):
+    """
+    Size of one level of a user's downline, in total and active members.
+    Kept in step with referral_closure and User.is_active.
+    """
+    __tablename__ = "referral_level_counts"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    depth = Column(Integer, primary_key=True)
+    members = Column(Integer, nullable=False, default=0)
+    active_members = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
 class Bonus(Base):
     __tablename__ = "bonuses"
+    __table_args__ = (
+        # List endpoints page through a user's bonuses newest first by (created_at, id)
+        Index("ix_bonuses_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     bonus_type = Column(String, nullable=False)  # referral, level, achievement, etc.
     description = Column(Text, nullable=True)
     reference_id = Column(String, nullable=True)  # For linking to network members, investments, etc.
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -9,6 +9,10 @@ def generate_uuid():
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # List endpoints page through a user's notifications newest first by (created_at, id)
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Float, Text, Enum
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Text, Enum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 import enum
 
@@ -19,7 +20,7 @@ class Payment(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"))
     plan_id = Column(String, ForeignKey("plans.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     upi_ref_id = Column(String, nullable=True)
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     admin_notes = Column(Text, nullable=True)
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 
 def generate_uuid():
@@ -12,7 +13,7 @@ class Plan(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     duration_months = Column(Integer, nullable=False)
     interest_rate = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True)
@@ -1,14 +1,25 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Float, Text
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Text, Index, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 
 def generate_uuid():
     return str(uuid.uuid4())
 
+# Member IDs are drawn from this sequence and formatted as 8-digit strings
+member_id_sequence = Sequence("member_id_seq", start=10000001, metadata=Base.metadata)
+
+def format_member_id(number: int) -> str:
+    return str(number).zfill(8)
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # The referral list pages through a user's referrals newest first by (join_date, id)
+        Index("ix_users_referrer_id_join_date_id", "referrer_id", "join_date", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     member_id = Column(String, unique=True, index=True)
@@ -46,8 +57,8 @@ class Profile(Base):
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), unique=True)
-    plan_amount = Column(Float, default=0.0)
-    total_invested_amount = Column(Float, default=0.0)  # Track total invested amount for interest calculation
+    plan_amount = Column(Money, default=0.0)
+    total_invested_amount = Column(Money, default=0.0)  # Track total invested amount for interest calculation
     current_plan_id = Column(String, ForeignKey("plans.id"), nullable=True)
     kyc_verified = Column(Boolean, default=False)
     kyc_document_type = Column(String, nullable=True)
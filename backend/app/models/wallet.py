@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Float, Text, Enum
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, ForeignKey, Text, Enum, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.database import Base
+from app.utils.money_utils import Money
 import uuid
 import enum
 
@@ -23,7 +24,7 @@ class IncomeWallet(Base):
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), unique=True)
-    balance = Column(Float, default=0.0)
+    balance = Column(Money, default=0.0)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -34,14 +35,28 @@ class IncomeWallet(Base):
 
 class IncomeTransaction(Base):
     __tablename__ = "income_transactions"
+    __table_args__ = (
+        # A scheduled payout (e.g. monthly interest) is credited at most once per period
+        Index(
+            "uq_income_transactions_source_reference_period",
+            "source", "reference_id", "payout_period",
+            unique=True,
+            postgresql_where=text("payout_period IS NOT NULL")
+        ),
+        # Balance reads sum a wallet's transactions since its last snapshot, and
+        # the transaction list pages through them newest first by (created_at, id)
+        Index("ix_income_transactions_wallet_id_created_at_id", "wallet_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     wallet_id = Column(String, ForeignKey("income_wallets.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     transaction_type = Column(Enum(TransactionType), nullable=False)
     status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
     description = Column(Text, nullable=True)
     reference_id = Column(String, nullable=True)  # For linking to bonuses, investments, etc.
+    source = Column(String, nullable=True)  # interest, daily_return, etc.
+    payout_period = Column(Date, nullable=True)  # Period a scheduled payout belongs to
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -49,12 +64,53 @@ class IncomeTransaction(Base):
     wallet = relationship("IncomeWallet", back_populates="transactions")
 
 
+class IncomeBalanceSnapshot(Base):
+    """
+    Checkpoint of an income wallet's ledger: the signed sum of its completed
+    transactions created up to as_of. A balance is this sum plus the
+    transactions created after it.
+    """
+    __tablename__ = "income_balance_snapshots"
+    __table_args__ = (
+        Index("ix_income_balance_snapshots_wallet_id_as_of", "wallet_id", "as_of"),
+    )
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    wallet_id = Column(String, ForeignKey("income_wallets.id"), nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    balance = Column(Money, nullable=False)  # Not clamped at zero, unlike the wallet balance
+    created_at = Column(DateTime, default=func.now())
+
+
+class WalletMonthlyTotal(Base):
+    """
+    Rollup of a wallet's ledger: the total amount and number of its transactions
+    created in one month, by transaction type, status and source. Kept up to
+    date as transactions are posted or change status, so summaries read a few
+    rows per month instead of the transactions themselves.
+    """
+    __tablename__ = "wallet_monthly_totals"
+    __table_args__ = (
+        PrimaryKeyConstraint("wallet_kind", "wallet_id", "month", "transaction_type", "status", "source"),
+    )
+    
+    wallet_kind = Column(String, nullable=False)  # income or shopping
+    wallet_id = Column(String, nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
+    transaction_type = Column(Enum(TransactionType), nullable=False)
+    status = Column(Enum(TransactionStatus), nullable=False)
+    source = Column(String, nullable=False, default="")  # Empty for transactions without a source
+    total = Column(Money, nullable=False, default=0.0)
+    transactions = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
 class ShoppingWallet(Base):
     __tablename__ = "shopping_wallets"
     
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), unique=True)
-    balance = Column(Float, default=0.0)
+    balance = Column(Money, default=0.0)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -66,10 +122,14 @@ class ShoppingWallet(Base):
 
 class ShoppingTransaction(Base):
     __tablename__ = "shopping_transactions"
+    __table_args__ = (
+        # List endpoints page through a wallet's transactions newest first by (created_at, id)
+        Index("ix_shopping_transactions_wallet_id_created_at_id", "wallet_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     wallet_id = Column(String, ForeignKey("shopping_wallets.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     transaction_type = Column(Enum(TransactionType), nullable=False)
     status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
     description = Column(Text, nullable=True)
@@ -83,13 +143,23 @@ class ShoppingTransaction(Base):
 
 class ShoppingVoucher(Base):
     __tablename__ = "shopping_vouchers"
+    __table_args__ = (
+        # The expiry sweep finds unused, unexpired vouchers past their expiry date
+        Index(
+            "ix_shopping_vouchers_expiry_date_unexpired",
+            "expiry_date",
+            postgresql_where=text("is_used IS NOT TRUE AND expired_at IS NULL")
+        ),
+        Index("ix_shopping_vouchers_wallet_id_created_at_id", "wallet_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=generate_uuid)
     wallet_id = Column(String, ForeignKey("shopping_wallets.id"))
     code = Column(String, nullable=False, unique=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     is_used = Column(Boolean, default=False)
     expiry_date = Column(DateTime, nullable=True)
+    expired_at = Column(DateTime, nullable=True)  # Set by the expiry sweep
     created_at = Column(DateTime, default=func.now())
     used_at = Column(DateTime, nullable=True)
     
@@ -16,7 +16,9 @@ from app.schemas.wallet import (
     ShoppingWalletBase, ShoppingWalletCreate, ShoppingWalletUpdate, ShoppingWalletResponse,
     ShoppingTransactionBase, ShoppingTransactionCreate, ShoppingTransactionUpdate, ShoppingTransactionResponse,
     ShoppingVoucherBase, ShoppingVoucherCreate, ShoppingVoucherUpdate, ShoppingVoucherResponse,
-    IncomeWalletWithTransactionsResponse, ShoppingWalletWithTransactionsResponse
+    ShoppingVoucherRedeem, ShoppingVoucherBulkIssue, ShoppingVoucherBulkIssueResponse,
+    IncomeWalletWithTransactionsResponse, ShoppingWalletWithTransactionsResponse,
+    WalletMonthSummary
 )
 from app.schemas.network import (
     NetworkBase, NetworkCreate, NetworkUpdate, NetworkResponse,
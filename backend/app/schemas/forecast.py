@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+
+# Cash-flow Forecast Schemas
+class DailyCashFlow(BaseModel):
+    date: date
+    interest: float
+    maturities: float
+
+class MonthlyCashFlow(BaseModel):
+    month: str
+    interest: float
+    maturities: float
+
+class CashFlowForecastResponse(BaseModel):
+    as_of: date
+    days: int
+    active_investments: int
+    total_interest: float
+    total_maturities: float
+    total: float
+    daily: List[DailyCashFlow]
+    monthly: List[MonthlyCashFlow]
@@ -1,13 +1,14 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from app.models.investment import InvestmentStatus
+from app.utils.money_utils import MoneyAmount
 
 # Investment Schemas
 class InvestmentBase(BaseModel):
     plan_id: Optional[str] = None
     plan_name: str
-    amount: float
+    amount: MoneyAmount
     duration_months: int
     status: InvestmentStatus = InvestmentStatus.ACTIVE
 
@@ -17,11 +18,11 @@ class InvestmentCreate(InvestmentBase):
 class InvestmentUpdate(BaseModel):
     plan_id: Optional[str] = None
     plan_name: Optional[str] = None
-    amount: Optional[float] = None
+    amount: Optional[MoneyAmount] = None
     duration_months: Optional[int] = None
     status: Optional[InvestmentStatus] = None
     end_date: Optional[datetime] = None
-    returns: Optional[float] = None
+    returns: Optional[MoneyAmount] = None
 
 from app.schemas.plan import Plan as PlanSchema
 
@@ -30,7 +31,8 @@ class InvestmentResponse(InvestmentBase):
     user_id: str
     start_date: datetime
     end_date: Optional[datetime] = None
-    returns: float
+    returns: MoneyAmount
+    next_interest_date: Optional[date] = None
     created_at: datetime
     updated_at: datetime
     plan: Optional[PlanSchema] = None
@@ -42,7 +44,7 @@ class InvestmentResponse(InvestmentBase):
 class TeamInvestmentBase(BaseModel):
     investment_id: str
     team_member_id: str
-    amount: float
+    amount: MoneyAmount
     level: int
 
 class TeamInvestmentCreate(TeamInvestmentBase):
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.job_run import JobExecutionStatus
+
+# Job Execution Schemas
+class JobExecutionResponse(BaseModel):
+    id: str
+    job_name: str
+    status: JobExecutionStatus
+    runner: Optional[str] = None
+    scheduled_at: Optional[datetime] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    lag_seconds: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    rows_scanned: int = 0
+    rows_updated: int = 0
+    rows_errored: int = 0
+    rows_per_second: Optional[float] = None
+    shards: Optional[int] = None
+    error_count: int = 0
+    last_error: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from app.utils.money_utils import MoneyAmount
 
 # Network Schemas
 class NetworkBase(BaseModel):
@@ -42,7 +43,7 @@ class NetworkWithMembersResponse(NetworkResponse):
 
 # Bonus Schemas
 class BonusBase(BaseModel):
-    amount: float
+    amount: MoneyAmount
     bonus_type: str
     description: Optional[str] = None
     reference_id: Optional[str] = None
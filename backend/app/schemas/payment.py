@@ -2,12 +2,13 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 from app.models.payment import PaymentStatus
+from app.utils.money_utils import MoneyAmount
 
 # Payment Schemas
 class PaymentBase(BaseModel):
     user_id: str
     plan_id: str
-    amount: float
+    amount: MoneyAmount
     upi_ref_id: Optional[str] = None
 
 class PaymentCreate(PaymentBase):
@@ -1,11 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from app.utils.money_utils import MoneyAmount
 
 class PlanBase(BaseModel):
     name: str
     description: Optional[str] = None
-    amount: float
+    amount: MoneyAmount
     duration_months: int
     interest_rate: float
     is_active: bool = True
@@ -16,7 +17,7 @@ class PlanCreate(PlanBase):
 class PlanUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
-    amount: Optional[float] = None
+    amount: Optional[MoneyAmount] = None
     duration_months: Optional[int] = None
     interest_rate: Optional[float] = None
     is_active: Optional[bool] = None
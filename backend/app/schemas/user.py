@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from app.utils.phone_utils import normalize_phone_number
+from app.utils.money_utils import MoneyAmount
 
 # Base User Schema
 class UserBase(BaseModel):
@@ -61,8 +62,8 @@ class UserResponse(UserBase):
 
 # Profile Schemas
 class ProfileBase(BaseModel):
-    plan_amount: float = 0.0
-    total_invested_amount: float = 0.0  # Track total invested amount for interest calculation
+    plan_amount: MoneyAmount = 0.0
+    total_invested_amount: MoneyAmount = 0.0  # Track total invested amount for interest calculation
     current_plan_id: Optional[str] = None
     kyc_verified: bool = False
     kyc_document_type: Optional[str] = None
@@ -73,8 +74,8 @@ class ProfileCreate(ProfileBase):
     pass
 
 class ProfileUpdate(BaseModel):
-    plan_amount: Optional[float] = None
-    total_invested_amount: Optional[float] = None
+    plan_amount: Optional[MoneyAmount] = None
+    total_invested_amount: Optional[MoneyAmount] = None
     current_plan_id: Optional[str] = None
     kyc_verified: Optional[bool] = None
     kyc_document_type: Optional[str] = None
@@ -1,17 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Dict, Optional, List
+from datetime import date, datetime
 from app.models.wallet import TransactionType, TransactionStatus
+from app.utils.money_utils import MoneyAmount
 
 # Income Wallet Schemas
 class IncomeWalletBase(BaseModel):
-    balance: float = 0.0
+    balance: MoneyAmount = 0.0
 
 class IncomeWalletCreate(IncomeWalletBase):
     pass
 
 class IncomeWalletUpdate(BaseModel):
-    balance: Optional[float] = None
+    balance: Optional[MoneyAmount] = None
 
 class IncomeWalletResponse(IncomeWalletBase):
     id: str
@@ -24,7 +25,7 @@ class IncomeWalletResponse(IncomeWalletBase):
 
 # Income Transaction Schemas
 class IncomeTransactionBase(BaseModel):
-    amount: float
+    amount: MoneyAmount
     transaction_type: TransactionType
     status: TransactionStatus = TransactionStatus.PENDING
     description: Optional[str] = None
@@ -48,13 +49,13 @@ class IncomeTransactionResponse(IncomeTransactionBase):
 
 # Shopping Wallet Schemas
 class ShoppingWalletBase(BaseModel):
-    balance: float = 0.0
+    balance: MoneyAmount = 0.0
 
 class ShoppingWalletCreate(ShoppingWalletBase):
     pass
 
 class ShoppingWalletUpdate(BaseModel):
-    balance: Optional[float] = None
+    balance: Optional[MoneyAmount] = None
 
 class ShoppingWalletResponse(ShoppingWalletBase):
     id: str
@@ -67,7 +68,7 @@ class ShoppingWalletResponse(ShoppingWalletBase):
 
 # Shopping Transaction Schemas
 class ShoppingTransactionBase(BaseModel):
-    amount: float
+    amount: MoneyAmount
     transaction_type: TransactionType
     status: TransactionStatus = TransactionStatus.PENDING
     description: Optional[str] = None
@@ -92,7 +93,7 @@ class ShoppingTransactionResponse(ShoppingTransactionBase):
 # Shopping Voucher Schemas
 class ShoppingVoucherBase(BaseModel):
     code: str
-    amount: float
+    amount: MoneyAmount
     expiry_date: Optional[datetime] = None
 
 class ShoppingVoucherCreate(ShoppingVoucherBase):
@@ -108,10 +109,28 @@ class ShoppingVoucherResponse(ShoppingVoucherBase):
     is_used: bool
     created_at: datetime
     used_at: Optional[datetime] = None
+    expired_at: Optional[datetime] = None
     
     class Config:
         orm_mode = True
 
+class ShoppingVoucherRedeem(BaseModel):
+    code: str
+
+class ShoppingVoucherBulkIssue(BaseModel):
+    amount: MoneyAmount = Field(..., gt=0)
+    expiry_date: Optional[datetime] = None
+    user_ids: Optional[List[str]] = None  # All active users if not given
+    vouchers_per_user: int = Field(1, ge=1, le=100)
+    code_prefix: str = Field("", max_length=8, pattern="^[A-Z0-9]*$")
+    notify: bool = True
+
+class ShoppingVoucherBulkIssueResponse(BaseModel):
+    issued: int
+    users: int
+    amount: MoneyAmount
+    expiry_date: Optional[datetime] = None
+
 # Wallet with Transactions Response
 class IncomeWalletWithTransactionsResponse(IncomeWalletResponse):
     transactions: List[IncomeTransactionResponse] = []
@@ -125,3 +144,14 @@ class ShoppingWalletWithTransactionsResponse(ShoppingWalletResponse):
     
     class Config:
         orm_mode = True
+
+# Wallet Summary Schemas
+class WalletMonthSummary(BaseModel):
+    month: date
+    credits: MoneyAmount
+    debits: MoneyAmount
+    net: MoneyAmount
+    pending_credits: MoneyAmount
+    pending_debits: MoneyAmount
+    credits_by_source: Dict[str, MoneyAmount] = {}
+    transactions: int
@@ -1,12 +1,20 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.models.wallet import IncomeWallet, IncomeTransaction, TransactionType, TransactionStatus
 from app.models.network import Bonus
-from typing import List, Dict, Any
+from app.services.referral_tree_service import Hierarchy, ReferralTreeService
+from app.services.wallet_service import WalletPosting, WalletService
+from app.utils.money_utils import to_money
+from typing import List, Dict, Any, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+BONUS_SOURCE = "bonus"
+
+# Referral bonus percentage for each upline level, the direct referrer first;
+# bonuses go this many levels up
+REFERRAL_BONUS_PERCENTAGES = [4.0, 1.5, 0.5]
+
 class BonusService:
     """Service to handle bonus calculations and distributions"""
     
@@ -42,35 +50,49 @@ class BonusService:
                 # No referrer, no bonus to distribute
                 return result
                 
-            # Get the referrer chain (up to 3 levels)
-            referrer_chain = BonusService._get_referrer_chain(db, user.referrer_id, max_depth=3)
+            # Get the referrer chain, one referrer per bonus level
+            referrer_chain = BonusService._get_referrer_chain(
+                db, user.referrer_id, max_depth=len(REFERRAL_BONUS_PERCENTAGES)
+            )
             
-            # Calculate and distribute bonuses based on level
+            # Calculate bonuses based on level
+            bonuses = []
             for level, referrer_id in enumerate(referrer_chain):
                 bonus_percentage = BonusService._get_bonus_percentage(level)
                 if bonus_percentage > 0:
-                    bonus_amount = plan_amount * (bonus_percentage / 100)
-                    
-                    # Add bonus to referrer's wallet
-                    success, message = await BonusService._add_bonus_to_wallet(
-                        db, 
-                        referrer_id, 
-                        bonus_amount, 
-                        f"Level {level+1} referral bonus from {user.name} ({user.member_id})",
-                        user_id
-                    )
-                    
-                    result["bonuses_distributed"].append({
+                    bonuses.append({
                         "referrer_id": referrer_id,
                         "level": level + 1,
                         "percentage": bonus_percentage,
-                        "amount": bonus_amount,
-                        "success": success,
-                        "message": message
+                        "amount": to_money(plan_amount * (bonus_percentage / 100))
                     })
-                    
-                    if not success:
-                        result["errors"].append(message)
+            
+            # Add all bonuses to the referrers' wallets together
+            success, message = BonusService._add_bonuses_to_wallets(
+                db,
+                [
+                    (
+                        bonus["referrer_id"],
+                        bonus["amount"],
+                        f"Level {bonus['level']} referral bonus from {user.name} ({user.member_id})"
+                    )
+                    for bonus in bonuses
+                ],
+                user_id
+            )
+            
+            for bonus in bonuses:
+                result["bonuses_distributed"].append({
+                    **bonus,
+                    "success": success,
+                    "message": (
+                        f"Successfully added {bonus['amount']} bonus to user {bonus['referrer_id']}"
+                        if success else message
+                    )
+                })
+            
+            if not success:
+                result["errors"].append(message)
             
             return result
             
@@ -93,22 +115,10 @@ class BonusService:
         Returns:
             List of referrer IDs in order (first element is direct referrer)
         """
-        referrer_chain = []
-        current_referrer_id = start_referrer_id
-        depth = 0
-        
-        while current_referrer_id and depth < max_depth:
-            referrer_chain.append(current_referrer_id)
-            
-            # Get the next referrer in the chain
-            referrer = db.query(User).filter(User.id == current_referrer_id).first()
-            if not referrer or not referrer.referrer_id:
-                break
-                
-            current_referrer_id = referrer.referrer_id
-            depth += 1
-            
-        return referrer_chain
+        # The referrer's own upline comes from the referral closure in one query
+        return [start_referrer_id] + ReferralTreeService.upline(
+            db, start_referrer_id, max_depth - 1, Hierarchy.REFERRER
+        )
     
     @staticmethod
     def _get_bonus_percentage(level: int) -> float:
@@ -121,74 +131,62 @@ class BonusService:
         Returns:
             Bonus percentage
         """
-        if level == 0:
-            return 4.0  # 4% for direct referrer
-        elif level == 1:
-            return 1.5  # 1.5% for level 2
-        elif level == 2:
-            return 0.5  # 0.5% for level 3
-        else:
-            return 0.0  # No bonus for higher levels
+        if level < len(REFERRAL_BONUS_PERCENTAGES):
+            return REFERRAL_BONUS_PERCENTAGES[level]
+        return 0.0  # No bonus for higher levels
     
     @staticmethod
-    async def _add_bonus_to_wallet(
+    def _add_bonuses_to_wallets(
         db: Session, 
-        user_id: str, 
-        amount: float, 
-        description: str,
+        bonuses: List[Tuple[str, float, str]],
         reference_user_id: str
-    ) -> tuple:
+    ) -> Tuple[bool, str]:
         """
-        Add bonus amount to user's income wallet
+        Add bonus amounts to users' income wallets in one database transaction
         
         Args:
             db: Database session
-            user_id: ID of the user receiving the bonus
-            amount: Bonus amount
-            description: Description of the bonus
-            reference_user_id: ID of the user who triggered the bonus
+            bonuses: (user_id, amount, description) of each bonus
+            reference_user_id: ID of the user who triggered the bonuses
             
         Returns:
             Tuple of (success: bool, message: str)
         """
+        if not bonuses:
+            return True, "No bonuses to add"
+        
         try:
-            # Get or create income wallet
-            wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == user_id).first()
-            if not wallet:
-                wallet = IncomeWallet(user_id=user_id, balance=0.0)
-                db.add(wallet)
-                db.flush()
-            
-            # Create bonus record
-            bonus = Bonus(
-                user_id=user_id,
-                amount=amount,
-                bonus_type="referral",
-                description=description,
-                reference_id=reference_user_id,
-                is_paid=True
-            )
-            db.add(bonus)
-            
-            # Create transaction record
-            transaction = IncomeTransaction(
-                wallet_id=wallet.id,
-                amount=amount,
-                transaction_type=TransactionType.CREDIT,
-                status=TransactionStatus.COMPLETED,
-                description=description,
-                reference_id=bonus.id
-            )
-            db.add(transaction)
+            # Create bonus records
+            records = [
+                Bonus(
+                    user_id=user_id,
+                    amount=amount,
+                    bonus_type="referral",
+                    description=description,
+                    reference_id=reference_user_id,
+                    is_paid=True
+                )
+                for user_id, amount, description in bonuses
+            ]
+            db.add_all(records)
+            db.flush()
             
-            # Update wallet balance
-            wallet.balance += amount
-            db.add(wallet)
+            # Create transaction records and credit the wallets
+            WalletService.post_many(db, [
+                WalletPosting(
+                    user_id=record.user_id,
+                    amount=record.amount,
+                    description=record.description,
+                    reference_id=record.id,
+                    source=BONUS_SOURCE
+                )
+                for record in records
+            ])
             
             db.commit()
-            return True, f"Successfully added {amount} bonus to user {user_id}"
+            return True, f"Successfully added {len(bonuses)} bonuses"
             
         except Exception as e:
             db.rollback()
-            logger.error(f"Error adding bonus to wallet: {str(e)}")
-            return False, f"Error adding bonus to wallet: {str(e)}"
+            logger.error(f"Error adding bonuses to wallets: {str(e)}")
+            return False, f"Error adding bonuses to wallets: {str(e)}"
@@ -0,0 +1,159 @@
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.investment import Investment, InvestmentStatus
+from app.services.interest_accrual_service import MONTHLY_INTEREST_RATE
+
+SECONDS_PER_DAY = 86400
+
+
+class CashFlowForecastService:
+    """
+    Vectorized cash-flow forecast for the whole book of active investments.
+    Investments are loaded straight into NumPy arrays, without ORM objects, and
+    the payout schedule is computed for all of them at once, one month step at
+    a time. Follows the same rules as the scheduled jobs: interest is paid monthly
+    from next_interest_date on the start date's day of month (clamped to the end
+    of the month), and stops once the investment is completed after its end date.
+    """
+
+    @staticmethod
+    def load_book(db: Session) -> Dict[str, np.ndarray]:
+        """
+        Load every active investment into column arrays.
+        The rows are streamed out of Postgres with COPY and parsed by NumPy, with
+        dates sent as day numbers, so no Python object is built per row.
+        An investment completes on `completes_on`, the first day its end date
+        has passed, and is still paid interest on that day.
+        """
+        query = select(
+            func.coalesce(Investment.amount, 0.0),
+            cast(func.coalesce(
+                func.extract("day", Investment.start_date),
+                func.extract("day", Investment.next_interest_date),
+                1
+            ), Float),
+            # The completion job runs after the interest job and completes an
+            # investment once end_date <= midnight, so end dates round up to a day
+            cast(func.ceil(func.extract("epoch", Investment.end_date) / SECONDS_PER_DAY), Float),
+            cast(func.extract("epoch", Investment.next_interest_date) / SECONDS_PER_DAY, Float)
+        ).where(Investment.status == InvestmentStatus.ACTIVE)
+        sql = str(query.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+
+        # Missing dates are written as NaN and become NaT
+        buffer = io.StringIO()
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, NULL 'nan')", buffer)
+        finally:
+            cursor.close()
+        if buffer.tell():
+            buffer.seek(0)
+            book = np.loadtxt(buffer, delimiter=",", dtype=np.float64, ndmin=2)
+        else:
+            book = np.empty((0, 4))
+
+        return {
+            "amount": book[:, 0],
+            "start_day": book[:, 1].astype(np.int64),
+            "completes_on": CashFlowForecastService._to_dates(book[:, 2]),
+            "next_payout": CashFlowForecastService._to_dates(book[:, 3]),
+        }
+
+    @staticmethod
+    def _to_dates(day_numbers: np.ndarray) -> np.ndarray:
+        """
+        Convert days since the epoch, with NaN for missing values, to datetime64[D].
+        """
+        dates = np.full(day_numbers.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        present = ~np.isnan(day_numbers)
+        dates[present] = day_numbers[present].astype(np.int64).astype("datetime64[D]")
+        return dates
+
+    @staticmethod
+    def forecast(db: Session, days: int = 90, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Forecast interest payouts and maturing principal for the next `days` days,
+        starting today.
+        Returns totals plus daily and monthly series.
+        """
+        today = today or datetime.now().date()
+        book = CashFlowForecastService.load_book(db)
+        return CashFlowForecastService.forecast_book(book, days, today)
+
+    @staticmethod
+    def forecast_book(book: Dict[str, np.ndarray], days: int, today: date) -> Dict[str, Any]:
+        """
+        Compute the forecast for a loaded book. Separate from loading so the
+        same arrays can be reused for several horizons.
+        """
+        first_day = np.datetime64(today, "D")
+        horizon_end = first_day + np.timedelta64(days, "D")
+
+        amount = book["amount"]
+        start_day = book["start_day"]
+        completes_on = book["completes_on"]
+        next_payout = book["next_payout"]
+
+        interest = np.zeros(days, dtype=np.float64)
+        maturities = np.zeros(days, dtype=np.float64)
+
+        # Principal falls due on the day the investment completes
+        matures = ~np.isnat(completes_on) & (completes_on < horizon_end)
+        maturity_offsets = np.maximum((completes_on[matures] - first_day).astype(np.int64), 0)
+        np.add.at(maturities, maturity_offsets, amount[matures])
+
+        # Walk the schedule forward one month at a time for every investment at once
+        scheduled = ~np.isnat(next_payout)
+        monthly_interest = amount[scheduled] * MONTHLY_INTEREST_RATE
+        payout_day = start_day[scheduled]
+        # Interest runs before completion, so even an overdue completion is paid today
+        last_payout = np.maximum(completes_on[scheduled], first_day)
+        month = next_payout[scheduled].astype("datetime64[M]")
+        # The daily run pays at most one period per investment, so overdue
+        # periods are paid one per day from today until caught up
+        paid_on = np.full(month.shape, first_day - np.timedelta64(1, "D"))
+
+        active = np.ones(month.shape, dtype=bool)
+        while active.any():
+            month_start = month.astype("datetime64[D]")
+            days_in_month = ((month + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+            due = month_start + (np.minimum(payout_day, days_in_month) - 1).astype("timedelta64[D]")
+            paid_on = np.maximum(due, paid_on + np.timedelta64(1, "D"))
+
+            # Stop once past the horizon or past the day the investment completes
+            active &= (paid_on < horizon_end) & (np.isnat(last_payout) | (paid_on <= last_payout))
+            offsets = (paid_on[active] - first_day).astype(np.int64)
+            np.add.at(interest, offsets, monthly_interest[active])
+
+            month = month + 1
+
+        dates = first_day + np.arange(days)
+        months = dates.astype("datetime64[M]")
+        month_keys, month_index = np.unique(months, return_inverse=True)
+        monthly_interest_totals = np.bincount(month_index, weights=interest, minlength=len(month_keys))
+        monthly_maturity_totals = np.bincount(month_index, weights=maturities, minlength=len(month_keys))
+
+        return {
+            "as_of": today,
+            "days": days,
+            "active_investments": int(len(amount)),
+            "total_interest": float(interest.sum()),
+            "total_maturities": float(maturities.sum()),
+            "total": float(interest.sum() + maturities.sum()),
+            "daily": [
+                {"date": day, "interest": float(day_interest), "maturities": float(day_maturities)}
+                for day, day_interest, day_maturities in zip(dates.tolist(), interest, maturities)
+            ],
+            "monthly": [
+                {"month": str(month_key), "interest": float(month_interest), "maturities": float(month_maturities)}
+                for month_key, month_interest, month_maturities in zip(
+                    month_keys, monthly_interest_totals, monthly_maturity_totals
+                )
+            ],
+        }
@@ -0,0 +1,282 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, String, and_, column, func, select, update, values
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.sharding import shard_filter
+from app.models.investment import Investment, InvestmentStatus
+from app.models.job_run import JobRunStatus
+from app.services.job_run_service import JobRunService
+from app.services.notification_service import NotificationService
+from app.services.wallet_service import WalletPosting, WalletService
+from app.utils.date_utils import last_payout_date, next_interest_date
+from app.utils.money_utils import Money, to_money
+from app.utils.notification_utils import build_interest_notification
+
+logger = logging.getLogger(__name__)
+
+# Fixed 10% annual interest rate (0.833% monthly)
+MONTHLY_INTEREST_RATE = 10.0 / 12 / 100
+
+INTEREST_JOB_NAME = "process_monthly_interest"
+CATCH_UP_JOB_NAME = "catch_up_interest"
+INTEREST_SOURCE = "interest"
+
+
+class InterestAccrualService:
+    """
+    Set-based engine for the monthly interest run.
+    Due investments are read in keyset-ordered chunks and each chunk is posted
+    with a fixed number of statements, independent of the chunk size.
+    """
+
+    @staticmethod
+    def due_investments_filter(today: date):
+        """
+        Active investments whose next interest payout falls on or before the given day.
+        Served by the index on investments.next_interest_date.
+        """
+        return and_(
+            Investment.status == InvestmentStatus.ACTIVE,
+            Investment.next_interest_date <= today,
+        )
+
+    @staticmethod
+    def process_monthly_interest(
+        db: Session,
+        today: Optional[date] = None,
+        chunk_size: Optional[int] = None,
+        shard: int = 0,
+        shards: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Credit one month of interest for every investment due on or before today,
+        then advance each one to its next payout date.
+        Each chunk is committed on its own so the session never holds the whole run.
+        With shards > 1 only the investments of users in the given shard are processed.
+        Returns counts, errors and throughput for the run.
+        """
+        today = today or datetime.now().date()
+        return InterestAccrualService._run(
+            db, INTEREST_JOB_NAME, today,
+            InterestAccrualService.due_investments_filter(today),
+            None, chunk_size, shard, shards
+        )
+
+    @staticmethod
+    def catch_up_interest(
+        db: Session,
+        through: Optional[date] = None,
+        since: Optional[date] = None,
+        chunk_size: Optional[int] = None,
+        shard: int = 0,
+        shards: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Credit every payout period missed up to and including `through`, for all
+        due investments at once, each posted with its own period date.
+        The daily run pays one period per investment, so after days without a
+        run an investment can be several periods behind; this pays them all.
+        With `since`, only investments whose next payout falls on or after it
+        are caught up. Periods after an investment's completion are not paid.
+        Returns counts, errors and throughput for the run.
+        """
+        through = through or datetime.now().date()
+        due = InterestAccrualService.due_investments_filter(through)
+        if since:
+            due = and_(due, Investment.next_interest_date >= since)
+        return InterestAccrualService._run(
+            db, CATCH_UP_JOB_NAME, through, due, through, chunk_size, shard, shards
+        )
+
+    @staticmethod
+    def _run(
+        db: Session,
+        job_name: str,
+        run_date: date,
+        due,
+        through: Optional[date],
+        chunk_size: Optional[int],
+        shard: int,
+        shards: int
+    ) -> Dict[str, Any]:
+        """
+        Post interest for the investments matching `due`, chunk by chunk, as a
+        resumable job run. Without `through` one period is paid per investment,
+        otherwise every period due up to `through`.
+        """
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+        if shards > 1:
+            due = and_(due, shard_filter(Investment.user_id, shard, shards))
+
+        results = {
+            "scanned": 0,
+            "processed": 0,
+            "errored": 0,
+            "total_interest": 0.0,
+            "errors": [],
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0
+        }
+        started = time.monotonic()
+
+        run = JobRunService.start(db, job_name, run_date, shard, shards)
+        if run.status == JobRunStatus.COMPLETED:
+            logger.info(f"{job_name} for {run_date} (shard {shard}/{shards}) already completed, skipping")
+            return results
+
+        # Resume after the last committed chunk if this run was interrupted
+        last_id = run.cursor or ""
+
+        try:
+            while True:
+                rows = db.execute(
+                    select(
+                        Investment.id, Investment.user_id, Investment.amount, Investment.plan_name,
+                        Investment.start_date, Investment.end_date, Investment.next_interest_date
+                    )
+                    .where(due, Investment.id > last_id)
+                    .order_by(Investment.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+
+                last_id = rows[-1].id
+                results["scanned"] += len(rows)
+
+                try:
+                    posted, total = InterestAccrualService._post_chunk(db, rows, through)
+                    # Once a chunk has failed, keep the saved cursor before it so a
+                    # rerun retries it; chunks posted again are skipped per period
+                    cursor = run.cursor if results["errors"] else last_id
+                    JobRunService.checkpoint(db, run, cursor, posted)
+                    db.commit()
+                    results["processed"] += posted
+                    results["total_interest"] += total
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Error posting interest chunk ending at investment {last_id}: {str(e)}")
+                    results["errored"] += len(rows)
+                    results["errors"].append({
+                        "first_investment_id": rows[0].id,
+                        "last_investment_id": last_id,
+                        "error": str(e)
+                    })
+                    JobRunService.record_error(db, run, str(e))
+        except Exception as e:
+            db.rollback()
+            JobRunService.finish(db, run, JobRunStatus.FAILED, str(e))
+            raise
+
+        if results["errors"]:
+            # Leave the run unfinished for resume_interrupted_jobs or a rerun to retry
+            JobRunService.finish(
+                db, run, JobRunStatus.FAILED,
+                f"{len(results['errors'])} chunks failed, last: {results['errors'][-1]['error']}"
+            )
+        else:
+            JobRunService.finish(db, run)
+
+        elapsed = time.monotonic() - started
+        results["elapsed_seconds"] = elapsed
+        results["rows_per_second"] = results["processed"] / elapsed if elapsed > 0 else 0.0
+        return results
+
+    @staticmethod
+    def _due_periods(row: Any, through: Optional[date]) -> Tuple[List[date], date]:
+        """
+        Payout periods to post for one investment, and its next payout date after them.
+        Without `through` that is just its next period. With `through` it is every
+        period up to that day, skipping those after the investment completed, which
+        it would not have been paid had the jobs run on time.
+        """
+        if through is None:
+            return [row.next_interest_date], next_interest_date(row.start_date, row.next_interest_date)
+
+        last_day = last_payout_date(row.end_date) if row.end_date else through
+        periods = []
+        period = row.next_interest_date
+        while period <= through:
+            if period <= last_day:
+                periods.append(period)
+            period = next_interest_date(row.start_date, period)
+        return periods, period
+
+    @staticmethod
+    def _post_chunk(db: Session, rows: List[Any], through: Optional[date] = None) -> Tuple[int, float]:
+        """
+        Post interest for one chunk of due investments without committing.
+        Produces the same transactions, balances, returns and notifications
+        as the per-investment loop did. Each payout is keyed by its period, so
+        an investment already credited for that period is never credited twice.
+        """
+        schedule = [(row, *InterestAccrualService._due_periods(row, through)) for row in rows]
+        payouts = [
+            (row, period, to_money(row.amount * MONTHLY_INTEREST_RATE))
+            for row, periods, _ in schedule
+            for period in periods
+        ]
+        credits = [payout for payout in payouts if payout[2]]
+
+        posted = WalletService.post_many(db, [
+            WalletPosting(
+                user_id=row.user_id,
+                amount=amount,
+                description=f"Monthly interest from {row.plan_name} plan",
+                reference_id=row.id,
+                source=INTEREST_SOURCE,
+                payout_period=period
+            )
+            for row, period, amount in credits
+        ])
+        posted_periods = {(posting.reference_id, posting.payout_period) for posting in posted}
+        credits = [payout for payout in credits if (payout[0].id, payout[1]) in posted_periods]
+
+        # Investments with nothing to credit, or already credited for a period,
+        # still move on past every period handled here
+        investment_returns = defaultdict(float)
+        for row, _, amount in credits:
+            investment_returns[row.id] += amount
+        InterestAccrualService._advance_investments(db, [
+            (row.id, investment_returns[row.id], next_date)
+            for row, _, next_date in schedule
+        ])
+
+        if not credits:
+            return 0, 0.0
+
+        NotificationService.bulk_create_notifications(db, [
+            build_interest_notification(row.user_id, row.id, amount)
+            for row, _, amount in credits
+        ])
+
+        return len(credits), sum(amount for _, _, amount in credits)
+
+    @staticmethod
+    def _advance_investments(db: Session, advances: List[Tuple[str, float, date]]) -> None:
+        """
+        Add the credited interest to each investment's returns and move its
+        next_interest_date forward, in a single UPDATE.
+        Takes (investment_id, amount, next_date) tuples.
+        """
+        investment_deltas = values(
+            column("investment_id", String),
+            column("amount", Money),
+            column("next_date", Date),
+            name="investment_deltas"
+        ).data(advances)
+        db.execute(
+            update(Investment)
+            .where(Investment.id == investment_deltas.c.investment_id)
+            .values(
+                returns=func.coalesce(Investment.returns, 0.0) + investment_deltas.c.amount,
+                next_interest_date=investment_deltas.c.next_date
+            )
+            .execution_options(synchronize_session=False)
+        )
@@ -1,21 +1,46 @@
-from datetime import datetime, timedelta
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import Boolean, String, case, column, func, literal, select, update, values
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List, Optional
 
+from app.core.config import settings
 from app.models.investment import Investment, InvestmentStatus
-from app.models.wallet import IncomeWallet, IncomeTransaction, TransactionType, TransactionStatus
-from app.utils.notification_utils import send_investment_return_notification
+from app.models.job_run import JobRunStatus
+from app.models.plan import Plan
+from app.models.wallet import IncomeTransaction, TransactionType, TransactionStatus
+from app.services.job_run_service import JobRunService
+from app.services.notification_service import NotificationService
+from app.services.wallet_service import WalletPosting, WalletService
+from app.utils.money_utils import Money, to_money
+from app.utils.notification_utils import build_investment_return_notification, send_investment_return_notification
+
+logger = logging.getLogger(__name__)
+
+RETURNS_JOB_NAME = "calculate_returns"
+DAILY_RETURN_SOURCE = "daily_return"
 
 class InvestmentReturnService:
     @staticmethod
-    async def calculate_returns(db: Session) -> Dict[str, Any]:
+    async def calculate_returns(db: Session, chunk_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Calculate and apply returns for all active investments.
         This should be run on a schedule (e.g., daily).
+        The batch runs in a worker thread so it does not block the event loop.
         """
-        active_investments = db.query(Investment).filter(
-            Investment.status == InvestmentStatus.ACTIVE
-        ).all()
+        return await asyncio.to_thread(InvestmentReturnService.process_daily_returns, db, chunk_size)
+    
+    @staticmethod
+    def process_daily_returns(db: Session, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Credit today's return for every active investment, one chunk per transaction.
+        Plans are loaded once up front, and each chunk is posted with a fixed number
+        of statements. Progress is checkpointed per chunk, so an interrupted run
+        resumes after the last committed chunk.
+        """
+        today = datetime.now().date()
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
         
         results = {
             "processed": 0,
@@ -23,15 +48,123 @@ class InvestmentReturnService:
             "details": []
         }
         
-        for investment in active_investments:
-            result = await InvestmentReturnService.process_investment_return(db, investment)
-            if result:
-                results["processed"] += 1
-                results["total_returns_credited"] += result["amount_credited"]
-                results["details"].append(result)
+        run = JobRunService.start(db, RETURNS_JOB_NAME, today)
+        if run.status == JobRunStatus.COMPLETED:
+            return results
+        
+        last_id = run.cursor or ""
+        plan_rates = dict(db.execute(select(Plan.id, Plan.interest_rate)).all())
+        
+        try:
+            while True:
+                rows = db.execute(
+                    select(
+                        Investment.id, Investment.user_id, Investment.plan_id, Investment.plan_name,
+                        Investment.amount, Investment.start_date, Investment.duration_months
+                    )
+                    .where(Investment.status == InvestmentStatus.ACTIVE, Investment.id > last_id)
+                    .order_by(Investment.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+                
+                details = InvestmentReturnService._post_chunk(db, rows, plan_rates, today)
+                
+                last_id = rows[-1].id
+                JobRunService.checkpoint(db, run, last_id, len(details))
+                db.commit()
+                results["processed"] += len(details)
+                results["total_returns_credited"] += sum(detail["amount_credited"] for detail in details)
+                results["details"].extend(details)
+        except Exception as e:
+            db.rollback()
+            JobRunService.finish(db, run, JobRunStatus.FAILED, str(e))
+            raise
         
+        JobRunService.finish(db, run)
         return results
     
+    @staticmethod
+    def _post_chunk(db: Session, rows: List[Any], plan_rates: Dict[str, float], today: date) -> List[Dict[str, Any]]:
+        """
+        Post today's return for one chunk of active investments without committing.
+        Produces the same transactions, balances, returns, completions and
+        notifications as process_investment_return. Investments already credited
+        today are skipped. Returns the details of each credited investment.
+        """
+        now = datetime.now()
+        credits = []
+        for row in rows:
+            if row.plan_id not in plan_rates:
+                logger.warning(f"Skipping daily return for investment {row.id}: plan {row.plan_id} not found")
+                continue
+            # Annual interest rate / 365 = daily interest rate
+            daily_return = to_money(row.amount * (plan_rates[row.plan_id] / 100 / 365))
+            end_date = row.start_date + timedelta(days=row.duration_months * 30)
+            credits.append((row, daily_return, now >= end_date))
+        if not credits:
+            return []
+        
+        posted = WalletService.post_many(db, [
+            WalletPosting(
+                user_id=row.user_id,
+                amount=daily_return,
+                description=f"Daily return from {row.plan_name} investment",
+                reference_id=row.id,
+                source=DAILY_RETURN_SOURCE,
+                payout_period=today
+            )
+            for row, daily_return, _ in credits
+        ])
+        posted_ids = {posting.reference_id for posting in posted}
+        credits = [credit for credit in credits if credit[0].id in posted_ids]
+        if not credits:
+            return []
+        
+        # Add the return to each investment and complete those past their term
+        investment_deltas = values(
+            column("investment_id", String),
+            column("amount", Money),
+            column("term_over", Boolean),
+            name="investment_deltas"
+        ).data([(row.id, daily_return, term_over) for row, daily_return, term_over in credits])
+        updated = db.execute(
+            update(Investment)
+            .where(Investment.id == investment_deltas.c.investment_id)
+            .values(
+                returns=func.coalesce(Investment.returns, 0.0) + investment_deltas.c.amount,
+                status=case(
+                    (investment_deltas.c.term_over, literal(InvestmentStatus.COMPLETED, Investment.status.type)),
+                    else_=Investment.status
+                ),
+                end_date=case(
+                    (investment_deltas.c.term_over, literal(now, Investment.end_date.type)),
+                    else_=Investment.end_date
+                )
+            )
+            .returning(Investment.id, Investment.returns, Investment.status)
+            .execution_options(synchronize_session=False)
+        ).all()
+        investments = {row.id: row for row in updated}
+        
+        NotificationService.bulk_create_notifications(db, [
+            build_investment_return_notification(row.user_id, row.plan_name, daily_return)
+            for row, daily_return, _ in credits
+        ])
+        
+        return [
+            {
+                "investment_id": row.id,
+                "user_id": row.user_id,
+                "plan_name": row.plan_name,
+                "amount_credited": daily_return,
+                "total_returns_to_date": investments[row.id].returns,
+                "investment_status": investments[row.id].status
+            }
+            for row, daily_return, _ in credits
+        ]
+    
     @staticmethod
     async def process_investment_return(db: Session, investment: Investment) -> Optional[Dict[str, Any]]:
         """
@@ -42,34 +175,37 @@ class InvestmentReturnService:
         if investment.status != InvestmentStatus.ACTIVE:
             return None
         
+        # Skip if today's return has already been credited
+        today = datetime.now().date()
+        already_credited = db.query(IncomeTransaction.id).filter(
+            IncomeTransaction.source == DAILY_RETURN_SOURCE,
+            IncomeTransaction.reference_id == investment.id,
+            IncomeTransaction.payout_period == today
+        ).first()
+        if already_credited:
+            return None
+        
         # Calculate daily return based on the plan's interest rate
         # Annual interest rate / 365 = daily interest rate
         # For example, 12% annual interest = 0.12 / 365 = 0.00033 daily interest rate
         daily_interest_rate = investment.plan.interest_rate / 100 / 365
-        daily_return = investment.amount * daily_interest_rate
+        daily_return = to_money(investment.amount * daily_interest_rate)
         
         # Get or create income wallet
-        wallet = db.query(IncomeWallet).filter(IncomeWallet.user_id == investment.user_id).first()
-        if not wallet:
-            wallet = IncomeWallet(user_id=investment.user_id)
-            db.add(wallet)
-            db.commit()
-            db.refresh(wallet)
-        
-        # Create transaction for the return
-        transaction = IncomeTransaction(
-            wallet_id=wallet.id,
-            amount=daily_return,
-            transaction_type=TransactionType.CREDIT,
-            status=TransactionStatus.COMPLETED,
+        wallet = WalletService.get_or_create_income_wallet(db, investment.user_id)
+        
+        # Create transaction for the return and credit the wallet
+        WalletService.record_income_transaction(
+            db,
+            wallet.id,
+            daily_return,
+            TransactionType.CREDIT,
+            TransactionStatus.COMPLETED,
             description=f"Daily return from {investment.plan_name} investment",
-            reference_id=investment.id
+            reference_id=investment.id,
+            source=DAILY_RETURN_SOURCE,
+            payout_period=today
         )
-        db.add(transaction)
-        
-        # Update wallet balance
-        wallet.balance += daily_return
-        db.add(wallet)
         
         # Update investment returns total
         investment.returns += daily_return
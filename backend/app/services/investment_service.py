@@ -1,12 +1,21 @@
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
-import calendar
 
+from app.core.config import settings
+from app.core.sharding import shard_filter
 from app.models.investment import Investment, InvestmentStatus
+from app.models.job_run import JobRunStatus
 from app.models.wallet import IncomeWallet, IncomeTransaction, TransactionType, TransactionStatus
 from app.services.wallet_service import WalletService
 from app.services.notification_service import NotificationService
+from app.services.interest_accrual_service import InterestAccrualService, MONTHLY_INTEREST_RATE
+from app.services.job_run_service import JobRunService
+from app.utils.money_utils import to_money
+from app.utils.notification_utils import build_investment_completed_notification
+
+COMPLETION_JOB_NAME = "check_investment_completion"
 
 class InvestmentService:
     @staticmethod
@@ -38,8 +47,7 @@ class InvestmentService:
             return None
         
         # Use fixed 10% annual interest rate (0.833% monthly)
-        monthly_interest_rate = 10.0 / 12 / 100  # Convert 10% annual to monthly decimal
-        interest_amount = investment.amount * monthly_interest_rate
+        interest_amount = to_money(investment.amount * MONTHLY_INTEREST_RATE)
         
         return interest_amount
     
@@ -49,110 +57,71 @@ class InvestmentService:
         Process monthly interest payments for all active investments.
         Returns the number of payments processed.
         """
-        # Get all active investments
-        active_investments = InvestmentService.get_active_investments(db)
-        payments_processed = 0
-        
-        for investment in active_investments:
-            try:
-                # Check if we should process interest for this investment
-                if not InvestmentService._should_process_interest(investment):
-                    continue
-                
-                # Calculate interest
-                interest_amount = InvestmentService.calculate_monthly_interest(db, investment.id)
-                if not interest_amount:
-                    continue
-                
-                # Update investment returns
-                investment.returns += interest_amount
-                db.add(investment)
-                
-                # Add transaction to income wallet
-                wallet = WalletService.get_or_create_income_wallet(db, investment.user_id)
-                
-                transaction = IncomeTransaction(
-                    wallet_id=wallet.id,
-                    amount=interest_amount,
-                    transaction_type=TransactionType.CREDIT,
-                    status=TransactionStatus.COMPLETED,
-                    description=f"Monthly interest from {investment.plan_name} plan",
-                    reference_id=investment.id
-                )
-                db.add(transaction)
-                
-                # Update wallet balance
-                wallet.balance += interest_amount
-                db.add(wallet)
-                
-                # Create notification
-                NotificationService.create_interest_notification(
-                    db=db,
-                    user_id=investment.user_id,
-                    investment_id=investment.id,
-                    amount=interest_amount
-                )
-                
-                payments_processed += 1
-                
-            except Exception as e:
-                # Log error but continue processing other investments
-                print(f"Error processing interest for investment {investment.id}: {str(e)}")
-        
-        # Commit all changes at once
-        if payments_processed > 0:
-            db.commit()
-        
-        return payments_processed
+        results = InterestAccrualService.process_monthly_interest(db)
+        return results["processed"]
     
     @staticmethod
-    def _should_process_interest(investment: Investment) -> bool:
-        """
-        Determine if we should process interest for this investment.
-        Interest should be processed monthly from the start date.
-        """
-        today = datetime.now().date()
-        start_date = investment.start_date.date()
-        
-        # If investment is less than a month old, check if it's the same day of month
-        if (today.year == start_date.year and today.month == start_date.month):
-            return False
-        
-        # Check if today is the same day of month as the start date
-        # If start date is on a day that doesn't exist in current month (e.g., 31st),
-        # then process on the last day of the current month
-        day_to_process = min(start_date.day, calendar.monthrange(today.year, today.month)[1])
-        
-        return today.day == day_to_process
-    
-    @staticmethod
-    def check_investment_completion(db: Session) -> int:
+    def check_investment_completion(
+        db: Session,
+        shard: int = 0,
+        shards: int = 1,
+        chunk_size: Optional[int] = None
+    ) -> int:
         """
         Check if any investments have reached their end date and mark them as completed.
+        Works in chunks committed with a checkpoint, so an interrupted run resumes
+        where it stopped. With shards > 1 only the investments of users in the
+        given shard are checked.
         Returns the number of investments completed.
         """
         today = datetime.now().date()
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
         
-        # Find investments that have reached their end date
-        completed_investments = db.query(Investment).filter(
-            Investment.status == InvestmentStatus.ACTIVE,
-            Investment.end_date <= today
-        ).all()
+        run = JobRunService.start(db, COMPLETION_JOB_NAME, today, shard, shards)
+        if run.status == JobRunStatus.COMPLETED:
+            return 0
         
-        for investment in completed_investments:
-            investment.status = InvestmentStatus.COMPLETED
-            db.add(investment)
-            
-            # Create notification
-            NotificationService.create_investment_completed_notification(
-                db=db,
-                user_id=investment.user_id,
-                investment_id=investment.id,
-                amount=investment.amount,
-                returns=investment.returns
-            )
+        last_id = run.cursor or ""
+        completed = 0
         
-        if completed_investments:
-            db.commit()
+        try:
+            while True:
+                # Complete the next chunk of investments that have reached their
+                # end date in one UPDATE, which only locks the rows of that chunk
+                chunk = select(Investment.id).where(
+                    Investment.status == InvestmentStatus.ACTIVE,
+                    Investment.end_date <= today,
+                    Investment.id > last_id
+                )
+                if shards > 1:
+                    chunk = chunk.where(shard_filter(Investment.user_id, shard, shards))
+                chunk = chunk.order_by(Investment.id).limit(chunk_size)
+                
+                completed_investments = db.execute(
+                    update(Investment)
+                    .where(Investment.id.in_(chunk.scalar_subquery()))
+                    .values(status=InvestmentStatus.COMPLETED)
+                    .returning(Investment.id, Investment.user_id, Investment.amount, Investment.returns)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                if not completed_investments:
+                    break
+                
+                NotificationService.bulk_create_notifications(db, [
+                    build_investment_completed_notification(
+                        investment.user_id, investment.id, investment.amount, investment.returns
+                    )
+                    for investment in completed_investments
+                ])
+                
+                last_id = max(investment.id for investment in completed_investments)
+                JobRunService.checkpoint(db, run, last_id, len(completed_investments))
+                db.commit()
+                completed += len(completed_investments)
+        except Exception as e:
+            db.rollback()
+            JobRunService.finish(db, run, JobRunStatus.FAILED, str(e))
+            raise
         
-        return len(completed_investments)
+        JobRunService.finish(db, run)
+        return completed
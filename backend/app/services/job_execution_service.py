@@ -0,0 +1,189 @@
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.job_run import JobExecution, JobExecutionStatus
+
+# Prefix of every metric name exposed by render_metrics
+METRIC_PREFIX = "wellvest_job"
+
+class JobExecutionService:
+    """
+    History of scheduled job executions.
+    Each execution records when it was planned, started and finished, how many
+    rows it scanned, updated and failed on, and its throughput, so regressions in
+    the batch window and overrunning runs can be spotted and alerted on.
+    """
+
+    @staticmethod
+    def start(db: Session, job_name: str, scheduled_at: Optional[datetime] = None) -> JobExecution:
+        """
+        Record that a job has started. Commits.
+        Callers hold the job's lock, so any execution of it still marked running
+        was left by a process that died and is marked failed first.
+        """
+        JobExecutionService.fail_interrupted(db, job_name)
+        started_at = datetime.now()
+        execution = JobExecution(
+            job_name=job_name,
+            status=JobExecutionStatus.RUNNING,
+            runner=f"{socket.gethostname()}:{os.getpid()}",
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            lag_seconds=(started_at - scheduled_at).total_seconds() if scheduled_at else None
+        )
+        db.add(execution)
+        db.commit()
+        db.refresh(execution)
+        return execution
+
+    @staticmethod
+    def fail_interrupted(db: Session, job_name: str) -> int:
+        """
+        Mark the executions of a job still recorded as running as failed.
+        Only call this while holding the job's lock, when none of them can still
+        be running. Commits. Returns how many executions were marked.
+        """
+        interrupted = db.query(JobExecution).filter(
+            JobExecution.job_name == job_name,
+            JobExecution.status == JobExecutionStatus.RUNNING
+        ).all()
+        
+        now = datetime.now()
+        for execution in interrupted:
+            execution.status = JobExecutionStatus.FAILED
+            execution.finished_at = now
+            execution.duration_seconds = (now - execution.started_at).total_seconds()
+            execution.error_count = (execution.error_count or 0) + 1
+            execution.last_error = f"Interrupted: {execution.runner} stopped before the job finished"
+        
+        if interrupted:
+            db.commit()
+        return len(interrupted)
+
+    @staticmethod
+    def running_job_names(db: Session) -> List[str]:
+        """
+        Get the names of jobs with an execution recorded as running.
+        """
+        rows = db.query(JobExecution.job_name).filter(
+            JobExecution.status == JobExecutionStatus.RUNNING
+        ).distinct().all()
+        return [job_name for job_name, in rows]
+
+    @staticmethod
+    def finish(
+        db: Session,
+        execution: JobExecution,
+        results: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> JobExecution:
+        """
+        Record the outcome of a job from its results dict. Commits.
+        A job that raised is recorded as failed with the error; errors the job
+        reported in its results are counted without failing the execution.
+        """
+        results = results or {}
+        errors = results.get("errors") or []
+
+        execution.finished_at = datetime.now()
+        execution.duration_seconds = (execution.finished_at - execution.started_at).total_seconds()
+        execution.rows_updated = results.get("processed", 0)
+        execution.rows_scanned = results.get("scanned", execution.rows_updated)
+        execution.rows_errored = results.get("errored", 0)
+        execution.rows_per_second = (
+            execution.rows_updated / execution.duration_seconds if execution.duration_seconds > 0 else 0.0
+        )
+        execution.shards = results.get("shards")
+        execution.error_count = len(errors) + (1 if error else 0)
+        execution.last_error = error or (str(errors[-1]) if errors else None)
+        execution.status = JobExecutionStatus.FAILED if error else JobExecutionStatus.SUCCEEDED
+
+        db.add(execution)
+        db.commit()
+        return execution
+
+    @staticmethod
+    def get_history(
+        db: Session,
+        job_name: Optional[str] = None,
+        status: Optional[JobExecutionStatus] = None,
+        limit: int = 50
+    ) -> List[JobExecution]:
+        """
+        Get the most recent executions, newest first.
+        """
+        query = db.query(JobExecution)
+        if job_name:
+            query = query.filter(JobExecution.job_name == job_name)
+        if status:
+            query = query.filter(JobExecution.status == status)
+        return query.order_by(JobExecution.started_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def render_metrics(db: Session) -> str:
+        """
+        Render job metrics in the Prometheus text exposition format:
+        the last finished execution of each job, the last success time,
+        how long running executions have been running, and execution counts.
+        """
+        latest = db.query(JobExecution).filter(
+            JobExecution.status != JobExecutionStatus.RUNNING
+        ).order_by(
+            JobExecution.job_name, JobExecution.started_at.desc()
+        ).distinct(JobExecution.job_name).all()
+
+        last_success = db.query(
+            JobExecution.job_name, func.max(JobExecution.finished_at)
+        ).filter(
+            JobExecution.status == JobExecutionStatus.SUCCEEDED
+        ).group_by(JobExecution.job_name).all()
+
+        running = db.query(JobExecution).filter(
+            JobExecution.status == JobExecutionStatus.RUNNING
+        ).all()
+
+        counts = db.query(
+            JobExecution.job_name, JobExecution.status, func.count(JobExecution.id)
+        ).group_by(JobExecution.job_name, JobExecution.status).all()
+
+        now = datetime.now()
+        gauges = [
+            ("last_duration_seconds", "Duration of the last finished execution",
+             [(e.job_name, e.duration_seconds) for e in latest]),
+            ("last_lag_seconds", "Start delay of the last finished execution behind its schedule",
+             [(e.job_name, e.lag_seconds) for e in latest]),
+            ("last_rows_scanned", "Rows scanned by the last finished execution",
+             [(e.job_name, e.rows_scanned) for e in latest]),
+            ("last_rows_updated", "Rows updated by the last finished execution",
+             [(e.job_name, e.rows_updated) for e in latest]),
+            ("last_rows_errored", "Rows that errored in the last finished execution",
+             [(e.job_name, e.rows_errored) for e in latest]),
+            ("last_rows_per_second", "Throughput of the last finished execution",
+             [(e.job_name, e.rows_per_second) for e in latest]),
+            ("last_failed", "Whether the last finished execution failed",
+             [(e.job_name, int(e.status == JobExecutionStatus.FAILED)) for e in latest]),
+            ("last_success_timestamp_seconds", "Unix time the job last finished successfully",
+             [(job_name, finished_at.timestamp()) for job_name, finished_at in last_success]),
+            ("running_seconds", "How long each running execution has been running",
+             [(e.job_name, (now - e.started_at).total_seconds()) for e in running]),
+        ]
+
+        lines = []
+        for name, help_text, samples in gauges:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for job_name, value in samples:
+                if value is not None:
+                    lines.append(f'{METRIC_PREFIX}_{name}{{job="{job_name}"}} {float(value)}')
+
+        lines.append(f"# HELP {METRIC_PREFIX}_executions_total Recorded executions by outcome")
+        lines.append(f"# TYPE {METRIC_PREFIX}_executions_total counter")
+        for job_name, status, count in counts:
+            lines.append(f'{METRIC_PREFIX}_executions_total{{job="{job_name}",status="{status.value}"}} {count}')
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,174 @@
+import os
+import socket
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+
+from app.models.job_run import JobClaim, JobRun, JobRunStatus, generate_uuid
+
+class JobRunService:
+    """
+    Bookkeeping for resumable batch jobs.
+    A job run is keyed by job name, run date and shard. Jobs save their cursor
+    with every chunk they commit, so a restarted run resumes after the last
+    committed chunk instead of starting over.
+    """
+    
+    @staticmethod
+    def start(
+        db: Session,
+        job_name: str,
+        run_date: Optional[date] = None,
+        shard: int = 0,
+        shards: int = 1
+    ) -> JobRun:
+        """
+        Get the run for this job, day and shard, creating it if needed.
+        An unfinished run is marked running again, keeps its cursor and
+        counts one more attempt. Commits.
+        """
+        run_date = run_date or datetime.now().date()
+        run = JobRunService.get_run(db, job_name, run_date, shard)
+        
+        if not run:
+            run = JobRun(
+                job_name=job_name,
+                run_date=run_date,
+                shard=shard,
+                shards=shards,
+                status=JobRunStatus.RUNNING,
+                rows_processed=0,
+                chunks_committed=0
+            )
+            db.add(run)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another process created the same run first
+                db.rollback()
+                run = JobRunService.get_run(db, job_name, run_date, shard)
+        
+        if run.status != JobRunStatus.COMPLETED:
+            # A cursor is only meaningful for the shard layout it was recorded under
+            if run.shards != shards:
+                run.shards = shards
+                run.cursor = None
+            run.status = JobRunStatus.RUNNING
+            run.attempts = (run.attempts or 0) + 1
+            db.add(run)
+            db.commit()
+        
+        return run
+    
+    @staticmethod
+    def claim(db: Session, job_name: str, fire_time: datetime) -> bool:
+        """
+        Claim a planned run time of a job for this process. Only the first
+        process to claim it gets True; any other that fires the job for the
+        same time, even after the first has finished, gets False. Commits.
+        """
+        claimed = db.execute(
+            pg_insert(JobClaim)
+            .values(
+                id=generate_uuid(),
+                job_name=job_name,
+                fire_time=fire_time,
+                runner=f"{socket.gethostname()}:{os.getpid()}",
+                claimed_at=datetime.now()
+            )
+            .on_conflict_do_nothing(constraint="uq_job_claims_job_name_fire_time")
+        ).rowcount
+        db.commit()
+        return claimed == 1
+    
+    @staticmethod
+    def get_run(db: Session, job_name: str, run_date: date, shard: int = 0) -> Optional[JobRun]:
+        """
+        Get the run for this job, day and shard, if any.
+        """
+        return db.query(JobRun).filter(
+            JobRun.job_name == job_name,
+            JobRun.run_date == run_date,
+            JobRun.shard == shard
+        ).first()
+    
+    @staticmethod
+    def last_completed_run_date(db: Session, job_name: str) -> Optional[date]:
+        """
+        Day of the most recent completed run of a job, if it ever completed.
+        """
+        return db.query(func.max(JobRun.run_date)).filter(
+            JobRun.job_name == job_name,
+            JobRun.status == JobRunStatus.COMPLETED
+        ).scalar()
+    
+    @staticmethod
+    def resumable_job_names(
+        db: Session,
+        max_attempts: int,
+        retry_minutes: int,
+        run_date: Optional[date] = None
+    ) -> List[str]:
+        """
+        Names of jobs with a run for the given day that should be resumed.
+        A run still marked running, whose process may have died mid-run, is
+        always included; the job's lock tells whether it is still going.
+        A failed run is retried at most `max_attempts` times in all, waiting
+        `retry_minutes` after its first failure and twice as long after each
+        one since, so a run that keeps failing is left for an operator.
+        """
+        run_date = run_date or datetime.now().date()
+        runs = db.query(JobRun).filter(
+            JobRun.run_date == run_date,
+            JobRun.status != JobRunStatus.COMPLETED
+        ).all()
+        
+        now = datetime.now()
+        job_names = set()
+        for run in runs:
+            if run.status == JobRunStatus.FAILED:
+                attempts = run.attempts or 0
+                if attempts >= max_attempts:
+                    continue
+                failed_at = run.finished_at or run.updated_at
+                if failed_at and now < failed_at + timedelta(minutes=retry_minutes * 2 ** max(attempts - 1, 0)):
+                    continue
+            job_names.add(run.job_name)
+        return sorted(job_names)
+    
+    @staticmethod
+    def checkpoint(db: Session, run: JobRun, cursor: str, rows_processed: int) -> None:
+        """
+        Record progress for a chunk. Not committed here: the caller commits it
+        in the same transaction as the chunk's own writes.
+        """
+        run.cursor = cursor
+        run.rows_processed = (run.rows_processed or 0) + rows_processed
+        run.chunks_committed = (run.chunks_committed or 0) + 1
+        db.add(run)
+    
+    @staticmethod
+    def record_error(db: Session, run: JobRun, error: str) -> None:
+        """
+        Save the last error seen by the run without finishing it. Commits.
+        """
+        run.last_error = error
+        db.add(run)
+        db.commit()
+    
+    @staticmethod
+    def finish(db: Session, run: JobRun, status: JobRunStatus = JobRunStatus.COMPLETED, error: Optional[str] = None) -> JobRun:
+        """
+        Mark the run as finished. Commits.
+        """
+        run.status = status
+        run.finished_at = datetime.now()
+        if error:
+            run.last_error = error
+        db.add(run)
+        db.commit()
+        return run
@@ -2,39 +2,36 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from app.models.network import Network
 from app.models.investment import Investment, TeamInvestment
 from app.models.user import User
 from app.services.notification_service import NotificationService
+from app.services.referral_tree_service import Hierarchy, ReferralTreeService
+from app.utils.money_utils import to_money
+
+# Team commission share of an investment for each upline level;
+# commissions go this many levels up
+TEAM_COMMISSION_PERCENTAGES = {
+    1: 0.10,  # 10% for level 1
+    2: 0.05,  # 5% for level 2
+    3: 0.03,  # 3% for level 3
+    4: 0.02,  # 2% for level 4
+    5: 0.01,  # 1% for level 5
+}
 
 class NetworkService:
     @staticmethod
     def get_upline_members(db: Session, user_id: str, max_levels: int = 5) -> List[dict]:
         """
-        Get a user's upline members (referrers) up to max_levels
-        Returns a list of dicts with user_id and level
+        Get a user's upline members (referrers) up to max_levels, following
+        the networks' referred_by links.
+        Returns a list of dicts with user_id and level, read in one query
         """
-        upline_members = []
-        current_user_id = user_id
-        current_level = 1
-        
-        while current_level <= max_levels:
-            # Get the network record for the current user
-            network = db.query(Network).filter(Network.user_id == current_user_id).first()
-            if not network or not network.referred_by:
-                break
-                
-            # Add the referrer to the upline list
-            upline_members.append({
-                "user_id": network.referred_by,
-                "level": current_level
-            })
-            
-            # Move up to the next level
-            current_user_id = network.referred_by
-            current_level += 1
-        
-        return upline_members
+        return [
+            {"user_id": upline_id, "level": level}
+            for level, upline_id in enumerate(
+                ReferralTreeService.upline(db, user_id, max_levels, Hierarchy.NETWORK), start=1
+            )
+        ]
     
     @staticmethod
     def process_team_investment(db: Session, investment_id: str) -> List[TeamInvestment]:
@@ -52,17 +49,10 @@ class NetworkService:
         if not user:
             raise ValueError(f"User with ID {investment.user_id} not found")
         
-        # Get upline members (up to 5 levels)
-        upline_members = NetworkService.get_upline_members(db, user.id, max_levels=5)
-        
-        # Calculate commission percentages for each level
-        level_percentages = {
-            1: 0.10,  # 10% for level 1
-            2: 0.05,  # 5% for level 2
-            3: 0.03,  # 3% for level 3
-            4: 0.02,  # 2% for level 4
-            5: 0.01,  # 1% for level 5
-        }
+        # Get upline members, one per commission level
+        upline_members = NetworkService.get_upline_members(
+            db, user.id, max_levels=len(TEAM_COMMISSION_PERCENTAGES)
+        )
         
         team_investments = []
         
@@ -72,8 +62,8 @@ class NetworkService:
             user_id = member["user_id"]
             
             # Calculate commission amount based on level
-            percentage = level_percentages.get(level, 0)
-            amount = investment.amount * percentage
+            percentage = TEAM_COMMISSION_PERCENTAGES.get(level, 0)
+            amount = to_money(investment.amount * percentage)
             
             # Create team investment record
             team_investment = TeamInvestment(
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Query, Session
 from typing import List, Optional, Dict, Any
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate, NotificationUpdate
@@ -21,11 +22,9 @@ class NotificationService:
         self.db.refresh(notification)
         return notification
 
-    def get_user_notifications(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Notification]:
-        """Get all notifications for a user."""
-        return self.db.query(Notification).filter(
-            Notification.user_id == user_id
-        ).order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    def get_user_notifications_query(self, user_id: str) -> Query:
+        """Get a query over all notifications for a user, for the caller to page through."""
+        return self.db.query(Notification).filter(Notification.user_id == user_id)
 
     def get_unread_count(self, user_id: str) -> int:
         """Get count of unread notifications for a user."""
@@ -88,6 +87,17 @@ class NotificationService:
         )
         return self.create_notification(notification_data)
         
+    @staticmethod
+    def bulk_create_notifications(db: Session, notifications: List[Dict[str, Any]]) -> int:
+        """
+        Insert many notifications with a single multi-row INSERT.
+        The caller owns the transaction, so nothing is committed here.
+        """
+        if not notifications:
+            return 0
+        db.execute(insert(Notification), notifications)
+        return len(notifications)
+
     @staticmethod
     def create_payment_notification(db: Session, user_id: str, payment_id: str, amount: float) -> None:
         """Create a notification for a new payment submission."""
@@ -8,6 +8,8 @@ from app.models.user import Profile
 from app.schemas.payment import PaymentCreate, PaymentUpdate
 from app.services.notification_service import NotificationService
 
+PAYMENT_SOURCE = "payment"
+
 class PaymentService:
     @staticmethod
     def get_payments(db: Session, skip: int = 0, limit: int = 100) -> List[Payment]:
@@ -78,7 +80,8 @@ class PaymentService:
                 transaction_type=TransactionType.CREDIT,
                 status=TransactionStatus.PENDING,
                 description=f"Payment for {plan.name} plan - Pending approval (UPI Ref: {payment_data.upi_ref_id})",
-                reference_id=db_payment.id
+                reference_id=db_payment.id,
+                source=PAYMENT_SOURCE
             )
         except Exception as e:
             # Log the error but continue with the payment creation
@@ -135,6 +138,7 @@ class PaymentService:
         
         # Create investment with 10% annual interest rate
         from app.models.investment import Investment, InvestmentStatus
+        from app.utils.date_utils import next_interest_date
         db_investment = Investment(
             user_id=db_payment.user_id,
             plan_id=db_payment.plan_id,
@@ -144,7 +148,8 @@ class PaymentService:
             start_date=start_date,
             end_date=end_date,
             status=InvestmentStatus.ACTIVE,
-            returns=0.0  # Initial returns are zero
+            returns=0.0,  # Initial returns are zero
+            next_interest_date=next_interest_date(start_date, start_date.date())
         )
         db.add(db_investment)
         db.flush()  # Flush to get the investment ID
@@ -229,12 +234,10 @@ class PaymentService:
                     transaction_type=TransactionType.CREDIT,
                     status=TransactionStatus.COMPLETED,
                     description=f"Payment approved for {plan.name} plan - UPI Ref: {db_payment.upi_ref_id}",
-                    reference_id=db_payment.id
+                    reference_id=db_payment.id,
+                    source=PAYMENT_SOURCE
                 )
             
-            # Recalculate and update wallet balance to ensure consistency
-            WalletService.recalculate_income_wallet_balance(db, db_payment.user_id)
-            
         except Exception as e:
             # Log the error but continue with the payment approval
             print(f"Error updating income transaction: {str(e)}")
@@ -283,9 +286,11 @@ class PaymentService:
             if transaction:
                 # Update the transaction description to include rejection reason
                 transaction.description = f"{transaction.description} - REJECTED: {admin_notes or 'No reason provided'}"
-                transaction.status = TransactionStatus.REJECTED
-                db.add(transaction)
-                db.commit()
+                WalletService.update_transaction_status(
+                    db=db,
+                    transaction_id=transaction.id,
+                    new_status=TransactionStatus.REJECTED
+                )
         except Exception as e:
             # Log the error but continue with the payment rejection
             print(f"Error updating income transaction: {str(e)}")
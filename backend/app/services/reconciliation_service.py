@@ -0,0 +1,187 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.wallet import (
+    IncomeWallet, IncomeTransaction,
+    ShoppingWallet, ShoppingTransaction,
+    TransactionType, TransactionStatus
+)
+from app.utils.money_utils import Money, to_money
+
+logger = logging.getLogger(__name__)
+
+# Wallet and transaction model of each ledger, by wallet kind
+WALLET_LEDGERS = {
+    "income": (IncomeWallet, IncomeTransaction),
+    "shopping": (ShoppingWallet, ShoppingTransaction),
+}
+
+
+class ReconciliationService:
+    """
+    Platform-wide check of stored wallet balances against their ledgers.
+    Every wallet's ledger is summed in one grouped query per wallet kind and
+    the wallets whose balance drifts from it are streamed out, without loading
+    transactions into Python. A wallet's expected balance is the sum of its
+    completed transactions, credits minus debits, floored at zero like the
+    balance itself.
+    """
+
+    @staticmethod
+    def _ledger_balances(kind: str, wallet_ids: Optional[List[str]] = None):
+        """
+        Select each wallet's stored and expected balance, for every wallet of a
+        kind or only the given ones. Also returns the two balance expressions.
+        """
+        wallet_model, transaction_model = WALLET_LEDGERS[kind]
+        ledger = select(
+            transaction_model.wallet_id,
+            func.sum(case(
+                (transaction_model.transaction_type == TransactionType.DEBIT, -transaction_model.amount),
+                else_=transaction_model.amount
+            )).label("total"),
+            func.count().label("transactions")
+        ).where(
+            transaction_model.status == TransactionStatus.COMPLETED
+        ).group_by(transaction_model.wallet_id)
+        if wallet_ids is not None:
+            ledger = ledger.where(transaction_model.wallet_id.in_(wallet_ids))
+        ledger = ledger.subquery()
+
+        stored = func.coalesce(wallet_model.balance, 0)
+        expected = func.greatest(func.coalesce(ledger.c.total, 0), 0, type_=Money)
+        query = select(
+            wallet_model.id.label("wallet_id"),
+            wallet_model.user_id,
+            stored.label("stored_balance"),
+            expected.label("ledger_balance"),
+            func.coalesce(ledger.c.transactions, 0).label("transactions")
+        ).select_from(wallet_model).outerjoin(
+            ledger, ledger.c.wallet_id == wallet_model.id
+        )
+        if wallet_ids is not None:
+            query = query.where(wallet_model.id.in_(wallet_ids))
+        return query, stored, expected
+
+    @staticmethod
+    def find_drift(db: Session, kind: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every wallet of a kind whose stored balance differs from its ledger,
+        ordered by wallet id. Rows come from a server-side cursor, so any number
+        of wallets can be checked in constant memory; the session's transaction
+        must stay open while iterating.
+        """
+        query, stored, expected = ReconciliationService._ledger_balances(kind)
+        wallet_model = WALLET_LEDGERS[kind][0]
+        rows = db.execute(
+            query.where(stored != expected).order_by(wallet_model.id),
+            execution_options={"yield_per": settings.BATCH_CHUNK_SIZE}
+        )
+        for row in rows:
+            yield {
+                "kind": kind,
+                "wallet_id": row.wallet_id,
+                "user_id": row.user_id,
+                "stored_balance": row.stored_balance,
+                "ledger_balance": row.ledger_balance,
+                "drift": to_money(row.stored_balance - row.ledger_balance),
+                "transactions": row.transactions
+            }
+
+    @staticmethod
+    def fix_drift(db: Session, kind: str, wallet_ids: List[str]) -> int:
+        """
+        Set the given wallets' balances to their ledger balances, and commit.
+        The wallets are locked first, in id order, and their ledgers summed
+        afterwards, so a transaction posted concurrently is either counted in
+        the ledger or applied on top of the corrected balance, never lost.
+        Wallets that no longer drift are left alone. Returns the number fixed.
+        """
+        if not wallet_ids:
+            return 0
+
+        wallet_model = WALLET_LEDGERS[kind][0]
+        db.execute(
+            select(wallet_model.id)
+            .where(wallet_model.id.in_(wallet_ids))
+            .order_by(wallet_model.id)
+            .with_for_update()
+        ).all()
+
+        query, stored, expected = ReconciliationService._ledger_balances(kind, wallet_ids)
+        corrections = query.where(stored != expected).subquery()
+        fixed = db.execute(
+            update(wallet_model)
+            .where(wallet_model.id == corrections.c.wallet_id)
+            .values(balance=corrections.c.ledger_balance)
+            .returning(wallet_model.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return len(fixed)
+
+    @staticmethod
+    def reconcile(
+        db: Session,
+        kinds: Iterable[str] = tuple(WALLET_LEDGERS),
+        fix_db: Optional[Session] = None,
+        batch_size: Optional[int] = None,
+        report: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Check every wallet of the given kinds, passing each drifting wallet to
+        `report`. With `fix_db`, a second session, drifting wallets are also fixed
+        in batches of `batch_size` while `db` keeps streaming.
+        Returns counts, the total drift and throughput.
+        """
+        batch_size = batch_size or settings.BATCH_CHUNK_SIZE
+        results = {
+            "scanned": 0,
+            "processed": 0,
+            "total_drift": 0.0,
+            "errors": [],
+            "elapsed_seconds": 0.0
+        }
+        started = time.monotonic()
+
+        for kind in kinds:
+            batch = []
+            for drift in ReconciliationService.find_drift(db, kind):
+                results["scanned"] += 1
+                results["total_drift"] = to_money(results["total_drift"] + drift["drift"])
+                if report:
+                    report(drift)
+                if fix_db is not None:
+                    batch.append(drift["wallet_id"])
+                    if len(batch) >= batch_size:
+                        results["processed"] += ReconciliationService._fix_batch(fix_db, kind, batch, results)
+                        batch = []
+            if fix_db is not None and batch:
+                results["processed"] += ReconciliationService._fix_batch(fix_db, kind, batch, results)
+            db.rollback()
+
+        results["elapsed_seconds"] = time.monotonic() - started
+        return results
+
+    @staticmethod
+    def _fix_batch(db: Session, kind: str, wallet_ids: List[str], results: Dict[str, Any]) -> int:
+        """
+        Fix one batch of drifting wallets, recording a failure instead of raising.
+        """
+        try:
+            return ReconciliationService.fix_drift(db, kind, wallet_ids)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error fixing {kind} wallets {wallet_ids[0]} to {wallet_ids[-1]}: {str(e)}")
+            results["errors"].append({
+                "kind": kind,
+                "first_wallet_id": wallet_ids[0],
+                "last_wallet_id": wallet_ids[-1],
+                "error": str(e)
+            })
+            return 0
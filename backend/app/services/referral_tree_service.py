@@ -0,0 +1,378 @@
+import enum
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, String, column, delete, func, insert, literal, select, text, true, union_all, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.referral_graph import referral_graph
+from app.models.network import Network, ReferralClosure, ReferralLevelCount
+from app.models.user import User
+
+CLOSURE_COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+LEVEL_COUNT_COLUMNS = ["user_id", "depth", "members", "active_members"]
+
+
+class Hierarchy(str, enum.Enum):
+    """Which links an upline follows."""
+    REFERRER = "referrer"  # User.referrer_id, used for referral bonuses
+    NETWORK = "network"  # Network.referred_by, set by joining a network, used for team commissions
+
+
+class ReferralTreeService:
+    """
+    The referral hierarchy (User.referrer_id) kept as a closure table.
+    referral_closure holds a row for every user and every member of their
+    downline, with the depth between them, so a whole downline or upline is
+    one indexed range read. Registration updates it in the same transaction
+    as the referrer; `rebuild` recomputes it from User.referrer_id. Joining
+    a network does not change a user's referrer, so it leaves it alone.
+    Every change to the hierarchy or to a user's status also updates the
+    per-level member counts in referral_level_counts and the direct member
+    count in Network.total_members, so downline sizes are read, not counted.
+    """
+
+    @staticmethod
+    def _is_active(user_model=User):
+        """
+        Whether a user counts as active; a user without a status does.
+        """
+        return user_model.is_active.isnot(False)
+
+    @staticmethod
+    def _add_level_counts(db: Session, changes) -> None:
+        """
+        Add the (user_id, depth, members, active_members) changes selected by
+        `changes`, one per level, to the level counts with a single upsert.
+        The changes must be ordered by level, so concurrent writers lock the
+        counts in the same order. Does not commit.
+        """
+        statement = pg_insert(ReferralLevelCount).from_select(LEVEL_COUNT_COLUMNS, changes)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "depth"],
+            set_={
+                "members": ReferralLevelCount.members + statement.excluded.members,
+                "active_members": ReferralLevelCount.active_members + statement.excluded.active_members,
+                "updated_at": func.now()
+            }
+        ))
+
+    @staticmethod
+    def _add_direct_members(db: Session, referrer_id, change: int) -> None:
+        """
+        Add to the direct member count of a referrer's network. Does not commit.
+        """
+        db.execute(
+            update(Network)
+            .where(Network.user_id == referrer_id)
+            .values(total_members=func.coalesce(Network.total_members, 0) + change)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _upline_and_self(user_id: str):
+        """
+        Select (id, depth) of a user at depth 0 and of each of their uplines.
+        """
+        return union_all(
+            select(literal(user_id).label("id"), literal(0).label("depth")),
+            select(ReferralClosure.ancestor_id, ReferralClosure.depth)
+            .where(ReferralClosure.descendant_id == user_id)
+        ).subquery()
+
+    @staticmethod
+    def _downline_and_self(user_id: str):
+        """
+        Select (id, depth) of a user at depth 0 and of each member of their downline.
+        """
+        return union_all(
+            select(literal(user_id).label("id"), literal(0).label("depth")),
+            select(ReferralClosure.descendant_id, ReferralClosure.depth)
+            .where(ReferralClosure.ancestor_id == user_id)
+        ).subquery()
+
+    @staticmethod
+    def attach(db: Session, user_id: str, referrer_id: str) -> None:
+        """
+        Link a user, with their downline, under a referrer: every member of the
+        referrer's upline and the referrer become ancestors of every member of
+        the user's subtree, with one INSERT ... SELECT, and the level counts of
+        the upline grow accordingly. The user must not be in any upline yet.
+        Does not commit.
+        """
+        upline = ReferralTreeService._upline_and_self(referrer_id)
+        subtree = ReferralTreeService._downline_and_self(user_id)
+        depth = upline.c.depth + subtree.c.depth + 1
+        db.execute(
+            insert(ReferralClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(upline.c.id, subtree.c.id, depth)
+                .select_from(upline.join(subtree, true()))
+            )
+        )
+        ReferralTreeService._add_level_counts(
+            db,
+            select(
+                upline.c.id,
+                depth,
+                func.count(),
+                func.count().filter(ReferralTreeService._is_active())
+            )
+            .select_from(upline.join(subtree, true()).join(User, User.id == subtree.c.id))
+            .group_by(upline.c.id, depth)
+            .order_by(upline.c.id, depth)
+        )
+        ReferralTreeService._add_direct_members(db, referrer_id, 1)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute the closure table from User.referrer_id with one recursive
+        query, and commit. The table is locked against writes meanwhile.
+        Returns the number of rows written.
+        """
+        db.execute(text(f"LOCK TABLE {ReferralClosure.__tablename__} IN EXCLUSIVE MODE"))
+        db.execute(delete(ReferralClosure))
+
+        links = select(
+            User.referrer_id.label("ancestor_id"),
+            User.id.label("descendant_id"),
+            literal(1).label("depth")
+        ).where(User.referrer_id.isnot(None)).cte("links", recursive=True)
+        links = links.union_all(
+            select(links.c.ancestor_id, User.id, links.c.depth + 1)
+            .join(User, User.referrer_id == links.c.descendant_id)
+        )
+
+        written = db.execute(
+            insert(ReferralClosure).from_select(CLOSURE_COLUMNS, select(links))
+        ).rowcount
+        db.commit()
+        return written
+
+    @staticmethod
+    def set_active(db: Session, user_id: str, is_active: bool) -> bool:
+        """
+        Activate or deactivate a user and move them between the active and
+        inactive counts of every level they are in. Returns whether their
+        status changed. Does not commit.
+        """
+        was_active = ReferralTreeService._is_active()
+        changed = db.execute(
+            update(User)
+            .where(User.id == user_id, was_active if not is_active else ~was_active)
+            .values(is_active=is_active)
+            .returning(User.id)
+            .execution_options(synchronize_session="fetch")
+        ).first()
+        if not changed:
+            return False
+
+        ReferralTreeService._add_level_counts(
+            db,
+            select(
+                ReferralClosure.ancestor_id,
+                ReferralClosure.depth,
+                literal(0),
+                literal(1 if is_active else -1)
+            )
+            .where(ReferralClosure.descendant_id == user_id)
+            .order_by(ReferralClosure.ancestor_id, ReferralClosure.depth)
+        )
+        return True
+
+    @staticmethod
+    def rebuild_level_counts(db: Session) -> int:
+        """
+        Recompute every user's level counts, and every network's direct member
+        count, from the closure table and users' status, and commit. The counts
+        are locked against writes meanwhile. Returns the number of levels written.
+        """
+        db.execute(text(f"LOCK TABLE {ReferralLevelCount.__tablename__} IN EXCLUSIVE MODE"))
+        db.execute(delete(ReferralLevelCount))
+
+        written = db.execute(
+            insert(ReferralLevelCount).from_select(
+                LEVEL_COUNT_COLUMNS,
+                select(
+                    ReferralClosure.ancestor_id,
+                    ReferralClosure.depth,
+                    func.count(),
+                    func.count().filter(ReferralTreeService._is_active())
+                )
+                .join(User, User.id == ReferralClosure.descendant_id)
+                .group_by(ReferralClosure.ancestor_id, ReferralClosure.depth)
+            )
+        ).rowcount
+
+        direct_members = (
+            select(ReferralLevelCount.members)
+            .where(ReferralLevelCount.user_id == Network.user_id, ReferralLevelCount.depth == 1)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Network)
+            .values(total_members=func.coalesce(direct_members, 0))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return written
+
+    @staticmethod
+    def upline(
+        db: Session,
+        user_id: str,
+        max_depth: int,
+        hierarchy: Hierarchy = Hierarchy.REFERRER
+    ) -> List[str]:
+        """
+        IDs of a user's uplines up to `max_depth` levels, the direct referrer
+        first, with one query however deep the chain: an indexed read of the
+        closure table for the referrer hierarchy, a recursive query over the
+        networks, stopped at `max_depth`, for the network hierarchy.
+        """
+        if max_depth < 1:
+            return []
+        if hierarchy == Hierarchy.REFERRER:
+            return db.execute(
+                select(ReferralClosure.ancestor_id)
+                .where(
+                    ReferralClosure.descendant_id == user_id,
+                    ReferralClosure.depth <= max_depth
+                )
+                .order_by(ReferralClosure.depth)
+            ).scalars().all()
+
+        upline = select(
+            Network.referred_by.label("user_id"),
+            literal(1).label("depth")
+        ).where(
+            Network.user_id == user_id, Network.referred_by.isnot(None)
+        ).cte("upline", recursive=True)
+        referrer = aliased(Network)
+        upline = upline.union_all(
+            select(referrer.referred_by, upline.c.depth + 1)
+            .where(
+                referrer.user_id == upline.c.user_id,
+                referrer.referred_by.isnot(None),
+                upline.c.depth < max_depth
+            )
+        )
+        return db.execute(
+            select(upline.c.user_id).order_by(upline.c.depth)
+        ).scalars().all()
+
+    @staticmethod
+    def level_counts(db: Session, user_id: str) -> List[Dict[str, int]]:
+        """
+        Size of each level of a user's downline, in total and active members,
+        from the nearest level down, read from the level counts.
+        """
+        rows = db.execute(
+            select(
+                ReferralLevelCount.depth,
+                ReferralLevelCount.members,
+                ReferralLevelCount.active_members
+            )
+            .where(ReferralLevelCount.user_id == user_id, ReferralLevelCount.members > 0)
+            .order_by(ReferralLevelCount.depth)
+        ).all()
+        return [
+            {"level": depth, "total": total, "active": active}
+            for depth, total, active in rows
+        ]
+
+    @staticmethod
+    def depth_below(db: Session, ancestor_id: str, user_id: str) -> Optional[int]:
+        """
+        How many levels below `ancestor_id` a user is: 0 for the ancestor
+        themselves, None if the user is not in their downline.
+        """
+        if ancestor_id == user_id:
+            return 0
+        return db.execute(
+            select(ReferralClosure.depth).where(
+                ReferralClosure.ancestor_id == ancestor_id,
+                ReferralClosure.descendant_id == user_id
+            )
+        ).scalar()
+
+    @staticmethod
+    def tree_nodes(db: Session):
+        """
+        Query users as nodes of the referral tree: their details with the number
+        of direct referrals and of members of their whole downline, and of those
+        the active ones, each read from the level counts.
+        """
+        levels = select(ReferralLevelCount).where(ReferralLevelCount.user_id == User.id)
+        return db.query(
+            User.id,
+            User.name,
+            User.member_id,
+            User.is_active,
+            User.join_date,
+            User.avatar,
+            func.coalesce(
+                levels.where(ReferralLevelCount.depth == 1)
+                .with_only_columns(ReferralLevelCount.members)
+                .scalar_subquery(),
+                0
+            ).label("child_count"),
+            func.coalesce(
+                levels.with_only_columns(func.sum(ReferralLevelCount.members)).scalar_subquery(),
+                0
+            ).label("team_count"),
+            func.coalesce(
+                levels.with_only_columns(func.sum(ReferralLevelCount.active_members)).scalar_subquery(),
+                0
+            ).label("active_team_count")
+        )
+
+    @staticmethod
+    def downline(db: Session, user_id: str, max_depth: Optional[int] = None) -> List[Any]:
+        """
+        The members of a user's downline down to `max_depth` levels, nearest
+        level first and by join date within a level, with one query. Each row
+        carries the member's depth and referrer.
+        For display only: with a depth limit the members are taken from the
+        in-process referral graph when it knows the user, which may lag other
+        processes' changes until its next reload.
+        """
+        columns = (
+            User.id,
+            User.name,
+            User.member_id,
+            User.referrer_id,
+            User.is_active,
+            User.join_date,
+            User.avatar
+        )
+        members = None
+        if max_depth is not None:
+            try:
+                members = referral_graph.downline(user_id, max_depth)
+            except KeyError:
+                pass
+
+        if members is not None:
+            if not members:
+                return []
+            depths = values(
+                column("id", String), column("depth", Integer), name="downline"
+            ).data(members)
+            query = (
+                select(*columns, depths.c.depth)
+                .join(depths, depths.c.id == User.id)
+                .order_by(depths.c.depth, User.join_date, User.id)
+            )
+            return db.execute(query).all()
+
+        query = (
+            select(*columns, ReferralClosure.depth)
+            .join(ReferralClosure, ReferralClosure.descendant_id == User.id)
+            .where(ReferralClosure.ancestor_id == user_id)
+            .order_by(ReferralClosure.depth, User.join_date, User.id)
+        )
+        if max_depth is not None:
+            query = query.where(ReferralClosure.depth <= max_depth)
+        return db.execute(query).all()
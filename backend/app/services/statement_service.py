@@ -0,0 +1,167 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.wallet import TransactionType, TransactionStatus
+from app.services.reconciliation_service import WALLET_LEDGERS
+from app.utils.money_utils import Money, to_money
+
+# Columns of a statement line, in order
+STATEMENT_COLUMNS = [
+    "created_at", "transaction_id", "transaction_type", "amount",
+    "status", "description", "reference_id", "balance"
+]
+
+
+class StatementFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+# Media type of each statement format
+STATEMENT_MEDIA_TYPES = {
+    StatementFormat.CSV: "text/csv",
+    StatementFormat.NDJSON: "application/x-ndjson",
+}
+
+
+class StatementService:
+    """
+    Wallet statements streamed straight from the ledger.
+    Transactions are read as plain rows from a server-side cursor in the
+    (wallet_id, created_at, id) index order and written out one batch at a
+    time, so a statement of any length is produced in constant memory.
+    """
+
+    @staticmethod
+    def _range_filter(transaction_model, start: Optional[date], end: Optional[date]):
+        """
+        Conditions selecting transactions created between the start and end
+        days, both inclusive.
+        """
+        conditions = []
+        if start:
+            conditions.append(transaction_model.created_at >= datetime.combine(start, time.min))
+        if end:
+            conditions.append(transaction_model.created_at < datetime.combine(end + timedelta(days=1), time.min))
+        return conditions
+
+    @staticmethod
+    def opening_balance(db: Session, kind: str, wallet_id: str, start: Optional[date]) -> float:
+        """
+        Ledger balance of a wallet before the start day: the signed sum of its
+        completed transactions created earlier.
+        """
+        if not start:
+            return 0.0
+        transaction_model = WALLET_LEDGERS[kind][1]
+        signed = case(
+            (transaction_model.transaction_type == TransactionType.DEBIT, -transaction_model.amount),
+            else_=transaction_model.amount
+        )
+        total = db.execute(
+            select(func.coalesce(func.sum(signed), 0.0)).where(
+                transaction_model.wallet_id == wallet_id,
+                transaction_model.status == TransactionStatus.COMPLETED,
+                transaction_model.created_at < datetime.combine(start, time.min)
+            )
+        ).scalar()
+        return to_money(total)
+
+    @staticmethod
+    def statement_rows(
+        db: Session,
+        kind: str,
+        wallet_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ):
+        """
+        Execute the statement query for a wallet and return its result, oldest
+        transaction first, fetched `BATCH_CHUNK_SIZE` rows at a time. Each row
+        carries the change in ledger balance up to and including it, which
+        only completed transactions move.
+        The session's transaction must stay open while the result is read.
+        """
+        transaction_model = WALLET_LEDGERS[kind][1]
+        completed_amount = case(
+            (transaction_model.status != TransactionStatus.COMPLETED, 0),
+            (transaction_model.transaction_type == TransactionType.DEBIT, -transaction_model.amount),
+            else_=transaction_model.amount
+        )
+        order = (transaction_model.created_at, transaction_model.id)
+        query = select(
+            transaction_model.created_at,
+            transaction_model.id.label("transaction_id"),
+            transaction_model.transaction_type,
+            transaction_model.amount,
+            transaction_model.status,
+            transaction_model.description,
+            transaction_model.reference_id,
+            func.sum(completed_amount, type_=Money).over(order_by=order, rows=(None, 0)).label("balance_change")
+        ).where(
+            transaction_model.wallet_id == wallet_id,
+            *StatementService._range_filter(transaction_model, start, end)
+        ).order_by(*order)
+        return db.execute(query, execution_options={"yield_per": settings.BATCH_CHUNK_SIZE})
+
+    @staticmethod
+    def _line(row: Any, opening: float) -> dict:
+        """
+        One statement line as a dict of plain values.
+        """
+        return {
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "transaction_id": row.transaction_id,
+            "transaction_type": row.transaction_type.value,
+            "amount": row.amount,
+            "status": row.status.value if row.status else None,
+            "description": row.description,
+            "reference_id": row.reference_id,
+            "balance": to_money(opening + (row.balance_change or 0.0))
+        }
+
+    @staticmethod
+    def stream_statement(
+        session_factory: Callable[[], Session],
+        kind: str,
+        wallet_id: str,
+        format: StatementFormat,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Iterator[str]:
+        """
+        Generate a wallet's statement as CSV or NDJSON text, one chunk per batch
+        of transactions. The CSV header is produced before the query runs.
+        The generator opens its own session, so it can outlive the request
+        handler that returns it, and closes it when exhausted or discarded.
+        """
+        buffer = io.StringIO()
+        writer = None
+        if format == StatementFormat.CSV:
+            writer = csv.DictWriter(buffer, fieldnames=STATEMENT_COLUMNS)
+            writer.writeheader()
+            yield buffer.getvalue()
+
+        db = session_factory()
+        try:
+            opening = StatementService.opening_balance(db, kind, wallet_id, start)
+            for rows in StatementService.statement_rows(db, kind, wallet_id, start, end).partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                for row in rows:
+                    line = StatementService._line(row, opening)
+                    if writer:
+                        writer.writerow(line)
+                    else:
+                        buffer.write(json.dumps(line) + "\n")
+                yield buffer.getvalue()
+        finally:
+            db.close()
@@ -0,0 +1,272 @@
+import logging
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, String, bindparam, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.wallet import ShoppingVoucher, TransactionType, TransactionStatus, generate_uuid
+from app.services.notification_service import NotificationService
+from app.services.wallet_service import WalletService
+from app.utils.money_utils import Money, to_money
+from app.utils.notification_utils import build_voucher_notification
+
+logger = logging.getLogger(__name__)
+
+# Voucher codes use upper-case letters and digits, without the look-alikes 0, O, 1 and I
+VOUCHER_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+VOUCHER_CODE_LENGTH = 10
+# Rounds of regenerating codes that collided with existing ones before giving up
+MAX_CODE_ATTEMPTS = 5
+
+
+class VoucherNotRedeemableError(ValueError):
+    """
+    A voucher does not exist in the wallet, or was already used or has expired.
+    """
+
+
+class VoucherService:
+    """
+    Shopping voucher issuance, redemption and expiry.
+    Vouchers are issued in bulk with one batched insert, redeemed with a
+    conditional update that only one request can win, and expired by a
+    periodic sweep, all without reading vouchers into Python first.
+    """
+
+    @staticmethod
+    def generate_code(prefix: str = "") -> str:
+        """
+        A random voucher code: the prefix, then 50 random bits as 10 characters.
+        """
+        value = secrets.randbits(5 * VOUCHER_CODE_LENGTH)
+        characters = []
+        for _ in range(VOUCHER_CODE_LENGTH):
+            value, index = divmod(value, len(VOUCHER_CODE_ALPHABET))
+            characters.append(VOUCHER_CODE_ALPHABET[index])
+        return prefix + "".join(characters)
+
+    @staticmethod
+    def issue_many(
+        db: Session,
+        user_ids: List[str],
+        amount: float,
+        expiry_date: Optional[datetime] = None,
+        vouchers_per_user: int = 1,
+        code_prefix: str = ""
+    ) -> List[Tuple[str, str]]:
+        """
+        Issue vouchers of the same amount to many users' shopping wallets,
+        creating the missing wallets. All vouchers are written by a single
+        INSERT ... SELECT over arrays of their ids, wallets and codes, which
+        skips codes already taken; only those are regenerated and inserted
+        again, so every voucher gets a unique code.
+        Returns (user_id, code) of every voucher issued. Does not commit.
+        """
+        amount = to_money(amount)
+        wallet_ids = WalletService.ensure_shopping_wallets(db, user_ids)
+        pending = [user_id for user_id in user_ids for _ in range(vouchers_per_user)]
+        issued = []
+
+        for _ in range(MAX_CODE_ATTEMPTS):
+            if not pending:
+                break
+            codes = set()
+            vouchers = []
+            for user_id in pending:
+                code = VoucherService.generate_code(code_prefix)
+                while code in codes:
+                    code = VoucherService.generate_code(code_prefix)
+                codes.add(code)
+                vouchers.append((user_id, code))
+
+            rows = func.unnest(
+                bindparam("ids", [generate_uuid() for _ in vouchers], ARRAY(String)),
+                bindparam("wallet_ids", [wallet_ids[user_id] for user_id, _ in vouchers], ARRAY(String)),
+                bindparam("codes", [code for _, code in vouchers], ARRAY(String))
+            ).table_valued("id", "wallet_id", "code").render_derived()
+            inserted = set(db.execute(
+                pg_insert(ShoppingVoucher)
+                .from_select(
+                    ["id", "wallet_id", "code", "amount", "is_used", "expiry_date"],
+                    select(
+                        rows.c.id,
+                        rows.c.wallet_id,
+                        rows.c.code,
+                        literal(amount, Money),
+                        literal(False),
+                        literal(expiry_date, DateTime)
+                    )
+                )
+                .on_conflict_do_nothing(index_elements=[ShoppingVoucher.code])
+                .returning(ShoppingVoucher.code)
+            ).scalars())
+            issued.extend(voucher for voucher in vouchers if voucher[1] in inserted)
+            pending = [user_id for user_id, code in vouchers if code not in inserted]
+
+        if pending:
+            raise RuntimeError(f"Could not generate unique codes for {len(pending)} vouchers")
+        return issued
+
+    @staticmethod
+    def issue_to_users(
+        db: Session,
+        amount: float,
+        expiry_date: Optional[datetime] = None,
+        user_ids: Optional[List[str]] = None,
+        vouchers_per_user: int = 1,
+        code_prefix: str = "",
+        notify: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Issue vouchers to the given users, or to every active user, optionally
+        notifying each of them, and commit. Unknown user ids are ignored.
+        """
+        query = select(User.id).where(User.is_active.isnot(False))
+        if user_ids is not None:
+            query = query.where(User.id.in_(set(user_ids)))
+        recipients = db.execute(query.order_by(User.id)).scalars().all()
+
+        issued = VoucherService.issue_many(
+            db, recipients, amount, expiry_date, vouchers_per_user, code_prefix
+        )
+        if notify:
+            expiry_days = (expiry_date - datetime.now()).days if expiry_date else None
+            NotificationService.bulk_create_notifications(db, [
+                build_voucher_notification(user_id, code, expiry_days)
+                for user_id, code in issued
+            ])
+        db.commit()
+
+        logger.info(f"Issued {len(issued)} vouchers of {amount:.2f} to {len(recipients)} users")
+        return {
+            "issued": len(issued),
+            "users": len(recipients),
+            "amount": amount,
+            "expiry_date": expiry_date
+        }
+
+    @staticmethod
+    def redeem(db: Session, wallet_id: str, code: str) -> ShoppingVoucher:
+        """
+        Redeem a voucher of a shopping wallet: mark it used and debit its amount
+        from the wallet, in one transaction, and commit.
+        The voucher is claimed with a conditional UPDATE, so of concurrent
+        redemptions exactly one succeeds, and the debit is a conditional
+        increment. Raises VoucherNotRedeemableError if the voucher cannot be
+        used and InsufficientBalanceError if the balance does not cover it;
+        either way nothing changes.
+        """
+        now = datetime.now()
+        claimed = db.execute(
+            update(ShoppingVoucher)
+            .where(
+                ShoppingVoucher.code == code,
+                ShoppingVoucher.wallet_id == wallet_id,
+                ShoppingVoucher.is_used.isnot(True),
+                ShoppingVoucher.expired_at.is_(None),
+                or_(ShoppingVoucher.expiry_date.is_(None), ShoppingVoucher.expiry_date > now)
+            )
+            .values(is_used=True, used_at=now)
+            .returning(ShoppingVoucher.id, ShoppingVoucher.amount)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if not claimed:
+            db.rollback()
+            raise VoucherNotRedeemableError(VoucherService._not_redeemable_reason(db, wallet_id, code))
+
+        try:
+            WalletService.record_shopping_transaction(
+                db,
+                wallet_id,
+                claimed.amount,
+                TransactionType.DEBIT,
+                TransactionStatus.COMPLETED,
+                description=f"Voucher {code} redeemed",
+                reference_id=claimed.id
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return db.get(ShoppingVoucher, claimed.id, populate_existing=True)
+
+    @staticmethod
+    def _not_redeemable_reason(db: Session, wallet_id: str, code: str) -> str:
+        """
+        Why a voucher could not be claimed, for the error message.
+        """
+        voucher = db.query(ShoppingVoucher).filter(
+            ShoppingVoucher.code == code,
+            ShoppingVoucher.wallet_id == wallet_id
+        ).first()
+        if not voucher:
+            return "Voucher not found"
+        if voucher.is_used:
+            return "Voucher has already been used"
+        return "Voucher has expired"
+
+    @staticmethod
+    def expire_vouchers(
+        db: Session,
+        now: Optional[datetime] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Mark every unused voucher past its expiry date as expired, a chunk at a
+        time with one UPDATE each, committing after each chunk. Vouchers being
+        redeemed at that moment are locked and skipped; the redemption decides.
+        Returns counts, errors and throughput for the sweep.
+        """
+        now = now or datetime.now()
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+        results = {
+            "scanned": 0,
+            "processed": 0,
+            "errors": [],
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0
+        }
+        started = time.monotonic()
+
+        while True:
+            due = (
+                select(ShoppingVoucher.id)
+                .where(
+                    ShoppingVoucher.expiry_date <= now,
+                    ShoppingVoucher.is_used.isnot(True),
+                    ShoppingVoucher.expired_at.is_(None)
+                )
+                .limit(chunk_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            try:
+                expired = db.execute(
+                    update(ShoppingVoucher)
+                    .where(ShoppingVoucher.id.in_(due))
+                    .values(expired_at=now)
+                    .returning(ShoppingVoucher.id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error expiring vouchers: {str(e)}")
+                results["errors"].append({"error": str(e)})
+                break
+
+            results["scanned"] += len(expired)
+            results["processed"] += len(expired)
+            if len(expired) < chunk_size:
+                break
+
+        elapsed = time.monotonic() - started
+        results["elapsed_seconds"] = elapsed
+        results["rows_per_second"] = results["processed"] / elapsed if elapsed > 0 else 0.0
+        return results
@@ -0,0 +1,249 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import Date, and_, cast, delete, func, insert, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.wallet import WalletMonthlyTotal, TransactionType, TransactionStatus
+from app.services.reconciliation_service import WALLET_LEDGERS
+from app.utils.money_utils import to_money
+
+# Rollup source of transactions posted without one
+NO_SOURCE = ""
+# Name of that source in summaries
+OTHER_SOURCE = "other"
+
+ROLLUP_KEY = ["wallet_kind", "wallet_id", "month", "transaction_type", "status", "source"]
+
+
+class RollupEntry(NamedTuple):
+    """
+    A change to one bucket of a wallet's monthly totals.
+    Without a month it applies to the current month by the database clock,
+    which is the month of transactions created in the current transaction.
+    """
+    wallet_id: str
+    transaction_type: TransactionType
+    status: TransactionStatus
+    amount: float
+    source: Optional[str] = None
+    month: Optional[date] = None
+    transactions: int = 1
+
+
+class WalletRollupService:
+    """
+    Per-wallet, per-month ledger totals in wallet_monthly_totals.
+    WalletService adds every transaction it posts, and moves it between
+    status buckets when its status changes, in the same database transaction,
+    so the rollup always matches the committed ledger. `rebuild` recomputes
+    it from the ledger for history.
+    """
+
+    @staticmethod
+    def month_of(created_at: Optional[datetime]) -> Optional[date]:
+        """
+        The rollup month of a transaction created at the given time.
+        """
+        return created_at.date().replace(day=1) if created_at else None
+
+    @staticmethod
+    def entry_for(transaction: Any) -> RollupEntry:
+        """
+        The rollup entry of an income or shopping transaction as it stands.
+        A transaction that has not been flushed yet counts in the current month.
+        """
+        return RollupEntry(
+            wallet_id=transaction.wallet_id,
+            transaction_type=transaction.transaction_type,
+            status=transaction.status or TransactionStatus.PENDING,
+            amount=transaction.amount,
+            source=getattr(transaction, "source", None),
+            month=WalletRollupService.month_of(transaction.created_at)
+        )
+
+    @staticmethod
+    def reversal(entry: RollupEntry) -> RollupEntry:
+        """
+        The entry that takes `entry` back out of its bucket.
+        """
+        return entry._replace(amount=-entry.amount, transactions=-entry.transactions)
+
+    @staticmethod
+    def add(db: Session, kind: str, entries: Iterable[RollupEntry]) -> None:
+        """
+        Add entries to a wallet kind's monthly totals with a single upsert.
+        Entries for the same bucket are summed first, and buckets are written
+        in key order so concurrent posters lock them in the same order.
+        Does not commit.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+
+        current_month = None
+        if any(entry.month is None for entry in entries):
+            current_month = db.execute(select(func.current_date())).scalar().replace(day=1)
+
+        buckets = defaultdict(lambda: [0.0, 0])
+        for entry in entries:
+            key = (
+                entry.wallet_id,
+                entry.month or current_month,
+                entry.transaction_type,
+                entry.status,
+                entry.source or NO_SOURCE
+            )
+            buckets[key][0] += entry.amount
+            buckets[key][1] += entry.transactions
+
+        statement = pg_insert(WalletMonthlyTotal)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=ROLLUP_KEY,
+                set_={
+                    "total": WalletMonthlyTotal.total + statement.excluded.total,
+                    "transactions": WalletMonthlyTotal.transactions + statement.excluded.transactions,
+                    "updated_at": func.now()
+                }
+            ),
+            [
+                {
+                    "wallet_kind": kind,
+                    "wallet_id": wallet_id,
+                    "month": month,
+                    "transaction_type": transaction_type,
+                    "status": status,
+                    "source": source,
+                    "total": to_money(total),
+                    "transactions": transactions
+                }
+                for (wallet_id, month, transaction_type, status, source), (total, transactions)
+                in sorted(buckets.items(), key=lambda bucket: tuple(map(str, bucket[0])))
+            ]
+        )
+
+    @staticmethod
+    def move(db: Session, kind: str, before: RollupEntry, after: RollupEntry) -> None:
+        """
+        Move a transaction from the bucket it was counted in to its new one,
+        e.g. after its status changed. Does not commit.
+        """
+        if before == after:
+            return
+        WalletRollupService.add(db, kind, [WalletRollupService.reversal(before), after])
+
+    @staticmethod
+    def rebuild(db: Session, kind: str, since: Optional[date] = None) -> int:
+        """
+        Recompute a wallet kind's monthly totals from its ledger, for every month
+        or from the month of `since` on, and commit. The rollup is locked against
+        writes first, so transactions posted meanwhile either are in the ledger
+        the totals are computed from or are added on top once the lock is
+        released. Returns the number of buckets written.
+        """
+        transaction_model = WALLET_LEDGERS[kind][1]
+        since = since.replace(day=1) if since else None
+
+        db.execute(text(f"LOCK TABLE {WalletMonthlyTotal.__tablename__} IN EXCLUSIVE MODE"))
+
+        stale = delete(WalletMonthlyTotal).where(WalletMonthlyTotal.wallet_kind == kind)
+        if since:
+            stale = stale.where(WalletMonthlyTotal.month >= since)
+        db.execute(stale)
+
+        month = cast(func.date_trunc("month", transaction_model.created_at), Date)
+        status = func.coalesce(
+            transaction_model.status, literal(TransactionStatus.PENDING, transaction_model.status.type)
+        )
+        bucket = [transaction_model.wallet_id, month, transaction_model.transaction_type, status]
+        if hasattr(transaction_model, "source"):
+            source = func.coalesce(transaction_model.source, NO_SOURCE)
+            bucket.append(source)
+        else:
+            source = literal(NO_SOURCE)
+        totals = select(
+            literal(kind),
+            transaction_model.wallet_id,
+            month,
+            transaction_model.transaction_type,
+            status,
+            source,
+            func.sum(transaction_model.amount),
+            func.count()
+        ).where(
+            transaction_model.wallet_id.isnot(None),
+            transaction_model.created_at.isnot(None)
+        ).group_by(*bucket)
+        if since:
+            totals = totals.where(transaction_model.created_at >= since)
+
+        written = db.execute(
+            insert(WalletMonthlyTotal).from_select(ROLLUP_KEY + ["total", "transactions"], totals)
+        ).rowcount
+        db.commit()
+        return written
+
+    @staticmethod
+    def monthly_summary(
+        db: Session,
+        kind: str,
+        wallet_id: str,
+        months: int = 12,
+        today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        A wallet's totals for each of the last `months` months, newest first,
+        read from the rollup: completed credits and debits, completed credits
+        by source, amounts still pending and the number of transactions.
+        """
+        today = today or datetime.now().date()
+        index = today.year * 12 + today.month - 1
+        month_starts = [
+            date((index - offset) // 12, (index - offset) % 12 + 1, 1)
+            for offset in range(months)
+        ]
+        summary = {
+            month: {
+                "month": month,
+                "credits": 0.0,
+                "debits": 0.0,
+                "net": 0.0,
+                "pending_credits": 0.0,
+                "pending_debits": 0.0,
+                "credits_by_source": defaultdict(float),
+                "transactions": 0
+            }
+            for month in month_starts
+        }
+
+        rows = db.query(WalletMonthlyTotal).filter(
+            and_(
+                WalletMonthlyTotal.wallet_kind == kind,
+                WalletMonthlyTotal.wallet_id == wallet_id,
+                WalletMonthlyTotal.month >= month_starts[-1]
+            )
+        ).all()
+        for row in rows:
+            totals = summary.get(row.month)
+            if totals is None:
+                continue
+            credit = row.transaction_type == TransactionType.CREDIT
+            if row.status == TransactionStatus.COMPLETED:
+                if credit:
+                    totals["credits"] += row.total
+                    totals["credits_by_source"][row.source or OTHER_SOURCE] += row.total
+                else:
+                    totals["debits"] += row.total
+            elif row.status == TransactionStatus.PENDING:
+                totals["pending_credits" if credit else "pending_debits"] += row.total
+            totals["transactions"] += row.transactions
+
+        for totals in summary.values():
+            totals["net"] = totals["credits"] - totals["debits"]
+            totals["credits_by_source"] = {
+                source: to_money(total) for source, total in totals["credits_by_source"].items() if total
+            }
+        return list(summary.values())
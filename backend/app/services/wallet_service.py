@@ -1,13 +1,51 @@
+from sqlalchemy import String, case, cast, column, delete, func, insert, literal, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from datetime import datetime
+from collections import defaultdict
+from typing import Optional, List, Dict, Iterable, NamedTuple, Type, Union
+from datetime import date, datetime, timedelta
 
+from app.core.config import settings
+from app.services.wallet_rollup_service import RollupEntry, WalletRollupService
+from app.utils.money_utils import Money, to_money
 from app.models.wallet import (
     IncomeWallet, ShoppingWallet, 
     IncomeTransaction, ShoppingTransaction,
-    TransactionType, TransactionStatus
+    IncomeBalanceSnapshot,
+    TransactionType, TransactionStatus,
+    generate_uuid
 )
 
+# Signed amount of a transaction: credits add to the balance, debits subtract
+SIGNED_AMOUNT = case(
+    (IncomeTransaction.transaction_type == TransactionType.DEBIT, -IncomeTransaction.amount),
+    else_=IncomeTransaction.amount
+)
+
+WalletModel = Union[Type[IncomeWallet], Type[ShoppingWallet]]
+
+
+class InsufficientBalanceError(ValueError):
+    """
+    A debit would take a wallet's balance below zero.
+    """
+
+
+class WalletPosting(NamedTuple):
+    """
+    One income wallet transaction for WalletService.post_many.
+    A posting with a source and payout_period is posted at most once per
+    (source, reference_id, payout_period).
+    """
+    user_id: str
+    amount: float
+    transaction_type: TransactionType = TransactionType.CREDIT
+    status: TransactionStatus = TransactionStatus.COMPLETED
+    description: Optional[str] = None
+    reference_id: Optional[str] = None
+    source: Optional[str] = None
+    payout_period: Optional[date] = None
+
 class WalletService:
     @staticmethod
     def get_or_create_income_wallet(db: Session, user_id: str) -> IncomeWallet:
@@ -35,6 +73,238 @@ class WalletService:
             db.refresh(wallet)
         return wallet
     
+    @staticmethod
+    def ensure_income_wallets(db: Session, user_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Make sure every user has an income wallet, creating missing ones in one upsert.
+        Returns a mapping of user_id to wallet_id. Does not commit.
+        """
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+        
+        db.execute(
+            pg_insert(IncomeWallet).on_conflict_do_nothing(index_elements=[IncomeWallet.user_id]),
+            [{"user_id": user_id, "balance": 0.0} for user_id in user_ids]
+        )
+        rows = db.execute(
+            select(IncomeWallet.user_id, IncomeWallet.id).where(IncomeWallet.user_id.in_(user_ids))
+        ).all()
+        return {row.user_id: row.id for row in rows}
+    
+    @staticmethod
+    def ensure_shopping_wallets(db: Session, user_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Make sure every user has a shopping wallet, creating missing ones in one upsert.
+        Returns a mapping of user_id to wallet_id. Does not commit.
+        """
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+        
+        db.execute(
+            pg_insert(ShoppingWallet).on_conflict_do_nothing(index_elements=[ShoppingWallet.user_id]),
+            [{"user_id": user_id, "balance": 0.0} for user_id in user_ids]
+        )
+        rows = db.execute(
+            select(ShoppingWallet.user_id, ShoppingWallet.id).where(ShoppingWallet.user_id.in_(user_ids))
+        ).all()
+        return {row.user_id: row.id for row in rows}
+    
+    @staticmethod
+    def apply_income_balance_deltas(db: Session, deltas: Dict[str, float]) -> None:
+        """
+        Add a per-wallet amount to many income wallet balances with a single UPDATE.
+        Does not commit.
+        """
+        if not deltas:
+            return
+        
+        wallet_deltas = values(
+            column("wallet_id", String),
+            column("delta", Money),
+            name="wallet_deltas"
+        ).data([(wallet_id, to_money(delta)) for wallet_id, delta in deltas.items()])
+        db.execute(
+            update(IncomeWallet)
+            .where(IncomeWallet.id == wallet_deltas.c.wallet_id)
+            .values(balance=func.coalesce(IncomeWallet.balance, 0.0) + wallet_deltas.c.delta)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def post_many(db: Session, postings: List[WalletPosting]) -> List[WalletPosting]:
+        """
+        Post many income wallet transactions at once: create the missing wallets,
+        insert every transaction and add each wallet's net change to its balance,
+        with the same few statements however many postings there are.
+        Only completed postings move the balance, and debits are not checked
+        against it. Postings for a payout period that was already posted are skipped.
+        Returns the postings that were posted, in order. Does not commit.
+        """
+        if not postings:
+            return []
+        
+        postings = [posting._replace(amount=to_money(posting.amount)) for posting in postings]
+        wallet_ids = WalletService.ensure_income_wallets(db, {posting.user_id for posting in postings})
+        
+        # Ids are assigned here so the rows RETURNING reports map back to postings
+        transaction_ids = [generate_uuid() for _ in postings]
+        inserted = set(db.execute(
+            pg_insert(IncomeTransaction)
+            .on_conflict_do_nothing(
+                index_elements=[
+                    IncomeTransaction.source,
+                    IncomeTransaction.reference_id,
+                    IncomeTransaction.payout_period
+                ],
+                index_where=IncomeTransaction.payout_period.isnot(None)
+            )
+            .returning(IncomeTransaction.id),
+            [
+                {
+                    "id": transaction_id,
+                    "wallet_id": wallet_ids[posting.user_id],
+                    "amount": posting.amount,
+                    "transaction_type": posting.transaction_type,
+                    "status": posting.status,
+                    "description": posting.description,
+                    "reference_id": posting.reference_id,
+                    "source": posting.source,
+                    "payout_period": posting.payout_period
+                }
+                for transaction_id, posting in zip(transaction_ids, postings)
+            ]
+        ).scalars())
+        posted = [
+            posting for transaction_id, posting in zip(transaction_ids, postings)
+            if transaction_id in inserted
+        ]
+        
+        wallet_deltas = defaultdict(float)
+        for posting in posted:
+            if posting.status == TransactionStatus.COMPLETED:
+                wallet_deltas[wallet_ids[posting.user_id]] += WalletService.signed_amount(
+                    posting.amount, posting.transaction_type
+                )
+        WalletService.apply_income_balance_deltas(db, wallet_deltas)
+        WalletRollupService.add(db, "income", [
+            RollupEntry(
+                wallet_id=wallet_ids[posting.user_id],
+                transaction_type=posting.transaction_type,
+                status=posting.status,
+                amount=posting.amount,
+                source=posting.source
+            )
+            for posting in posted
+        ])
+        
+        return posted
+    
+    @staticmethod
+    def adjust_balance(
+        db: Session,
+        wallet_model: WalletModel,
+        wallet_id: str,
+        delta: float,
+        clamp: bool = False
+    ) -> float:
+        """
+        Add `delta` to a wallet's balance with an in-database increment and return
+        the new balance. Does not commit.
+        The UPDATE locks the wallet row until the transaction ends, so concurrent
+        adjustments of the same wallet wait for each other and none is lost,
+        while adjustments of other wallets run in parallel.
+        A debit larger than the balance raises InsufficientBalanceError and leaves
+        the balance untouched, or with `clamp` brings the balance down to zero.
+        """
+        new_balance = func.coalesce(wallet_model.balance, 0.0) + to_money(delta)
+        statement = update(wallet_model).where(wallet_model.id == wallet_id)
+        if clamp:
+            statement = statement.values(balance=func.greatest(new_balance, 0.0))
+        else:
+            if delta < 0:
+                statement = statement.where(new_balance >= 0)
+            statement = statement.values(balance=new_balance)
+        
+        balance = db.execute(
+            statement.returning(wallet_model.balance).execution_options(synchronize_session="fetch")
+        ).scalar()
+        if balance is None:
+            raise InsufficientBalanceError("Insufficient balance")
+        return balance
+    
+    @staticmethod
+    def signed_amount(amount: float, transaction_type: TransactionType) -> float:
+        """
+        The change a completed transaction makes to its wallet's balance.
+        """
+        return -amount if transaction_type == TransactionType.DEBIT else amount
+    
+    @staticmethod
+    def record_income_transaction(
+        db: Session,
+        wallet_id: str,
+        amount: float,
+        transaction_type: TransactionType,
+        status: TransactionStatus = TransactionStatus.PENDING,
+        clamp: bool = False,
+        **fields
+    ) -> IncomeTransaction:
+        """
+        Add a transaction to an income wallet, moving the balance atomically if it
+        is completed. Other IncomeTransaction columns can be passed as keywords.
+        Does not commit.
+        """
+        amount = to_money(amount)
+        if status == TransactionStatus.COMPLETED:
+            WalletService.adjust_balance(
+                db, IncomeWallet, wallet_id, WalletService.signed_amount(amount, transaction_type), clamp
+            )
+        
+        transaction = IncomeTransaction(
+            wallet_id=wallet_id,
+            amount=amount,
+            transaction_type=transaction_type,
+            status=status,
+            **fields
+        )
+        db.add(transaction)
+        WalletRollupService.add(db, "income", [WalletRollupService.entry_for(transaction)])
+        return transaction
+    
+    @staticmethod
+    def record_shopping_transaction(
+        db: Session,
+        wallet_id: str,
+        amount: float,
+        transaction_type: TransactionType,
+        status: TransactionStatus = TransactionStatus.PENDING,
+        clamp: bool = False,
+        **fields
+    ) -> ShoppingTransaction:
+        """
+        Add a transaction to a shopping wallet, moving the balance atomically if it
+        is completed. Other ShoppingTransaction columns can be passed as keywords.
+        Does not commit.
+        """
+        amount = to_money(amount)
+        if status == TransactionStatus.COMPLETED:
+            WalletService.adjust_balance(
+                db, ShoppingWallet, wallet_id, WalletService.signed_amount(amount, transaction_type), clamp
+            )
+        
+        transaction = ShoppingTransaction(
+            wallet_id=wallet_id,
+            amount=amount,
+            transaction_type=transaction_type,
+            status=status,
+            **fields
+        )
+        db.add(transaction)
+        WalletRollupService.add(db, "shopping", [WalletRollupService.entry_for(transaction)])
+        return transaction
+    
     @staticmethod
     def add_income_transaction(
         db: Session, 
@@ -43,7 +313,8 @@ class WalletService:
         transaction_type: TransactionType,
         status: TransactionStatus = TransactionStatus.PENDING,
         description: Optional[str] = None,
-        reference_id: Optional[str] = None
+        reference_id: Optional[str] = None,
+        source: Optional[str] = None
     ) -> IncomeTransaction:
         """
         Add a transaction to a user's income wallet.
@@ -51,24 +322,18 @@ class WalletService:
         # Get or create wallet
         wallet = WalletService.get_or_create_income_wallet(db, user_id)
         
-        # Create transaction
-        transaction = IncomeTransaction(
-            wallet_id=wallet.id,
-            amount=amount,
-            transaction_type=transaction_type,
-            status=status,
+        # Debits never take the balance below zero
+        transaction = WalletService.record_income_transaction(
+            db,
+            wallet.id,
+            amount,
+            transaction_type,
+            status,
+            clamp=True,
             description=description,
-            reference_id=reference_id
+            reference_id=reference_id,
+            source=source
         )
-        db.add(transaction)
-        
-        # Update wallet balance if transaction is completed
-        if status == TransactionStatus.COMPLETED:
-            if transaction_type == TransactionType.CREDIT:
-                wallet.balance += amount
-            elif transaction_type == TransactionType.DEBIT:
-                wallet.balance = max(0, wallet.balance - amount)
-            db.add(wallet)
         
         db.commit()
         db.refresh(transaction)
@@ -83,21 +348,28 @@ class WalletService:
         """
         Update the status of an income transaction and update wallet balance if needed.
         """
-        transaction = db.query(IncomeTransaction).filter(IncomeTransaction.id == transaction_id).first()
+        # Lock the transaction so concurrent status changes cannot both complete it
+        transaction = db.query(IncomeTransaction).filter(
+            IncomeTransaction.id == transaction_id
+        ).with_for_update().first()
         if not transaction:
             return None
         
         old_status = transaction.status
+        counted = WalletRollupService.entry_for(transaction)
         transaction.status = new_status
+        WalletService.invalidate_stale_snapshots(db, transaction, old_status)
+        WalletRollupService.move(db, "income", counted, WalletRollupService.entry_for(transaction))
         
         # Update wallet balance if transaction is being completed
         if old_status != TransactionStatus.COMPLETED and new_status == TransactionStatus.COMPLETED:
-            wallet = transaction.wallet
-            if transaction.transaction_type == TransactionType.CREDIT:
-                wallet.balance += transaction.amount
-            elif transaction.transaction_type == TransactionType.DEBIT:
-                wallet.balance = max(0, wallet.balance - transaction.amount)
-            db.add(wallet)
+            WalletService.adjust_balance(
+                db,
+                IncomeWallet,
+                transaction.wallet_id,
+                WalletService.signed_amount(transaction.amount, transaction.transaction_type),
+                clamp=True
+            )
         # No wallet balance update needed for REJECTED or FAILED status
         # as the transaction was never completed
         
@@ -138,27 +410,98 @@ class WalletService:
         ).order_by(IncomeTransaction.created_at.desc()).offset(skip).limit(limit).all()
     
     @staticmethod
-    def recalculate_income_wallet_balance(db: Session, user_id: str) -> float:
+    def get_income_balance(db: Session, wallet_id: str) -> float:
         """
-        Recalculate the income wallet balance from all completed transactions.
+        Get an income wallet's balance from its ledger: the latest balance snapshot
+        plus the completed transactions created after it, summed in SQL.
+        Read-only; the cost depends only on the activity since the snapshot.
         """
-        wallet = WalletService.get_or_create_income_wallet(db, user_id)
+        snapshot = db.query(IncomeBalanceSnapshot).filter(
+            IncomeBalanceSnapshot.wallet_id == wallet_id
+        ).order_by(IncomeBalanceSnapshot.as_of.desc()).first()
         
-        # Calculate balance from all completed transactions
-        completed_transactions = db.query(IncomeTransaction).filter(
-            IncomeTransaction.wallet_id == wallet.id,
+        query = select(func.coalesce(func.sum(SIGNED_AMOUNT), 0.0)).where(
+            IncomeTransaction.wallet_id == wallet_id,
             IncomeTransaction.status == TransactionStatus.COMPLETED
-        ).all()
-        
-        balance = 0.0
-        for transaction in completed_transactions:
-            if transaction.transaction_type == TransactionType.CREDIT:
-                balance += transaction.amount
-            elif transaction.transaction_type == TransactionType.DEBIT:
-                balance -= transaction.amount
+        )
+        if snapshot:
+            query = query.where(IncomeTransaction.created_at > snapshot.as_of)
+        delta = db.execute(query).scalar()
         
         # Ensure balance is not negative
-        balance = max(0.0, balance)
+        return max(0.0, to_money((snapshot.balance if snapshot else 0.0) + delta))
+    
+    @staticmethod
+    def snapshot_income_balances(db: Session, as_of: Optional[datetime] = None) -> int:
+        """
+        Write a balance snapshot for every income wallet with completed transactions
+        since its last snapshot, in one INSERT ... SELECT, and commit.
+        By default transactions from the last BALANCE_SNAPSHOT_SETTLE_MINUTES are left
+        out, so a transaction still being committed cannot fall behind a snapshot.
+        Returns the number of snapshots written.
+        """
+        as_of = as_of or datetime.now() - timedelta(minutes=settings.BALANCE_SNAPSHOT_SETTLE_MINUTES)
+        
+        latest = select(
+            IncomeBalanceSnapshot.wallet_id,
+            IncomeBalanceSnapshot.as_of,
+            IncomeBalanceSnapshot.balance
+        ).order_by(
+            IncomeBalanceSnapshot.wallet_id, IncomeBalanceSnapshot.as_of.desc()
+        ).distinct(IncomeBalanceSnapshot.wallet_id).subquery()
+        
+        balances = select(
+            cast(func.gen_random_uuid(), String),
+            IncomeTransaction.wallet_id,
+            literal(as_of, IncomeBalanceSnapshot.as_of.type),
+            func.coalesce(latest.c.balance, 0.0) + func.sum(SIGNED_AMOUNT),
+            func.now()
+        ).select_from(IncomeTransaction).outerjoin(
+            latest, latest.c.wallet_id == IncomeTransaction.wallet_id
+        ).where(
+            IncomeTransaction.status == TransactionStatus.COMPLETED,
+            IncomeTransaction.wallet_id.isnot(None),
+            IncomeTransaction.created_at <= as_of,
+            (latest.c.as_of.is_(None)) | (IncomeTransaction.created_at > latest.c.as_of)
+        ).group_by(IncomeTransaction.wallet_id, latest.c.balance)
+        
+        result = db.execute(
+            insert(IncomeBalanceSnapshot).from_select(
+                ["id", "wallet_id", "as_of", "balance", "created_at"], balances
+            )
+        )
+        db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def invalidate_stale_snapshots(db: Session, transaction: IncomeTransaction, old_status: TransactionStatus) -> None:
+        """
+        Drop the wallet's snapshots that counted, or missed, a transaction whose
+        status moved into or out of completed after they were taken.
+        Does not commit.
+        """
+        was_completed = old_status == TransactionStatus.COMPLETED
+        is_completed = transaction.status == TransactionStatus.COMPLETED
+        if was_completed == is_completed or not transaction.created_at:
+            return
+        
+        db.execute(
+            delete(IncomeBalanceSnapshot).where(
+                IncomeBalanceSnapshot.wallet_id == transaction.wallet_id,
+                IncomeBalanceSnapshot.as_of >= transaction.created_at
+            )
+        )
+    
+    @staticmethod
+    def recalculate_income_wallet_balance(db: Session, user_id: str) -> float:
+        """
+        Recalculate the income wallet balance from its ledger and store it on the wallet.
+        The wallet row is locked first, so no concurrent adjustment can land
+        between reading the ledger and writing the balance.
+        """
+        wallet = WalletService.get_or_create_income_wallet(db, user_id)
+        wallet = db.query(IncomeWallet).filter(IncomeWallet.id == wallet.id).with_for_update().populate_existing().one()
+        balance = WalletService.get_income_balance(db, wallet.id)
         
         # Update the wallet balance
         wallet.balance = balance
@@ -174,18 +517,4 @@ class WalletService:
         Get the calculated balance from transactions without updating the database.
         """
         wallet = WalletService.get_or_create_income_wallet(db, user_id)
-        
-        # Calculate balance from all completed transactions
-        completed_transactions = db.query(IncomeTransaction).filter(
-            IncomeTransaction.wallet_id == wallet.id,
-            IncomeTransaction.status == TransactionStatus.COMPLETED
-        ).all()
-        
-        balance = 0.0
-        for transaction in completed_transactions:
-            if transaction.transaction_type == TransactionType.CREDIT:
-                balance += transaction.amount
-            elif transaction.transaction_type == TransactionType.DEBIT:
-                balance -= transaction.amount
-        
-        return max(0.0, balance)
+        return WalletService.get_income_balance(db, wallet.id)
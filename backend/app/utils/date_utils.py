@@ -0,0 +1,46 @@
+"""
+Utility functions for investment payout schedules
+"""
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Union
+
+def next_interest_date(start_date: Union[date, datetime], after: date) -> date:
+    """
+    Get the monthly interest payout date in the month following `after`.
+
+    Interest is paid on the same day of month as the investment start date.
+    If that day does not exist in the payout month (e.g. the 31st), it is paid
+    on the last day of that month instead.
+
+    Args:
+        start_date: Investment start date, which anchors the day of month
+        after: The start date itself or the previous payout date
+
+    Returns:
+        The next payout date
+    """
+    year = after.year + after.month // 12
+    month = after.month % 12 + 1
+    day = min(start_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+def last_payout_date(end_date: Union[date, datetime]) -> date:
+    """
+    Get the last day an investment is still paid interest.
+
+    The completion job runs after the interest job and completes an investment
+    once its end date has passed at midnight, so an investment is still paid
+    on the day it completes.
+
+    Args:
+        end_date: Investment end date
+
+    Returns:
+        The day the investment completes
+    """
+    if isinstance(end_date, datetime):
+        if end_date.time() == datetime.min.time():
+            return end_date.date()
+        return end_date.date() + timedelta(days=1)
+    return end_date
@@ -0,0 +1,34 @@
+"""
+Utility functions for money amounts
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Optional
+
+from pydantic import AfterValidator
+from sqlalchemy import Numeric
+
+# Money is stored as fixed-point rupees with two decimal places (whole paise),
+# so sums in SQL are exact and equal the stored balances
+MONEY_PLACES = 2
+Money = Numeric(18, MONEY_PLACES, asdecimal=False)
+
+def to_money(amount: Optional[float]) -> Optional[float]:
+    """
+    Round an amount to whole paise, half up, the way it will be stored.
+
+    Computed amounts (interest, returns, bonuses) are rounded before they are
+    posted, so every balance change is exactly the sum of its stored amounts.
+
+    Args:
+        amount: The amount in rupees
+
+    Returns:
+        The amount rounded to two decimal places
+    """
+    if amount is None:
+        return None
+    rounded = Decimal(repr(float(amount))).quantize(Decimal(1).scaleb(-MONEY_PLACES), rounding=ROUND_HALF_UP)
+    return float(rounded)
+
+# Money fields of request and response schemas, rounded to whole paise on the way in
+MoneyAmount = Annotated[float, AfterValidator(to_money)]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session
 from app.services.notification_service import NotificationService
 from app.models.user import User
@@ -98,16 +98,30 @@ def send_address_verification_notification(db: Session, user_id: str) -> None:
     )
 
 
+def build_voucher_notification(user_id: str, voucher_code: str, expiry_days: Optional[int]) -> Dict[str, Any]:
+    """
+    Build the notification row for a new voucher, for bulk inserts
+    """
+    validity = f" Valid for {expiry_days} days." if expiry_days is not None else ""
+    return {
+        "user_id": user_id,
+        "title": "Shopping Voucher Received",
+        "message": f"You've received a shopping voucher code: {voucher_code}.{validity}",
+        "type": "info",
+    }
+
+
 def send_voucher_notification(db: Session, user_id: str, voucher_code: str, expiry_days: int) -> None:
     """
     Send a notification to the user about a new voucher
     """
+    notification = build_voucher_notification(user_id, voucher_code, expiry_days)
     notification_service = NotificationService(db)
     notification_service.create_system_notification(
         user_id=user_id,
-        title="Shopping Voucher Received",
-        message=f"You've received a shopping voucher code: {voucher_code}. Valid for {expiry_days} days.",
-        notification_type="info"
+        title=notification["title"],
+        message=notification["message"],
+        notification_type=notification["type"]
     )
 
 
@@ -202,16 +216,29 @@ def send_payment_rejected_notification(db: Session, user_id: str, payment_id: st
     )
 
 
+def build_investment_return_notification(user_id: str, plan_name: str, amount: float) -> Dict[str, Any]:
+    """
+    Build the notification row for an investment return credit, for bulk inserts
+    """
+    return {
+        "user_id": user_id,
+        "title": "Investment Return Credited",
+        "message": f"₹{amount:,.2f} has been credited to your income wallet from your {plan_name} investment.",
+        "type": "success",
+    }
+
+
 def send_investment_return_notification(db: Session, user_id: str, plan_name: str, amount: float) -> None:
     """
     Send a notification to the user when their investment generates a return
     """
+    notification = build_investment_return_notification(user_id, plan_name, amount)
     notification_service = NotificationService(db)
     notification_service.create_system_notification(
         user_id=user_id,
-        title="Investment Return Credited",
-        message=f"₹{amount:,.2f} has been credited to your income wallet from your {plan_name} investment.",
-        notification_type="success"
+        title=notification["title"],
+        message=notification["message"],
+        notification_type=notification["type"]
     )
 
 
@@ -228,27 +255,53 @@ def send_team_investment_notification(db: Session, user_id: str, amount: float,
     )
 
 
+def build_interest_notification(user_id: str, investment_id: str, amount: float) -> Dict[str, Any]:
+    """
+    Build the notification row for a monthly interest credit, for bulk inserts
+    """
+    return {
+        "user_id": user_id,
+        "title": "Monthly Interest Credited",
+        "message": f"Monthly interest of ₹{amount:,.0f} (10% annual rate) has been credited to your income wallet.",
+        "type": "success",
+    }
+
+
 def send_interest_notification(db: Session, user_id: str, investment_id: str, amount: float) -> None:
     """
     Send a notification to the user when monthly interest is credited to their account
     """
+    notification = build_interest_notification(user_id, investment_id, amount)
     notification_service = NotificationService(db)
     notification_service.create_system_notification(
         user_id=user_id,
-        title="Monthly Interest Credited",
-        message=f"Monthly interest of ₹{amount:,.0f} (10% annual rate) has been credited to your income wallet.",
-        notification_type="success"
+        title=notification["title"],
+        message=notification["message"],
+        notification_type=notification["type"]
     )
 
 
+def build_investment_completed_notification(user_id: str, investment_id: str, amount: float, returns: float) -> Dict[str, Any]:
+    """
+    Build the notification row for a completed investment, for bulk inserts
+    """
+    return {
+        "user_id": user_id,
+        "title": "Investment Completed",
+        "message": f"Your investment of ₹{amount:,.0f} has completed its term. Total returns earned: ₹{returns:,.0f}.",
+        "type": "info",
+    }
+
+
 def send_investment_completed_notification(db: Session, user_id: str, investment_id: str, amount: float, returns: float) -> None:
     """
     Send a notification to the user when their investment completes its term
     """
+    notification = build_investment_completed_notification(user_id, investment_id, amount, returns)
     notification_service = NotificationService(db)
     notification_service.create_system_notification(
         user_id=user_id,
-        title="Investment Completed",
-        message=f"Your investment of ₹{amount:,.0f} has completed its term. Total returns earned: ₹{returns:,.0f}.",
-        notification_type="info"
+        title=notification["title"],
+        message=notification["message"],
+        notification_type=notification["type"]
     )
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for list endpoints
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Query as ORMQuery
+
+# Response header carrying the cursor of the next page, absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: Optional[datetime], id: str) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+    """
+    payload = json.dumps([created_at.isoformat() if created_at is not None else None, id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if it is malformed.
+    """
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(created_at) if created_at is not None else None), str(id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class PageParams:
+    """
+    Query parameters of a paginated list endpoint, used as a dependency.
+    Pass the X-Next-Cursor header of one response as `cursor` to get the next page.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None)
+    ):
+        self.limit = limit
+        self.after = None
+        if cursor:
+            try:
+                self.after = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def paginate(
+    query: ORMQuery,
+    page: PageParams,
+    response: Optional[Response] = None,
+    created_column: Any = None,
+    id_column: Any = None
+) -> List[Any]:
+    """
+    Fetch one page of `query`, newest first, ordered by (created_at, id) of its
+    entity unless other columns are given.
+    The position is a keyset on those columns rather than an OFFSET, so with an
+    index on (owner, created_at, id) every page costs the same however deep it is.
+    Rows without a created time come first, as Postgres sorts NULLs in a
+    descending index scan.
+    Sets the cursor of the next page on the response, if there is one.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    created_column = created_column if created_column is not None else entity.created_at
+    id_column = id_column if id_column is not None else entity.id
+
+    if page.after:
+        after_created, after_id = page.after
+        if after_created is None:
+            # Still among the NULLs: the rest of them, then every dated row
+            query = query.filter(or_(
+                and_(created_column.is_(None), id_column < after_id),
+                created_column.isnot(None)
+            ))
+        else:
+            query = query.filter(tuple_(created_column, id_column) < tuple_(after_created, after_id))
+
+    # One extra row tells whether there is a next page
+    rows = query.order_by(
+        created_column.desc().nulls_first(), id_column.desc()
+    ).limit(page.limit + 1).all()
+    items = rows[:page.limit]
+
+    if response is not None and len(rows) > page.limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, created_column.key), getattr(last, id_column.key)
+        )
+    return items
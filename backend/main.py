@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
-from app.api.routes import auth, users, profile, investments, wallets, network, uploads, referrals, contact, plans, noc, bonus, auth_reset_password, notifications, otp, payments
+from app.api.routes import auth, users, profile, investments, wallets, network, uploads, referrals, contact, plans, noc, bonus, auth_reset_password, notifications, otp, payments, forecast, jobs
 from app.core.config import settings
 from app.db.database import engine
 from app.admin import setup_admin
@@ -21,7 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Content-Type", "Authorization", "Accept"],
-    expose_headers=["Content-Type", "Authorization"],
+    expose_headers=["Content-Type", "Authorization", "X-Next-Cursor", "Content-Disposition"],
     max_age=600  # Cache preflight requests for 10 minutes
 )
 
@@ -45,6 +45,8 @@ app.include_router(auth_reset_password.router, prefix="/api", tags=["Authenticat
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
 app.include_router(otp.router, prefix="/api", tags=["Authentication"])
 app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
+app.include_router(forecast.router, prefix="/api", tags=["Forecast"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 # Include admin payment routes
 app.include_router(admin_payment_router, tags=["Admin"])
@@ -74,19 +76,28 @@ def health_check():
 
 # Initialize scheduler
 from app.core.scheduler import setup_scheduler
+from app.core.referral_graph import referral_graph
 
-# Create scheduler instance
-scheduler = setup_scheduler()
+# Create scheduler instance. Set SCHEDULER_ENABLED=false when the jobs
+# run in a standalone process (scripts/run_scheduler.py) instead
+scheduler = setup_scheduler() if settings.SCHEDULER_ENABLED else None
 
 # Start the scheduler when the application starts
 @app.on_event("startup")
 def start_scheduler():
-    scheduler.start()
+    if scheduler:
+        scheduler.start()
+
+# Load the in-process referral graph, when enabled, in the background
+@app.on_event("startup")
+def load_referral_graph():
+    if settings.REFERRAL_GRAPH_ENABLED:
+        referral_graph.start()
 
 # Shutdown the scheduler when the application stops
 @app.on_event("shutdown")
 def shutdown_scheduler():
-    if scheduler.running:
+    if scheduler and scheduler.running:
         scheduler.shutdown()
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+import sys
+import argparse
+import logging
+from datetime import date
+from pathlib import Path
+
+# Add the parent directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.job_lock import job_lock
+from app.core.scheduler import interest_catch_up_shard_job
+from app.core.sharding import run_sharded
+
+def main() -> None:
+    """
+    Credit monthly interest periods missed while the scheduler was not running.
+    Takes the interest job's lock, so it never runs alongside the scheduled job.
+    """
+    parser = argparse.ArgumentParser(description="Catch up on missed monthly interest payouts")
+    parser.add_argument("--through", type=date.fromisoformat, default=date.today(),
+                        help="Last payout day to catch up, YYYY-MM-DD (default: today)")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="Only catch up investments whose next payout is on or after this day")
+    parser.add_argument("--shards", type=int, default=settings.SCHEDULER_SHARDS,
+                        help="Number of worker processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    with job_lock("process_monthly_interest") as acquired:
+        if not acquired:
+            print("The interest job is running, try again once it has finished")
+            sys.exit(1)
+        results = run_sharded(interest_catch_up_shard_job, args.shards, through=args.through, since=args.since)
+
+    print(f"Caught up {results.get('processed', 0)} interest payments of {results.get('scanned', 0)} due investments")
+    print(f"Total interest credited: {results.get('total_interest', 0.0):.2f}")
+    if results["errors"]:
+        print(f"{len(results['errors'])} chunks failed:")
+        for error in results["errors"]:
+            print(f"  {error}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add the parent directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.database import SessionLocal
+from app.services.referral_tree_service import ReferralTreeService
+
+def main() -> None:
+    """
+    Recompute the referral closure table from users' referrers, e.g. after
+    referrers were changed outside the application, and the team counts from it.
+    """
+    parser = argparse.ArgumentParser(description="Rebuild the referral closure table from users' referrers")
+    parser.add_argument("--counts-only", action="store_true",
+                        help="Only recompute the per-level team counts from the closure table")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.counts_only:
+            written = ReferralTreeService.rebuild(db)
+            print(f"Rebuilt referral closure: {written} links")
+        levels = ReferralTreeService.rebuild_level_counts(db)
+        print(f"Rebuilt referral team counts: {levels} levels")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add the parent directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.database import SessionLocal
+from app.services.reconciliation_service import WALLET_LEDGERS
+from app.services.wallet_rollup_service import WalletRollupService
+
+def main() -> None:
+    """
+    Recompute the monthly wallet totals from the transactions, e.g. after
+    transactions were changed outside the application.
+    """
+    parser = argparse.ArgumentParser(description="Rebuild monthly wallet totals from the transactions")
+    parser.add_argument("--kind", choices=list(WALLET_LEDGERS), action="append",
+                        help="Wallet kind to rebuild, may be repeated (default: all)")
+    parser.add_argument("--since", type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+                        help="First month to rebuild, as YYYY-MM (default: all history)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for kind in args.kind or list(WALLET_LEDGERS):
+            written = WalletRollupService.rebuild(db, kind, args.since)
+            print(f"Rebuilt {kind} wallet totals: {written} monthly buckets")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import sys
+import csv
+import argparse
+import logging
+from pathlib import Path
+
+# Add the parent directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.reconciliation_service import ReconciliationService, WALLET_LEDGERS
+
+FIELDS = ["kind", "wallet_id", "user_id", "stored_balance", "ledger_balance", "drift", "transactions"]
+
+def main() -> None:
+    """
+    Compare every wallet balance with the sum of its completed transactions and
+    write the wallets that drift as CSV, optionally fixing them.
+    """
+    parser = argparse.ArgumentParser(description="Reconcile wallet balances with their transactions")
+    parser.add_argument("--kind", choices=list(WALLET_LEDGERS), action="append",
+                        help="Wallet kind to check, may be repeated (default: all)")
+    parser.add_argument("--fix", action="store_true",
+                        help="Set drifting balances to their ledger balance")
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_CHUNK_SIZE,
+                        help="Wallets fixed per transaction")
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout,
+                        help="CSV file for the drifting wallets (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+                        stream=sys.stderr)
+
+    writer = csv.DictWriter(args.output, fieldnames=FIELDS)
+    writer.writeheader()
+
+    db = SessionLocal()
+    fix_db = SessionLocal() if args.fix else None
+    try:
+        results = ReconciliationService.reconcile(
+            db,
+            kinds=args.kind or list(WALLET_LEDGERS),
+            fix_db=fix_db,
+            batch_size=args.batch_size,
+            report=writer.writerow
+        )
+    finally:
+        db.close()
+        if fix_db is not None:
+            fix_db.close()
+    args.output.flush()
+
+    print(f"{results['scanned']} wallets drift from their ledger, {results['total_drift']:.2f} in total", file=sys.stderr)
+    if args.fix:
+        print(f"Fixed {results['processed']} wallets in {results['elapsed_seconds']:.1f}s", file=sys.stderr)
+    if results["errors"]:
+        print(f"{len(results['errors'])} batches failed:", file=sys.stderr)
+        for error in results["errors"]:
+            print(f"  {error}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from app.core.scheduler import setup_scheduler
+
+def main() -> None:
+    """
+    Run the scheduled jobs in a standalone process, outside the web workers.
+    Start the API with SCHEDULER_ENABLED=false when using this. Several
+    instances can run side by side for failover: each job only runs in one.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    scheduler = setup_scheduler(BlockingScheduler)
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+if __name__ == "__main__":
+    main()
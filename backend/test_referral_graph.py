@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-process referral graph index (app/core/referral_graph.py).
+They build the index from (user ID, referrer ID) pairs, so no database is needed:
+
+    python -m pytest test_referral_graph.py
+"""
+
+import threading
+import uuid
+
+import pytest
+
+from app.core.referral_graph import ReferralGraph
+
+
+def make_ids(count):
+    return [str(uuid.uuid4()) for _ in range(count)]
+
+
+def build(pairs):
+    graph = ReferralGraph()
+    graph.build(pairs)
+    return graph
+
+
+def test_build():
+    """Upline, depth, children, downline and downline sizes of a built tree."""
+    a, b, c, d, e = make_ids(5)
+    # a <- b <- c, a <- d, e on its own
+    graph = build([(c, b), (b, a), (a, None), (d, a), (e, None)])
+
+    assert graph.loaded
+    assert len(graph) == 5
+    assert graph.upline(c, 5) == [b, a]
+    assert graph.upline(c, 1) == [b]
+    assert graph.upline(a, 5) == []
+    assert graph.depth(c) == 2
+    assert graph.depth_below(a, c) == 2
+    assert graph.depth_below(a, a) == 0
+    assert graph.depth_below(e, c) is None
+    assert sorted(graph.children(a)) == sorted([b, d])
+    assert graph.downline_size(a) == 3
+    assert graph.downline_size(b) == 1
+    assert graph.downline_size(e) == 0
+    assert sorted(graph.downline(a, 1)) == sorted([(b, 1), (d, 1)])
+    assert sorted(graph.downline(a, 5)) == sorted([(b, 1), (d, 1), (c, 2)])
+
+
+def test_ids_that_are_not_uuids():
+    a = str(uuid.uuid4())
+    graph = build([(a, None), ("legacy-1", a), ("legacy-2", "legacy-1")])
+
+    assert graph.upline("legacy-2", 5) == ["legacy-1", a]
+    assert graph.downline_size(a) == 2
+    # Upper-case UUIDs are not canonical IDs, so they are kept as they are
+    upper = str(uuid.uuid4()).upper()
+    graph.add(upper, "legacy-2")
+    assert graph.upline(upper, 1) == ["legacy-2"]
+
+
+def test_unknown_users_raise_key_error():
+    a = str(uuid.uuid4())
+    with pytest.raises(KeyError):
+        ReferralGraph().upline(a, 3)
+
+    graph = build([(a, None)])
+    with pytest.raises(KeyError):
+        graph.upline(str(uuid.uuid4()), 3)
+
+
+def test_link_and_unlink():
+    """Moving a node updates its parent's children and every upline's downline size."""
+    a, b, c, d, e = make_ids(5)
+    # a <- b <- c <- d, a <- e
+    graph = build([(a, None), (b, a), (c, b), (d, c), (e, a)])
+    node_c, node_e = graph._node(c), graph._node(e)
+
+    graph._unlink(node_c)
+    assert graph.upline(c, 5) == []
+    assert graph.children(b) == []
+    assert graph.downline_size(a) == 2
+    assert graph.downline_size(b) == 0
+    # Unlinking a node without a parent changes nothing
+    graph._unlink(node_c)
+    assert graph.downline_size(a) == 2
+
+    graph._link(node_c, node_e)
+    assert graph.upline(d, 5) == [c, e, a]
+    assert graph.children(e) == [c]
+    assert graph.downline_size(e) == 2
+    assert graph.downline_size(a) == 4
+
+
+def test_unlink_a_middle_sibling():
+    a, b, c, d = make_ids(4)
+    graph = build([(a, None), (b, a), (c, a), (d, a)])
+
+    graph._unlink(graph._node(c))
+    assert sorted(graph.children(a)) == sorted([b, d])
+    assert graph.downline_size(a) == 2
+
+
+def test_add_and_move():
+    a, b, c, d = make_ids(4)
+    graph = build([(a, None), (b, a), (c, None)])
+
+    graph.add(d, b)
+    assert graph.upline(d, 5) == [b, a]
+    # Adding a user twice, or under an unknown referrer, is ignored
+    graph.add(d, c)
+    assert graph.upline(d, 5) == [b, a]
+    graph.add(str(uuid.uuid4()), str(uuid.uuid4()))
+    assert len(graph) == 4
+
+    graph.move(b, c)
+    assert graph.upline(d, 5) == [b, c]
+    assert graph.downline_size(a) == 0
+    assert graph.downline_size(c) == 2
+
+
+def test_referral_cycles_are_left_out():
+    a, b, c, d, e, f = make_ids(6)
+    # a <- b, c <-> d with e below them, f refers itself
+    graph = build([(a, None), (b, a), (c, d), (d, c), (e, d), (f, f)])
+
+    assert graph.upline(b, 5) == [a]
+    for user_id in (c, d, e):
+        with pytest.raises(KeyError):
+            graph.upline(user_id, 5)
+    assert graph.depth(f) == 0
+    assert graph.downline_size(f) == 0
+
+
+def test_move_under_own_downline_drops_the_index(monkeypatch):
+    a, b, c = make_ids(3)
+    graph = build([(a, None), (b, a), (c, b)])
+    reloads = []
+    monkeypatch.setattr(graph, "load", lambda: reloads.append(True))
+
+    graph.move(a, c)
+    assert not graph.loaded
+    with pytest.raises(KeyError):
+        graph.upline(c, 5)
+    # The reload runs in a thread; wait for it
+    for thread in threading.enumerate():
+        if thread.name == "referral-graph-reload":
+            thread.join()
+    assert reloads == [True]
+
+
+def test_build_replays_pending_changes():
+    """Changes made while a load was reading are applied onto the new index."""
+    a, b, c, d = make_ids(4)
+    graph = build([(a, None)])
+    graph._pending = []
+    graph.add(b, a)
+    graph.add(c, None)
+
+    graph.build([(a, None), (d, None)])
+    assert graph.upline(b, 5) == [a]
+    assert graph.downline_size(a) == 1
+    assert graph.upline(c, 5) == []
+    assert len(graph) == 4
+
+
+def test_failed_move_during_replay_reloads_after_the_load(monkeypatch):
+    """A move that cannot be replayed drops the new index and loads it again."""
+    a, b, c = make_ids(3)
+    users = [(a, None), (b, a), (c, b)]
+    graph = ReferralGraph()
+    loads = []
+
+    def load_once():
+        graph._pending = [("move", a, c)] if not loads else []
+        loads.append(True)
+        graph.build(users)
+        graph._pending = None
+
+    monkeypatch.setattr(graph, "_load_once", load_once)
+    graph.load()
+
+    assert len(loads) == 2
+    assert graph.loaded
+    assert not graph._loading
+    assert not graph._reload_requested
+    assert graph.upline(c, 5) == [b, a]
+
+
+def test_load_skips_while_loading():
+    graph = ReferralGraph()
+    graph._loading = True
+    graph.load()
+    assert not graph.loaded